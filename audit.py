@@ -0,0 +1,319 @@
+import atexit
+import glob
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+
+# Append-only, hash-chained audit log. Requests only enqueue entries; one
+# background writer per process drains the queue in batches and appends them
+# to NDJSON segment files. Every entry carries the hash of its predecessor,
+# so editing, dropping or reordering entries breaks the chain. The chain head
+# and an (artifact, user) index live in a small SQLite database next to the
+# segments; a batch is appended while holding its write lock, which also
+# serializes the writers of different gunicorn workers.
+
+DEFAULT_AUDIT_DIR = os.environ.get('AUDIT_LOG_DIR', 'audit_log')
+FSYNC_INTERVAL = float(os.environ.get('AUDIT_FSYNC_INTERVAL', 1.0))
+SEGMENT_BYTES = int(os.environ.get('AUDIT_SEGMENT_MB', 64)) * 1024 * 1024
+QUEUE_LIMIT = int(os.environ.get('AUDIT_QUEUE_LIMIT', 10000))
+BATCH_SIZE = 500
+GENESIS_HASH = "0" * 64
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS audit_index (
+    seq INTEGER PRIMARY KEY,
+    entry_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    user TEXT,
+    artifact TEXT,
+    action TEXT,
+    segment INTEGER NOT NULL,
+    position INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_audit_artifact ON audit_index (artifact, seq);
+CREATE INDEX IF NOT EXISTS idx_audit_user ON audit_index (user, seq);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_audit_entry ON audit_index (entry_id);
+
+CREATE TABLE IF NOT EXISTS audit_head (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    seq INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    segment INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+"""
+
+
+def entry_hash(prev_hash, entry):
+    """SHA-256 over the previous hash and the canonical JSON of the entry (without its own hash)."""
+    body = json.dumps({k: v for k, v in entry.items() if k != "hash"}, sort_keys=True, default=str)
+    return hashlib.sha256((prev_hash + body).encode()).hexdigest()
+
+
+class AuditLog:
+    """
+    Audit trail with a non-blocking log() for request handlers. Segments are
+    fsynced at most every `fsync_interval` seconds (0 = after every batch) and
+    rotated once they reach `segment_bytes`; rotated segments are made read-only.
+    """
+
+    def __init__(self, directory=DEFAULT_AUDIT_DIR, fsync_interval=FSYNC_INTERVAL,
+                 segment_bytes=SEGMENT_BYTES, queue_limit=QUEUE_LIMIT):
+        self.directory = directory
+        self.fsync_interval = fsync_interval
+        self.segment_bytes = segment_bytes
+        self.queue_limit = queue_limit
+        os.makedirs(directory, exist_ok=True)
+        self.index_path = os.path.join(directory, "index.db")
+        self._local = threading.local()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._file = None  # (segment number, open append handle) of the writer
+        self._last_fsync = 0.0
+        self.written = 0
+        self.dropped = 0
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(INDEX_SCHEMA)
+        self._recover()
+        atexit.register(self.close)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.index_path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def segment_path(self, segment):
+        return os.path.join(self.directory, f"audit-{segment:06d}.ndjson")
+
+    def _recover(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            head = conn.execute("SELECT segment, size FROM audit_head WHERE id = 1").fetchone()
+            self._cut_uncommitted(*(tuple(head) if head else (1, 0)))
+        finally:
+            conn.execute("COMMIT")
+
+    def _cut_uncommitted(self, segment, size):
+        """Truncates entries appended by a batch that never committed (writer crash or rollback)."""
+        path = self.segment_path(segment)
+        if os.path.exists(path) and os.path.getsize(path) > size:
+            os.truncate(path, size)
+
+    # --- Writing ---
+
+    def _ensure_writer(self):
+        # Started lazily so forked workers each get their own writer thread
+        if self._thread is None or self._pid != os.getpid():
+            with self._start_lock:
+                if self._thread is None or self._pid != os.getpid():
+                    self._queue = queue.Queue(self.queue_limit)
+                    self._file = None
+                    self._pid = os.getpid()
+                    self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                    self._thread.start()
+
+    def log(self, user, action, artifact, **detail):
+        """
+        Queues an entry and returns it (with its entry id) without touching the
+        disk. Blocks only when the writer is QUEUE_LIMIT entries behind.
+        """
+        entry = {
+            "entry_id": uuid.uuid4().hex,
+            "timestamp": datetime.now().isoformat(),
+            "user": user,
+            "action": action,
+            "artifact": None if artifact is None else str(artifact),
+            "pid": os.getpid(),
+            **detail,
+        }
+        self._ensure_writer()
+        self._queue.put((time.time(), entry))
+        return entry
+
+    def flush(self, timeout=10):
+        """Waits until everything queued so far is written and fsynced."""
+        if self._thread is None or self._pid != os.getpid():
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        self.flush()
+
+    def _run(self):
+        dirty = False
+        while True:
+            try:
+                # Wake up to fsync a quiet log once its interval has passed
+                batch = [self._queue.get(timeout=max(self.fsync_interval, 0.001) if dirty else None)]
+            except queue.Empty:
+                batch = []
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            entries = [item for item in batch if isinstance(item, tuple)]
+            waiters = [item for item in batch if isinstance(item, threading.Event)]
+            try:
+                if entries:
+                    self._write(entries)
+                    dirty = True
+            except Exception as e:
+                # Report rather than kill the writer; the batch was rolled back as a whole
+                self.dropped += len(entries)
+                print(f"[AUDIT] Failed to write {len(entries)} audit entries: {type(e).__name__}: {e}")
+            if dirty and (waiters or time.monotonic() - self._last_fsync >= self.fsync_interval):
+                try:
+                    self._fsync()
+                    dirty = False
+                except OSError as e:
+                    print(f"[AUDIT] fsync failed: {e}")
+            for waiter in waiters:
+                waiter.set()
+
+    def _segment_file(self, segment):
+        if self._file is None or self._file[0] != segment:
+            if self._file is not None:
+                self._fsync()
+                self._file[1].close()
+            self._file = (segment, open(self.segment_path(segment), "ab"))
+        return self._file[1]
+
+    def _fsync(self):
+        if self._file is not None:
+            self._file[1].flush()
+            os.fsync(self._file[1].fileno())
+        self._last_fsync = time.monotonic()
+
+    def _write(self, entries):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            head = conn.execute("SELECT seq, hash, segment, size FROM audit_head WHERE id = 1").fetchone()
+            seq, prev, segment, size = tuple(head) if head else (0, GENESIS_HASH, 1, 0)
+            self._cut_uncommitted(segment, size)
+            if size and size >= self.segment_bytes:
+                os.chmod(self.segment_path(segment), 0o444)
+                segment, size = segment + 1, 0
+            f = self._segment_file(segment)
+
+            rows, lines = [], []
+            for ts, entry in entries:
+                seq += 1
+                entry["seq"] = seq
+                entry["prev_hash"] = prev
+                entry["hash"] = prev = entry_hash(prev, entry)
+                line = (json.dumps(entry, sort_keys=True, default=str) + "\n").encode()
+                rows.append((seq, entry["entry_id"], ts, entry.get("user"),
+                             entry.get("artifact"), entry.get("action"), segment, size))
+                lines.append(line)
+                size += len(line)
+            f.write(b"".join(lines))
+            f.flush()
+
+            conn.executemany(
+                "INSERT INTO audit_index (seq, entry_id, ts, user, artifact, action, segment, position) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            conn.execute(
+                "INSERT INTO audit_head (id, seq, hash, segment, size) VALUES (1, ?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET seq = excluded.seq, hash = excluded.hash, "
+                "segment = excluded.segment, size = excluded.size",
+                (seq, prev, segment, size)
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        self.written += len(entries)
+
+    # --- Reading ---
+
+    def query(self, artifact=None, user=None, action=None, since=None, until=None, limit=100):
+        """
+        Newest matching entries first, located through the index and read from
+        their segments. `since`/`until` are epoch seconds.
+        """
+        where, params = [], []
+        for column, value in (("artifact", artifact), ("user", user), ("action", action)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(str(value))
+        if since is not None:
+            where.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("ts <= ?")
+            params.append(until)
+        sql = "SELECT segment, position FROM audit_index"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY seq DESC LIMIT ?"
+        params.append(limit)
+
+        entries, handles = [], {}
+        try:
+            for segment, position in self._conn().execute(sql, params).fetchall():
+                if segment not in handles:
+                    handles[segment] = open(self.segment_path(segment), "rb")
+                f = handles[segment]
+                f.seek(position)
+                entries.append(json.loads(f.readline()))
+        finally:
+            for f in handles.values():
+                f.close()
+        return entries
+
+    def verify(self):
+        """
+        Recomputes the hash chain over every segment. Returns {"valid", "entries",
+        "head"} plus the seq and reason of the first broken link, if any.
+        """
+        conn = self._conn()
+        head = conn.execute("SELECT seq, hash FROM audit_head WHERE id = 1").fetchone()
+        expected_seq, prev = 0, GENESIS_HASH
+        segments = sorted(glob.glob(os.path.join(self.directory, "audit-*.ndjson")))
+        for path in segments:
+            with open(path, "rb") as f:
+                for line in f:
+                    entry = json.loads(line)
+                    expected_seq += 1
+                    if entry.get("seq") != expected_seq:
+                        return {"valid": False, "entries": expected_seq - 1, "broken_at": expected_seq,
+                                "reason": f"expected seq {expected_seq}, found {entry.get('seq')}"}
+                    if entry.get("prev_hash") != prev or entry_hash(prev, entry) != entry.get("hash"):
+                        return {"valid": False, "entries": expected_seq - 1, "broken_at": expected_seq,
+                                "reason": "hash mismatch"}
+                    prev = entry["hash"]
+        head_seq, head_hash = tuple(head) if head else (0, GENESIS_HASH)
+        if (expected_seq, prev) != (head_seq, head_hash):
+            return {"valid": False, "entries": expected_seq, "broken_at": expected_seq + 1,
+                    "reason": f"chain ends at seq {expected_seq}, index head is seq {head_seq}"}
+        return {"valid": True, "entries": expected_seq, "head": head_hash}
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize() if self._queue is not None and self._pid == os.getpid() else 0,
+            "written": self.written,
+            "failed": self.dropped,
+            "segments": len(glob.glob(os.path.join(self.directory, "audit-*.ndjson"))),
+        }
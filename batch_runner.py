@@ -0,0 +1,200 @@
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import pandas as pd
+
+from forensic_analysis import StreamingForensicAnalyzer, read_chunks
+
+EXPORT_EXTENSIONS = ('.csv', '.parquet', '.pq')
+
+
+# --- Case Discovery ---
+def _find_export(case_dir, name):
+    for ext in EXPORT_EXTENSIONS:
+        path = os.path.join(case_dir, name + ext)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def discover_cases(source):
+    """
+    Returns [{"case_id", "calls", "sms"}, ...] from either a directory with one
+    sub-directory per case (each holding calls.csv|parquet and sms.csv|parquet)
+    or a manifest file (.json list or .csv with case_id, calls, sms columns).
+    """
+    if os.path.isdir(source):
+        cases = []
+        for name in sorted(os.listdir(source)):
+            case_dir = os.path.join(source, name)
+            if not os.path.isdir(case_dir):
+                continue
+            calls, sms = _find_export(case_dir, "calls"), _find_export(case_dir, "sms")
+            if calls and sms:
+                cases.append({"case_id": name, "calls": calls, "sms": sms})
+            else:
+                print(f"[BATCH] Skipping {name}: calls/sms export not found")
+        return cases
+
+    base = os.path.dirname(os.path.abspath(source))
+    if source.endswith('.json'):
+        with open(source) as f:
+            entries = json.load(f)
+    else:
+        with open(source, newline='') as f:
+            entries = list(csv.DictReader(f))
+    # Relative export paths are resolved against the manifest's directory
+    return [
+        {
+            "case_id": str(e["case_id"]),
+            "calls": os.path.join(base, e["calls"]),
+            "sms": os.path.join(base, e["sms"]),
+        }
+        for e in entries
+    ]
+
+
+# --- Time Partitioning ---
+def time_partitions(case, parts, chunksize):
+    """
+    Splits a case into `parts` hour-aligned time ranges covering all its
+    records. Slices keep their call times and are merged before burst
+    detection, so the boundaries never split a burst.
+    """
+    lo, hi = None, None
+    for path in (case["calls"], case["sms"]):
+        for chunk in read_chunks(path, chunksize, columns=['timestamp']):
+            ts = pd.to_datetime(chunk['timestamp'], errors='coerce').dropna()
+            if ts.empty:
+                continue
+            lo = ts.min() if lo is None else min(lo, ts.min())
+            hi = ts.max() if hi is None else max(hi, ts.max())
+    if lo is None or parts <= 1:
+        return [(None, None)]
+
+    lo, hi = lo.floor('h'), hi.floor('h') + pd.Timedelta(hours=1)
+    step = max(pd.Timedelta(hours=1), ((hi - lo) / parts).ceil('h'))
+    bounds = []
+    start = lo
+    while start < hi:
+        bounds.append(start)
+        start += step
+    # Open outer bounds: the first slice also owns records without a parseable timestamp
+    return [(None if i == 0 else b, None if i == len(bounds) - 1 else bounds[i + 1]) for i, b in enumerate(bounds)]
+
+
+# --- Workers ---
+def analyze_slice(case, time_range, chunksize, now):
+    """Process-pool task: aggregates one case (or one time slice of it)."""
+    analyzer = StreamingForensicAnalyzer(chunksize=chunksize, now=now, time_range=time_range)
+    for chunk in read_chunks(case["calls"], chunksize):
+        analyzer.consume_calls(chunk)
+    for chunk in read_chunks(case["sms"], chunksize):
+        analyzer.consume_sms(chunk)
+    return analyzer
+
+
+def write_report(out_dir, case_id, report):
+    case_dir = os.path.join(out_dir, case_id)
+    os.makedirs(case_dir, exist_ok=True)
+    path = os.path.join(case_dir, 'forensic_report.json')
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=4, default=str)
+    return path
+
+
+def run_batch(cases, out_dir, workers=None, partitions=1, partition_min_bytes=1 << 30, chunksize=500_000):
+    """
+    Fans all cases out to a process pool and writes one forensic_report.json per
+    case. Cases whose exports exceed `partition_min_bytes` are split into
+    `partitions` time slices that run in parallel and are merged afterwards.
+    Returns the throughput summary.
+    """
+    now = datetime.now()
+    started = time.perf_counter()
+    results = []
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+        for case in cases:
+            size = sum(os.path.getsize(case[k]) for k in ("calls", "sms"))
+            ranges = time_partitions(case, partitions, chunksize) if partitions > 1 and size >= partition_min_bytes else [(None, None)]
+            case["slices"] = [None] * len(ranges)
+            case["started"] = time.perf_counter()
+            source = {k: case[k] for k in ("case_id", "calls", "sms")}
+            for i, time_range in enumerate(ranges):
+                future = pool.submit(analyze_slice, source, time_range, chunksize, now)
+                pending[future] = (case, i)
+
+        remaining = {case["case_id"]: len(case["slices"]) for case in cases}
+        for future in as_completed(pending):
+            case, i = pending[future]
+            case_id = case["case_id"]
+            try:
+                case["slices"][i] = future.result()
+            except Exception as e:
+                case["error"] = f"{type(e).__name__}: {e}"
+            remaining[case_id] -= 1
+            if remaining[case_id]:
+                continue
+
+            # All slices done: merge in time order and write the report
+            entry = {"case_id": case_id, "seconds": round(time.perf_counter() - case["started"], 3)}
+            if "error" in case:
+                entry.update(status="failed", error=case["error"])
+                print(f"[BATCH] {case_id}: FAILED ({case['error']})")
+            else:
+                analyzer = case["slices"][0]
+                for other in case["slices"][1:]:
+                    analyzer.merge(other)
+                report = analyzer.finalize()
+                entry.update(
+                    status="ok",
+                    slices=len(case["slices"]),
+                    records=analyzer.call_rows + analyzer.sms_rows,
+                    risk_level=report["summary"]["risk_level"],
+                    report=write_report(out_dir, case_id, report),
+                )
+                print(f"[BATCH] {case_id}: {entry['records']} records, {report['summary']['risk_level']} ({entry['seconds']}s)")
+            case["slices"] = None
+            results.append(entry)
+
+    elapsed = time.perf_counter() - started
+    records = sum(r.get("records", 0) for r in results)
+    summary = {
+        "cases": len(results),
+        "succeeded": sum(r["status"] == "ok" for r in results),
+        "failed": sum(r["status"] == "failed" for r in results),
+        "records": records,
+        "elapsed_seconds": round(elapsed, 3),
+        "records_per_second": round(records / elapsed, 1) if elapsed else 0.0,
+        "cases_per_minute": round(len(results) * 60 / elapsed, 2) if elapsed else 0.0,
+        "cases_detail": sorted(results, key=lambda r: r["case_id"]),
+    }
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, 'batch_summary.json'), 'w') as f:
+        json.dump(summary, f, indent=4)
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyze many seized-device cases in parallel")
+    parser.add_argument("source", help="Directory of case folders, or a .json/.csv manifest")
+    parser.add_argument("--out", default="reports", help="Output directory for per-case reports")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: CPU count)")
+    parser.add_argument("--partitions", type=int, default=1, help="Time slices per large case")
+    parser.add_argument("--partition-min-mb", type=int, default=1024, help="Only split cases larger than this")
+    parser.add_argument("--chunksize", type=int, default=500_000)
+    args = parser.parse_args()
+
+    cases = discover_cases(args.source)
+    print(f"[BATCH] {len(cases)} case(s) queued")
+    summary = run_batch(cases, args.out, args.workers, args.partitions, args.partition_min_mb * 1024 * 1024, args.chunksize)
+    print(f"[BATCH] Done: {summary['succeeded']}/{summary['cases']} cases, {summary['records']} records "
+          f"in {summary['elapsed_seconds']}s ({summary['records_per_second']} records/s, "
+          f"{summary['cases_per_minute']} cases/min)")
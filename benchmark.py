@@ -0,0 +1,424 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from synthetic_data import generate_case, to_api_records
+
+# Regressions are flagged when p50 latency grows by more than this fraction
+REGRESSION_THRESHOLD = 0.10
+
+
+# --- Measurement ---
+def measure(fn, repeat=5, records=None, setup=None, memory=True):
+    """
+    Runs fn() `repeat` times and returns latency percentiles (ms), throughput
+    (records/s, from the median run) and, in one extra traced run, peak
+    Python/NumPy memory (MB). setup() runs untimed before every call and its
+    return value is passed to fn.
+    """
+    samples = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        started = time.perf_counter()
+        fn(arg) if setup else fn()
+        samples.append((time.perf_counter() - started) * 1000)
+
+    result = summarize(samples)
+    if records:
+        result["records"] = records
+        result["throughput_per_s"] = round(records / (result["p50_ms"] / 1000), 1) if result["p50_ms"] else None
+    if memory:
+        arg = setup() if setup else None
+        tracemalloc.start()
+        fn(arg) if setup else fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["peak_mem_mb"] = round(peak / 2**20, 2)
+    return result
+
+
+def summarize(samples):
+    samples = np.asarray(samples)
+    return {
+        "runs": len(samples),
+        "mean_ms": round(float(samples.mean()), 3),
+        "p50_ms": round(float(np.percentile(samples, 50)), 3),
+        "p95_ms": round(float(np.percentile(samples, 95)), 3),
+        "p99_ms": round(float(np.percentile(samples, 99)), 3),
+    }
+
+
+# --- Suites ---
+def bench_analysis(calls, sms, repeat):
+    from forensic_analysis import ForensicAnalyzer, StreamingForensicAnalyzer
+
+    records = len(calls) + len(sms)
+    new = lambda: ForensicAnalyzer(calls, sms)
+    results = {"analysis.init": measure(new, repeat, records)}
+    for module in ("_check_integrity", "_check_malware_indicators", "_check_suspicious_behavior"):
+        results[f"analysis.{module.lstrip('_')}"] = measure(lambda a: getattr(a, module)(), repeat, records, setup=new)
+    results["analysis.analyze"] = measure(lambda: new().analyze(), repeat, records)
+
+    def streaming():
+        analyzer = StreamingForensicAnalyzer()
+        for start in range(0, len(calls), 100_000):
+            analyzer.consume_calls(calls.iloc[start:start + 100_000])
+        for start in range(0, len(sms), 100_000):
+            analyzer.consume_sms(sms.iloc[start:start + 100_000])
+        analyzer.finalize()
+    results["analysis.streaming"] = measure(streaming, repeat, records)
+    return results
+
+
+def bench_inference(api, sms_records, repeat, single_samples=2000):
+    results = {}
+    sample = sms_records[:single_samples]
+
+    # Per-message path: latency of individual calls (cache cleared so every call computes)
+    latencies = []
+    for record in sample:
+        api.RISK_CACHE.clear()
+        started = time.perf_counter()
+        api.analyze_risk(record)
+        latencies.append((time.perf_counter() - started) * 1000)
+    results["inference.analyze_risk.single"] = {**summarize(latencies), "records": len(sample),
+                                                "throughput_per_s": round(len(sample) / (sum(latencies) / 1000), 1)}
+
+    cold = lambda: api.RISK_CACHE.clear()
+    results["inference.analyze_risk_batch.cold"] = measure(
+        lambda _: api.analyze_risk_batch(sms_records), repeat, len(sms_records), setup=cold)
+    api.analyze_risk_batch(sms_records)
+    results["inference.analyze_risk_batch.warm"] = measure(
+        lambda: api.analyze_risk_batch(sms_records), repeat, len(sms_records))
+
+    model = api.get_ai_model()
+    if model is not None:
+        texts = [r['content'].lower() for r in sms_records]
+        results["inference.model.predict_proba"] = measure(lambda: model.predict_proba(texts), repeat, len(texts))
+    return results
+
+
+def bench_api(api, timeline, repeat):
+    client, timeline_client = api.app.test_client(), timeline.app.test_client()
+    records = api.STORE.count("call") + api.STORE.count("sms")
+    # name -> (client, url, whether the endpoint scans the whole case)
+    endpoints = {
+        "api.analyze": (client, '/api/analyze', True),
+        "api.timeline": (client, '/api/timeline', True),
+        "api.report": (client, '/api/report', False),
+        "api.evidence_view.json": (client, '/api/evidence/view', True),
+        "api.evidence_view.ndjson": (client, '/api/evidence/view?format=ndjson', True),
+        "api.cache_stats": (client, '/api/cache/stats', False),
+        "timeline_api.timeline.page": (timeline_client, '/api/timeline?limit=1000', False),
+        "timeline_api.timeline.ndjson": (timeline_client, '/api/timeline?format=ndjson', True),
+    }
+    results = {}
+    for name, (test_client, url, full_scan) in endpoints.items():
+        def call():
+            response = test_client.get(url)
+            response.get_data()  # drain streamed bodies
+            assert response.status_code == 200, (url, response.status_code)
+        results[name] = measure(call, repeat, records if full_scan else None, memory=False)
+    return results
+
+
+def bench_ingest(api, calls, sms):
+    """Sustained /api/ingest/bulk throughput for CSV uploads (one job per kind, polled to completion)."""
+    client = api.app.test_client()
+    results = {}
+    for kind, df in (("call", calls), ("sms", sms)):
+        body = df.to_csv(index=False).encode()
+        started = time.perf_counter()
+        job_id = client.post(f'/api/ingest/bulk?kind={kind}&format=csv', data=body).get_json()["job_id"]
+        while True:
+            job = client.get(f'/api/jobs/{job_id}').get_json()["job"]
+            if job["status"] in ("succeeded", "failed"):
+                break
+            time.sleep(0.05)
+        seconds = time.perf_counter() - started
+        assert job["status"] == "succeeded", job["error"]
+        results[f"api.ingest_bulk.{kind}.csv"] = {"records": len(df), "seconds": round(seconds, 3),
+                                                  "throughput_per_s": round(len(df) / seconds, 1),
+                                                  "mb_per_s": round(len(body) / 2**20 / seconds, 2)}
+    return results
+
+
+def bench_columnar(store, repeat):
+    """Load time and resident size of the columnar record store against the store's dict records."""
+    from columnar import load_columns
+
+    results = {}
+    for kind in ("call", "sms"):
+        records = store.count(kind)
+        results[f"columnar.load.{kind}"] = measure(lambda: load_columns(store, kind), repeat, records)
+        # Both sides are traced, so each includes its strings (the StringTable and
+        # text payloads for the columns), not just its containers
+        tracemalloc.start()
+        columns = load_columns(store, kind)
+        column_bytes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        tracemalloc.start()
+        as_dicts = store.query(kind)
+        dict_bytes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del as_dicts
+        results[f"columnar.memory.{kind}"] = {
+            "records": records,
+            "dict_bytes_per_record": round(dict_bytes / max(records, 1), 1),
+            "column_bytes_per_record": round(column_bytes / max(records, 1), 1),
+            # The arrays alone: interned strings and text payloads excluded
+            "column_array_bytes_per_record": round(columns.nbytes / max(records, 1), 1),
+        }
+        del columns
+    return results
+
+
+def bench_rules(sms, repeat, single_samples=5000):
+    """Per-message cost of each compiled rule set, batch scan and single-message match."""
+    from rules import RULE_SETS
+
+    contents = sms['message_content'].tolist()
+    lowered = [c.lower() if isinstance(c, str) else c for c in contents]
+    results = {}
+    for name, rule_set in RULE_SETS.items():
+        # The API rule sets see lowercased content, the case analysis the raw text
+        texts = contents if name == "malware_indicators" else lowered
+        batch = measure(lambda: rule_set.scan(texts), repeat, len(texts))
+        batch["us_per_message"] = round(batch["p50_ms"] * 1000 / max(len(texts), 1), 3)
+        results[f"rules.{name}.scan"] = batch
+
+        latencies = []
+        for text in texts[:single_samples]:
+            started = time.perf_counter()
+            rule_set.match(text)
+            latencies.append((time.perf_counter() - started) * 1000)
+        single = {**summarize(latencies), "records": len(latencies),
+                  "throughput_per_s": round(len(latencies) / (sum(latencies) / 1000), 1)}
+        single["us_per_message"] = round(single["mean_ms"] * 1000, 3)
+        results[f"rules.{name}.match"] = single
+        rule_set.reset()
+    return results
+
+
+def bench_model(api, sms_records, repeat, minibatch=100, single_samples=2000):
+    """
+    Retraining and inference cost of the TF-IDF + NB pipeline (refit from
+    scratch) against the online hashing model (partial_fit mini-batches,
+    published as a new version). Labels come from the rule-based scorer.
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.naive_bayes import MultinomialNB
+    from sklearn.pipeline import Pipeline
+
+    from online_model import OnlineTextModel, train_online
+
+    texts = [r['content'].lower() for r in sms_records]
+    labels = [{"CRITICAL": "HIGH"}.get(level, level) for _, level, _ in map(api._score_rules, sms_records)]
+    batch_texts, batch_labels = texts[:minibatch], labels[:minibatch]
+    results = {}
+
+    def pipeline():
+        return Pipeline([('tfidf', TfidfVectorizer(ngram_range=(1, 2))), ('clf', MultinomialNB())]).fit(texts, labels)
+
+    results["model.retrain.pipeline.full"] = measure(pipeline, repeat, len(texts))
+    results["model.retrain.online.full"] = measure(lambda: OnlineTextModel().partial_fit(texts, labels), repeat, len(texts))
+    online = OnlineTextModel().partial_fit(texts, labels)
+    results["model.retrain.online.minibatch"] = measure(
+        lambda: online.partial_fit(batch_texts, batch_labels), repeat, minibatch)
+    directory = tempfile.mkdtemp(prefix="forensic-bench-model-")
+    train_online(texts, labels, directory)
+    results["model.retrain.online.publish"] = measure(
+        lambda: train_online(batch_texts, batch_labels, directory), repeat, minibatch, memory=False)
+
+    for name, model in (("pipeline", pipeline()), ("online", online)):
+        results[f"inference.{name}.predict_proba"] = measure(lambda: model.predict_proba(texts), repeat, len(texts))
+        latencies = []
+        for text in texts[:single_samples]:
+            started = time.perf_counter()
+            model.predict_proba([text])
+            latencies.append((time.perf_counter() - started) * 1000)
+        results[f"inference.{name}.single"] = {**summarize(latencies), "records": len(latencies),
+                                               "throughput_per_s": round(len(latencies) / (sum(latencies) / 1000), 1)}
+    return results
+
+
+def bench_serving(api, sms_records, requests=2000, concurrency=32):
+    """
+    Concurrent single-message scoring: the sync path (one /api/analyze/batch
+    model call per request, `concurrency` threads) against micro-batched
+    /api/score, through Flask threads and through the ASGI entrypoint
+    (`concurrency` in-flight requests on one event loop).
+    """
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+    import forensic_asgi
+
+    bodies = [json.dumps({"id": i, "content": r['content']}).encode()
+              for i, r in enumerate(sms_records[:requests])]
+    results = {}
+
+    def threaded(path, wrap):
+        client = api.app.test_client()
+
+        def call(body):
+            started = time.perf_counter()
+            response = client.post(path, data=wrap(body), content_type="application/json")
+            assert response.status_code == 200, response.get_data()
+            return (time.perf_counter() - started) * 1000
+
+        with ThreadPoolExecutor(concurrency) as pool:
+            return list(pool.map(call, bodies))
+
+    async def asgi():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def call(body):
+            async with semaphore:
+                sent, received = [], False
+
+                async def receive():
+                    nonlocal received
+                    received = True
+                    return {"type": "http.request", "body": body, "more_body": False}
+
+                async def send(message):
+                    sent.append(message)
+
+                started = time.perf_counter()
+                await forensic_asgi.app({"type": "http", "method": "POST", "path": "/api/score", "headers": [],
+                                         "query_string": b""}, receive, send)
+                assert sent[0]["status"] == 200, sent
+                return (time.perf_counter() - started) * 1000
+
+        return await asyncio.gather(*(call(body) for body in bodies))
+
+    runs = {
+        "sync.analyze_batch_per_request": lambda: threaded(
+            '/api/analyze/batch', lambda body: b'{"messages": [' + body + b']}'),
+        "flask.score_microbatched": lambda: threaded('/api/score', lambda body: body),
+        "asgi.score_microbatched": lambda: asyncio.run(asgi()),
+    }
+    for name, run in runs.items():
+        api.RISK_CACHE.clear()
+        batches, items = api.SCORE_BATCHER.batches, api.SCORE_BATCHER.items
+        started = time.perf_counter()
+        latencies = run()
+        seconds = time.perf_counter() - started
+        result = {**summarize(latencies), "records": len(latencies), "concurrency": concurrency,
+                  "throughput_per_s": round(len(latencies) / seconds, 1)}
+        if api.SCORE_BATCHER.batches > batches:
+            result["mean_batch_size"] = round(
+                (api.SCORE_BATCHER.items - items) / (api.SCORE_BATCHER.batches - batches), 2)
+        results[f"serving.{name}"] = result
+    return results
+
+
+# --- Regression Comparison ---
+def compare(results, baseline_path, threshold=REGRESSION_THRESHOLD):
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    regressions = []
+    for name, current in sorted(results.items()):
+        previous = baseline.get(name)
+        if not previous or not previous.get("p50_ms"):
+            continue
+        change = current["p50_ms"] / previous["p50_ms"] - 1
+        marker = "REGRESSION" if change > threshold else ""
+        print(f"  {name:45s} {previous['p50_ms']:>10.2f} -> {current['p50_ms']:>10.2f} ms ({change:+.1%}) {marker}")
+        if marker:
+            regressions.append(name)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark analysis, inference and API paths on a synthetic case")
+    parser.add_argument("--calls", type=int, default=100_000)
+    parser.add_argument("--sms", type=int, default=100_000)
+    parser.add_argument("--spam-ratio", type=float, default=0.1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--suites", default="analysis,rules,inference,model,serving,api,ingest", help="Comma-separated subset to run")
+    parser.add_argument("--out", help="Results file (default: benchmark_results.json in the scratch directory)")
+    parser.add_argument("--compare", help="Earlier results file to compare p50 latencies against")
+    args = parser.parse_args()
+    suites = set(args.suites.split(","))
+
+    print(f"[BENCH] Generating case: {args.calls} calls, {args.sms} SMS")
+    calls_df, sms_df = generate_case(args.calls, args.sms, spam_ratio=args.spam_ratio)
+    call_records, sms_records = to_api_records(calls_df, sms_df)
+
+    # The APIs open their evidence store at import: point it at a scratch database
+    workdir = tempfile.mkdtemp(prefix="forensic-bench-")
+    os.environ['EVIDENCE_DB_PATH'] = os.path.join(workdir, 'evidence.db')
+    args.out = args.out or os.path.join(workdir, 'benchmark_results.json')
+    import forensic_api
+    import timeline_api
+
+    results = {}
+    if "analysis" in suites:
+        print("[BENCH] Analysis modules...")
+        results.update(bench_analysis(calls_df, sms_df, args.repeat))
+    if "rules" in suites:
+        print("[BENCH] Rule engine...")
+        results.update(bench_rules(sms_df, args.repeat))
+    if "inference" in suites:
+        print("[BENCH] Model inference...")
+        results.update(bench_inference(forensic_api, sms_records, args.repeat))
+    if "model" in suites:
+        print("[BENCH] Model retraining...")
+        results.update(bench_model(forensic_api, sms_records, args.repeat))
+    if "serving" in suites:
+        print("[BENCH] Concurrent scoring...")
+        results.update(bench_serving(forensic_api, sms_records))
+    if "api" in suites:
+        print("[BENCH] Loading evidence store...")
+        started = time.perf_counter()
+        forensic_api.STORE.insert_many("call", call_records)
+        forensic_api.STORE.insert_many("sms", sms_records)
+        seconds = time.perf_counter() - started
+        results["store.insert_many"] = {"records": len(call_records) + len(sms_records), "seconds": round(seconds, 3),
+                                        "throughput_per_s": round((len(call_records) + len(sms_records)) / seconds, 1)}
+        print("[BENCH] Flask endpoints...")
+        results.update(bench_api(forensic_api, timeline_api, args.repeat))
+        print("[BENCH] Columnar records...")
+        results.update(bench_columnar(forensic_api.STORE, args.repeat))
+    if "ingest" in suites:
+        print("[BENCH] Bulk ingestion...")
+        results.update(bench_ingest(forensic_api, calls_df, sms_df))
+
+    output = {
+        "meta": {
+            "generated": datetime.now().isoformat(),
+            "calls": args.calls,
+            "sms": args.sms,
+            "spam_ratio": args.spam_ratio,
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+    with open(args.out, 'w') as f:
+        json.dump(output, f, indent=4)
+
+    print(f"\n{'benchmark':45s} {'p50 ms':>10s} {'p99 ms':>10s} {'records/s':>12s} {'peak MB':>8s}")
+    for name, r in results.items():
+        print(f"{name:45s} {r.get('p50_ms', 0):>10.2f} {r.get('p99_ms', 0):>10.2f} "
+              f"{r.get('throughput_per_s') or 0:>12.0f} {r.get('peak_mem_mb', ''):>8}")
+    print(f"\n[BENCH] Results saved to {args.out}")
+
+    if args.compare:
+        print(f"[BENCH] Comparing against {args.compare}")
+        if compare(results, args.compare):
+            sys.exit(1)
@@ -0,0 +1,159 @@
+import importlib.util
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+# Bulk import of call/SMS extractions. The upload is spooled to disk as it is
+# received (constant memory), then parsed in chunks into DataFrames; every
+# chunk is analyzed as one batch and inserted (and hashed into the Merkle
+# tree) in a single transaction.
+
+FORMATS = ("csv", "ndjson", "parquet")
+CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/vnd.apache.parquet": "parquet",
+    "application/x-parquet": "parquet",
+}
+DEFAULT_CHUNKSIZE = 50_000
+SPOOL_BLOCK = 1 << 20
+
+# Accepted column names per evidence field (API schema first, then the analyzer/export schema)
+COLUMN_ALIASES = {
+    "call": {
+        "caller": ["caller", "caller_number", "number"],
+        "receiver": ["receiver", "receiver_number"],
+        "timestamp": ["timestamp"],
+        "duration": ["duration"],
+        "type": ["type", "call_type"],
+    },
+    "sms": {
+        "sender": ["sender"],
+        "receiver": ["receiver"],
+        "timestamp": ["timestamp"],
+        "content": ["content", "message_content"],
+    },
+}
+REQUIRED = {"call": ("caller", "timestamp"), "sms": ("sender", "timestamp", "content")}
+# Fields stored as TEXT: NDJSON and Parquet may give them as numbers (CSV is read as str)
+TEXT_FIELDS = {"call": ("caller", "receiver", "timestamp", "type"), "sms": ("sender", "receiver", "timestamp", "content")}
+DEFAULTS = {"receiver": "Self", "type": "Incoming", "duration": 0}
+
+
+def upload_format(requested=None, content_type=None):
+    """Format from ?format=, else from the Content-Type header; None if unknown."""
+    if requested:
+        return requested if requested in FORMATS else None
+    mimetype = (content_type or "").split(";")[0].strip().lower()
+    return CONTENT_TYPES.get(mimetype)
+
+
+def parquet_supported():
+    """Whether pyarrow, which reads Parquet uploads (an optional dependency), is installed."""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def spool_upload(stream, fmt, directory=None):
+    """Copies a request body to a temporary file in 1 MB blocks. Returns (path, bytes)."""
+    fd, path = tempfile.mkstemp(prefix="bulk-", suffix=f".{fmt}", dir=directory)
+    size = 0
+    with os.fdopen(fd, 'wb') as f:
+        while True:
+            block = stream.read(SPOOL_BLOCK)
+            if not block:
+                break
+            f.write(block)
+            size += len(block)
+    return path, size
+
+
+def iter_upload_chunks(path, fmt, chunksize=DEFAULT_CHUNKSIZE):
+    """Yields (DataFrame, fraction of the upload consumed) chunk by chunk."""
+    if fmt == "parquet":
+        try:
+            import pyarrow.parquet as pq  # optional dependency, only needed for Parquet uploads
+        except ImportError:
+            raise ImportError("Reading Parquet requires pyarrow (pip install pyarrow)")
+        parquet = pq.ParquetFile(path)
+        total = max(parquet.metadata.num_rows, 1)
+        done = 0
+        for batch in parquet.iter_batches(batch_size=chunksize):
+            done += batch.num_rows
+            yield batch.to_pandas(), done / total
+        return
+
+    size = max(os.path.getsize(path), 1)
+    with open(path, 'rb') as f:
+        if fmt == "csv":
+            reader = pd.read_csv(f, chunksize=chunksize, dtype=str, keep_default_na=False, na_values=[""])
+        else:
+            reader = pd.read_json(f, lines=True, chunksize=chunksize, dtype=False, convert_dates=False)
+        for chunk in reader:
+            yield chunk, min(f.tell() / size, 1.0)
+
+
+def _as_text(values):
+    """Values as str, missing values kept; whole floats (ints widened by a missing value) lose their '.0'."""
+    if pd.api.types.is_float_dtype(values) and (values.dropna() % 1 == 0).all():
+        values = values.astype('Int64')
+    return values.astype(object).where(values.isna(), values.astype(str))
+
+
+def _pick_columns(kind, chunk):
+    """Maps a chunk onto the evidence columns; raises ValueError if a required field is missing."""
+    columns = {}
+    for field, aliases in COLUMN_ALIASES[kind].items():
+        source = next((alias for alias in aliases if alias in chunk.columns), None)
+        if source is not None:
+            columns[field] = chunk[source]
+        elif field in REQUIRED[kind]:
+            raise ValueError(f"{kind} upload is missing the '{field}' column (accepted: {', '.join(aliases)})")
+        else:
+            columns[field] = pd.Series(DEFAULTS[field], index=chunk.index)
+    frame = pd.DataFrame(columns)
+
+    timestamps = frame['timestamp']
+    if pd.api.types.is_datetime64_any_dtype(timestamps):
+        frame['timestamp'] = timestamps.dt.strftime('%Y-%m-%d %H:%M:%S')
+    for field in TEXT_FIELDS[kind]:
+        frame[field] = _as_text(frame[field])
+    if kind == "call":
+        durations = pd.to_numeric(frame['duration'], errors='coerce')
+        frame['duration'] = durations.astype('Int64').astype(object).where(durations.notna(), frame['duration'])
+    return frame.astype(object).where(frame.notna(), None)
+
+
+def ingest_upload(store, kind, path, fmt, job, label_sms=None, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Job task: parses the spooled upload chunk by chunk and inserts it. SMS
+    chunks are scored as one batch by `label_sms(records)`, which returns a
+    risk label per record. The spool file is removed afterwards.
+    """
+    started = time.perf_counter()
+    rows = 0
+    try:
+        for chunk, fraction in iter_upload_chunks(path, fmt, chunksize):
+            records = _pick_columns(kind, chunk).to_dict('records')
+            if kind == "sms" and label_sms is not None:
+                for record, label in zip(records, label_sms(records)):
+                    record["risk"] = label
+            store.insert_many(kind, records)
+            rows += len(records)
+            elapsed = time.perf_counter() - started
+            job.progress(fraction, rows=rows, records_per_s=round(rows / elapsed, 1) if elapsed else None)
+    finally:
+        os.remove(path)
+
+    seconds = time.perf_counter() - started
+    root, size = store.merkle_root()
+    return {
+        "kind": kind,
+        "rows": rows,
+        "seconds": round(seconds, 3),
+        "records_per_s": round(rows / seconds, 1) if seconds else None,
+        "integrity_root": root,
+        "integrity_tree_size": size,
+    }
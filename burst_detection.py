@@ -0,0 +1,253 @@
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+
+import numpy as np
+
+# Sliding-window burst detection: a burst is a maximal run of events covered by
+# windows of `window` seconds that each hold more than `threshold` events.
+# find_bursts / find_bursts_by_key work on whole arrays (sort + two pointers);
+# BurstDetector gives the same intervals incrementally as events arrive, in
+# any order.
+
+BURST_WINDOW_SECONDS = 3600
+BURST_THRESHOLD = 10
+
+_KEY_SHIFT = 34  # packed (key, time) values leave 34 bits (~540 years) for the time offset
+
+
+def _hot_runs(values, window, threshold):
+    """
+    Two-pointer pass over sorted int64 values: counts[i] is the number of events
+    in [values[i], values[i] + window). Hot windows (count > threshold) that
+    overlap are merged. Returns [(first, last, peak)] as event indices.
+    """
+    n = len(values)
+    if n <= threshold:
+        return []
+    ends = np.searchsorted(values, values + window, side='left')
+    counts = ends - np.arange(n)
+    hot = np.flatnonzero(counts > threshold)
+    if len(hot) == 0:
+        return []
+
+    # A hot window at i covers events [i, ends[i]); a window starting inside the
+    # coverage reached so far belongs to the same burst.
+    reach = np.maximum.accumulate(ends[hot])
+    starts = np.flatnonzero(np.concatenate(([True], hot[1:] >= reach[:-1])))
+    stops = np.append(starts[1:], len(hot))
+    return [(int(hot[a]), int(reach[b - 1]) - 1, int(counts[hot[a:b]].max())) for a, b in zip(starts, stops)]
+
+
+def find_bursts(timestamps, window=BURST_WINDOW_SECONDS, threshold=BURST_THRESHOLD):
+    """
+    Bursts in a set of epoch-second timestamps (any order), as
+    [{"start", "end", "calls", "peak"}]: first/last event time, events in the
+    interval, and the busiest single window. O(n log n) for the sort, O(n) after.
+    """
+    ts = np.sort(np.asarray(timestamps, dtype=np.int64))
+    return [{"start": int(ts[first]), "end": int(ts[last]), "calls": last - first + 1, "peak": peak}
+            for first, last, peak in _hot_runs(ts, window, threshold)]
+
+
+def find_bursts_by_key(keys, timestamps, window=BURST_WINDOW_SECONDS, threshold=BURST_THRESHOLD):
+    """
+    Per-key bursts (e.g. per caller) in one vectorized pass. Events are packed as
+    (key code << 34 | time offset) and sorted, so a window never spans two keys.
+    Returns {key: [{"start", "end", "calls", "peak"}, ...]} for keys with bursts.
+    """
+    ts = np.asarray(timestamps, dtype=np.int64)
+    if len(ts) == 0:
+        return {}
+    uniques, codes = np.unique(np.asarray(keys), return_inverse=True)
+    base = int(ts.min())
+    packed = np.sort((codes.astype(np.int64) << _KEY_SHIFT) | (ts - base))
+    offsets = packed & ((1 << _KEY_SHIFT) - 1)
+
+    bursts = {}
+    for first, last, peak in _hot_runs(packed, window, threshold):
+        key = uniques[packed[first] >> _KEY_SHIFT]
+        bursts.setdefault(key, []).append({
+            "start": base + int(offsets[first]),
+            "end": base + int(offsets[last]),
+            "calls": last - first + 1,
+            "peak": peak,
+        })
+    return bursts
+
+
+class BurstDetector:
+    """
+    Incremental find_bursts for live ingestion. Per key it keeps the timestamps
+    inside the trailing window, the open burst and the key's sorted event
+    history, so an in-order event costs O(1) amortized. A late event (older
+    than the key's newest one) is insorted into the history and only the
+    windows holding it are recounted, which gives find_bursts' intervals for
+    any arrival order over the retained history (see evict).
+    """
+
+    def __init__(self, window=BURST_WINDOW_SECONDS, threshold=BURST_THRESHOLD):
+        self.window = window
+        self.threshold = threshold
+        self.recent = {}   # key -> deque of timestamps in the trailing window
+        self.history = {}  # key -> sorted array of the key's retained timestamps
+        self.active = {}   # key -> open burst {"start", "end", "calls", "peak", "reach"[, "pending"]}
+        self.closed = {}   # key -> finished bursts {"start", "end", "calls", "peak", "reach"}
+
+    def add(self, key, ts):
+        """
+        Records one event. Returns "started" when it opens a burst for `key`,
+        "extended" when it falls inside an existing one, otherwise None.
+        """
+        history = self.history.get(key)
+        if history is None:
+            history = self.history[key] = array('q')
+        if history and ts < history[-1]:
+            insort(history, ts)
+            return self._recompute(key, ts)
+        history.append(ts)
+        return self._step(key, ts)
+
+    def _step(self, key, ts):
+        """In-order update: `ts` is not older than any event seen for `key`."""
+        recent = self.recent.get(key)
+        if recent is None:
+            recent = self.recent[key] = deque()
+        recent.append(ts)
+        while recent[0] <= recent[-1] - self.window:
+            recent.popleft()
+
+        burst = self.active.get(key)
+        if burst is not None and ts >= burst["reach"] + self.window:
+            # No later window can start before the burst's reach any more
+            self._close(key)
+            burst = None
+
+        if len(recent) > self.threshold:
+            window_start = recent[0]
+            if burst is not None and window_start < burst["reach"]:
+                # Overlaps the open burst: it absorbs the events held back since its reach
+                burst["calls"] += burst.pop("pending", 0) + 1
+                burst["end"] = max(burst["end"], ts)
+                burst["peak"] = max(burst["peak"], len(recent))
+                burst["reach"] = max(burst["reach"], window_start + self.window)
+                return "extended"
+            if burst is not None:
+                self._close(key)
+            self.active[key] = {"start": window_start, "end": recent[-1], "calls": len(recent),
+                                "peak": len(recent), "reach": window_start + self.window}
+            return "started"
+
+        if burst is None:
+            return None
+        if ts < burst["reach"]:
+            burst["calls"] += 1
+            burst["end"] = max(burst["end"], ts)
+            return "extended"
+        # Past the covered span: only part of the burst if a later hot window overlaps it
+        burst["pending"] = burst.get("pending", 0) + 1
+        return None
+
+    def _recompute(self, key, ts):
+        """
+        Late event (already in the history). Adding an event only raises the
+        counts of the windows that hold it, those starting in (ts - window, ts],
+        so just those are recounted; their hot windows are merged into the
+        stored burst spans [start, reach) and the bursts they touch are
+        recounted from the history.
+        """
+        history, window = self.history[key], self.window
+        hot = []
+        for i in range(bisect_right(history, ts - window), bisect_right(history, ts)):
+            start = history[i]
+            if i and history[i - 1] == start:
+                continue  # same window as the previous event
+            count = bisect_left(history, start + window) - bisect_left(history, start)
+            if count > self.threshold:
+                hot.append((start, start + window, count))
+
+        bursts = self.closed.pop(key, [])
+        if key in self.active:
+            bursts.append(self.active.pop(key))
+        before = [(burst["start"], burst["end"]) for burst in bursts]
+        spans = [(burst["start"], burst["reach"], burst["peak"], burst) for burst in bursts]
+        spans += [(start, reach, peak, None) for start, reach, peak in hot]
+        merged = []
+        for start, reach, peak, burst in sorted(spans, key=lambda span: span[:2]):
+            if merged and start < merged[-1]["reach"]:
+                group = merged[-1]
+                group["reach"] = max(group["reach"], reach)
+                group["peak"] = max(group["peak"], peak)
+                group["touched"] = True
+            elif burst is not None:
+                merged.append(burst)
+            else:
+                merged.append({"start": start, "reach": reach, "peak": peak, "touched": True})
+        for burst in merged:
+            if burst.pop("touched", False) or burst["start"] <= ts < burst["reach"]:
+                first, stop = bisect_left(history, burst["start"]), bisect_left(history, burst["reach"])
+                burst.update(end=history[stop - 1], calls=stop - first)
+
+        # The latest burst stays open until an event lands a window past its reach
+        for burst in merged:
+            burst.pop("pending", None)
+        if merged and history[-1] < merged[-1]["reach"] + window:
+            active = self.active[key] = merged.pop()
+            active["pending"] = len(history) - bisect_left(history, active["reach"])
+        if merged:
+            self.closed[key] = merged
+        if ts > history[-1] - window:
+            self.recent[key] = deque(history[bisect_right(history, history[-1] - window):])
+
+        burst = self.burst_at(key, ts)
+        if burst is None:
+            return None
+        overlapped = any(start <= burst["end"] and end >= burst["start"] for start, end in before)
+        return "extended" if overlapped else "started"
+
+    def _close(self, key):
+        burst = self.active.pop(key)
+        burst.pop("pending", None)
+        self.closed.setdefault(key, []).append(burst)
+
+    def bursts(self, key):
+        """Finished and open bursts for `key`, oldest first."""
+        found = list(self.closed.get(key, []))
+        if key in self.active:
+            found.append(self.active[key])
+        return [{k: v for k, v in burst.items() if k not in ("reach", "pending")} for burst in found]
+
+    def burst_at(self, key, ts):
+        """The finished or open burst of `key` whose span holds `ts`, or None."""
+        candidates = [self.active[key]] if key in self.active else []
+        for burst in candidates + self.closed.get(key, [])[::-1]:
+            if burst["start"] <= ts <= burst["end"]:
+                return {k: v for k, v in burst.items() if k not in ("reach", "pending")}
+        return None
+
+    def evict(self, before_ts, keep_closed=True):
+        """
+        Drops the state of keys idle since `before_ts`, closing their bursts.
+        With keep_closed=False the other keys' finished bursts and history are
+        trimmed as well, to what an event at `before_ts` or later can still
+        change; events older than that are scored against what is retained.
+        """
+        for key in [k for k, recent in self.recent.items() if recent[-1] < before_ts]:
+            del self.recent[key]
+            del self.history[key]
+            if key in self.active:
+                self._close(key)
+        if keep_closed:
+            return
+        horizon = before_ts - self.window
+        for key in [k for k in self.closed if k not in self.history]:
+            del self.closed[key]
+        for key, history in self.history.items():
+            closed = [burst for burst in self.closed.get(key, []) if burst["reach"] > horizon]
+            if closed:
+                self.closed[key] = closed
+            else:
+                self.closed.pop(key, None)
+            bursts = closed + ([self.active[key]] if key in self.active else [])
+            keep = min([horizon] + [burst["start"] for burst in bursts if burst["reach"] > horizon])
+            del history[:bisect_left(history, keep)]
@@ -0,0 +1,243 @@
+import os
+import re
+
+import numpy as np
+
+# Near-duplicate SMS campaigns. Message content is normalized (lowercased, digit
+# runs folded to "0", whitespace collapsed) and summarized by a MinHash
+# signature over its character 5-grams. Signatures are split into LSH bands
+# and every campaign's bands are indexed in `campaign_bands`, so finding the
+# campaign of a new message is BANDS index lookups plus a signature comparison
+# with the few candidates found, however many messages are stored. Messages
+# join the most similar campaign whose representative (its first message) is
+# at least CAMPAIGN_SIMILARITY similar, or start a new one. Assignment happens
+# at ingestion, in the same transaction as the insert, like contact interning.
+
+NUM_PERM = 64
+BANDS, ROWS = 16, 4  # candidates from ~0.5 estimated Jaccard similarity upwards
+SHINGLE = 5
+MIN_TEXT = int(os.environ.get('CAMPAIGN_MIN_TEXT', 16))  # shorter messages are never clustered
+CAMPAIGN_SIMILARITY = float(os.environ.get('CAMPAIGN_SIMILARITY', 0.6))
+NO_CAMPAIGN = 0  # sms.campaign_id of messages too short to cluster (NULL = not processed yet)
+_LOOKUP_CHUNK = 500
+_SIGNATURE_CHUNK = 2000
+BUCKET_LIMIT = 64  # campaigns compared per band; the oldest are kept when low-entropy text floods a band
+
+_rng = np.random.default_rng(0x5EED)
+_PERM_A = _rng.integers(1, 2**63, NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)  # odd multipliers
+_PERM_B = _rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64)
+_BAND_MIX = _rng.integers(1, 2**63, ROWS + 1, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_SHINGLE_MIX = np.uint64(0x100000001B3)
+
+_DIGITS = re.compile(r"\d+")
+
+CAMPAIGNS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS campaigns (
+    id INTEGER PRIMARY KEY,
+    representative INTEGER,
+    signature BLOB NOT NULL,
+    size INTEGER NOT NULL DEFAULT 0,
+    first_ts INTEGER,
+    last_ts INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_campaigns_size ON campaigns (size);
+CREATE TABLE IF NOT EXISTS campaign_bands (
+    key INTEGER NOT NULL,
+    campaign_id INTEGER NOT NULL,
+    PRIMARY KEY (key, campaign_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS campaign_senders (
+    campaign_id INTEGER NOT NULL,
+    contact_id INTEGER NOT NULL,
+    messages INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (campaign_id, contact_id)
+) WITHOUT ROWID;
+"""
+
+
+def normalize_text(content):
+    """Clustering form of a message, or None when it is missing or too short to cluster."""
+    if not isinstance(content, str):
+        return None
+    text = " ".join(_DIGITS.sub("0", content.lower()).split())
+    return text if len(text) >= MIN_TEXT else None
+
+
+def _mix(x):
+    """splitmix64 finalizer (wrapping uint64 arithmetic)."""
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def signatures(texts):
+    """(len(texts), NUM_PERM) uint32 MinHash signatures of normalized texts."""
+    out = np.empty((len(texts), NUM_PERM), dtype=np.uint32)
+    for start in range(0, len(texts), _SIGNATURE_CHUNK):
+        chunk = texts[start:start + _SIGNATURE_CHUNK]
+        lengths = np.array([len(text) for text in chunk], dtype=np.int64)
+        chars = np.frombuffer("".join(chunk).encode("utf-32-le", "surrogatepass"), dtype=np.uint32).astype(np.uint64)
+        # Start offset of every 5-gram that lies inside one message
+        counts = lengths - SHINGLE + 1
+        offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        firsts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        starts = np.arange(counts.sum()) - np.repeat(firsts - offsets, counts)
+        with np.errstate(over="ignore"):
+            shingles = np.zeros(len(starts), dtype=np.uint64)
+            for j in range(SHINGLE):
+                shingles = shingles * _SHINGLE_MIX + chars[starts + j]
+            shingles = _mix(shingles)
+            for p in range(NUM_PERM):
+                hashed = ((shingles * _PERM_A[p] + _PERM_B[p]) >> np.uint64(32)).astype(np.uint32)
+                out[start:start + len(chunk), p] = np.minimum.reduceat(hashed, firsts)
+    return out
+
+
+def band_keys(signatures):
+    """(n, BANDS) int64 LSH keys; the band number is mixed in, so keys of different bands never collide."""
+    rows = signatures.reshape(len(signatures), BANDS, ROWS).astype(np.uint64)
+    with np.errstate(over="ignore"):
+        keys = np.arange(BANDS, dtype=np.uint64) * _BAND_MIX[ROWS]
+        for j in range(ROWS):
+            keys = keys * _BAND_MIX[j] + rows[:, :, j]
+        return _mix(keys).view(np.int64)
+
+
+def similarity(signature, other):
+    """Estimated Jaccard similarity of two signatures."""
+    return np.count_nonzero(signature == other) / NUM_PERM
+
+
+# --- Store Integration ---
+
+def migrate(conn, sms_table):
+    """Adds the campaign column (and its index) to SMS tables created before campaign clustering."""
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({sms_table})")}
+    if "campaign_id" not in existing:
+        conn.execute(f"ALTER TABLE {sms_table} ADD COLUMN campaign_id INTEGER")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{sms_table}_campaign_id ON {sms_table} (campaign_id, ts)")
+
+
+def cluster(conn, contents):
+    """
+    Campaign of each message against the stored index, without writing.
+    Returns (campaign ids, new): for each message the id of an existing
+    campaign, a provisional id (above every stored one) for a campaign this
+    batch starts, or NO_CAMPAIGN; `new` maps provisional ids to (signature,
+    band keys, index of the first message of the campaign).
+    """
+    texts = [normalize_text(content) for content in contents]
+    distinct = list(dict.fromkeys(text for text in texts if text is not None))
+    if not distinct:
+        return [NO_CAMPAIGN] * len(texts), {}
+    sigs = signatures(distinct)
+    keys = band_keys(sigs)
+
+    # Stored campaigns sharing a band with any message of the batch
+    buckets = {}
+    flat = np.unique(keys).tolist()
+    for start in range(0, len(flat), _LOOKUP_CHUNK):
+        chunk = flat[start:start + _LOOKUP_CHUNK]
+        for key, campaign_id in conn.execute(
+            f"SELECT key, campaign_id FROM campaign_bands WHERE key IN ({', '.join('?' for _ in chunk)}) "
+            "ORDER BY key, campaign_id", chunk
+        ):
+            bucket = buckets.setdefault(key, [])
+            if len(bucket) < BUCKET_LIMIT:
+                bucket.append(campaign_id)
+    # Signatures of the candidate campaigns, then of the campaigns this batch starts, one row each
+    candidates = sorted({c for found in buckets.values() for c in found})
+    matrix = np.empty((len(candidates) + len(distinct), NUM_PERM), dtype=np.uint32)
+    row_of = {}
+    for start in range(0, len(candidates), _LOOKUP_CHUNK):
+        chunk = candidates[start:start + _LOOKUP_CHUNK]
+        for campaign_id, blob in conn.execute(
+            f"SELECT id, signature FROM campaigns WHERE id IN ({', '.join('?' for _ in chunk)})", chunk
+        ):
+            row_of[campaign_id] = len(row_of)
+            matrix[row_of[campaign_id]] = np.frombuffer(blob, dtype=np.uint32)
+
+    # Most similar candidate (lowest id on ties), or a new campaign led by this message
+    next_id = (conn.execute("SELECT max(id) FROM campaigns").fetchone()[0] or 0) + 1
+    new, assigned = {}, {}
+    for text, signature, row_keys in zip(distinct, sigs, keys.tolist()):
+        found = set()
+        for key in row_keys:
+            bucket = buckets.get(key)
+            if bucket:
+                found.update(bucket)
+        best = None
+        if found:
+            found = sorted(found)
+            scores = (matrix[[row_of[c] for c in found]] == signature).sum(axis=1) / NUM_PERM
+            top = int(scores.argmax())  # first maximum, i.e. the lowest id
+            if scores[top] >= CAMPAIGN_SIMILARITY:
+                best = found[top]
+        if best is None:
+            best = next_id
+            next_id += 1
+            row_of[best] = len(row_of)
+            matrix[row_of[best]] = signature
+            new[best] = [signature, row_keys, None]
+            for key in row_keys:
+                bucket = buckets.setdefault(key, [])
+                if len(bucket) < BUCKET_LIMIT:
+                    bucket.append(best)
+        assigned[text] = best
+
+    ids = [NO_CAMPAIGN if text is None else assigned[text] for text in texts]
+    for i, campaign_id in enumerate(ids):
+        if campaign_id in new and new[campaign_id][2] is None:
+            new[campaign_id][2] = i
+    return ids, {campaign_id: tuple(entry) for campaign_id, entry in new.items()}
+
+
+def record_campaigns(conn, records):
+    """
+    Assigns stored-to-be SMS to campaigns, creating new ones and updating
+    campaign sizes, time spans and senders. `records` are (ts, record, sender
+    contact id) triples; returns (campaign id per record, {campaign id: index
+    of its representative record}) for the campaigns created, whose
+    representative is set with set_representatives() once the SMS ids exist.
+    """
+    ids, new = cluster(conn, [record.get("content") for _, record, _ in records])
+    if new:
+        conn.executemany(
+            "INSERT INTO campaigns (id, signature) VALUES (?, ?)",
+            [(campaign_id, signature.tobytes()) for campaign_id, (signature, _, _) in new.items()]
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO campaign_bands (key, campaign_id) VALUES (?, ?)",
+            [(key, campaign_id) for campaign_id, (_, keys, _) in new.items() for key in keys]
+        )
+
+    stats, senders = {}, {}
+    for campaign_id, (ts, _, sender) in zip(ids, records):
+        if campaign_id == NO_CAMPAIGN:
+            continue
+        size, first_ts, last_ts = stats.get(campaign_id, (0, ts, ts))
+        if ts is not None:
+            first_ts = ts if first_ts is None else min(first_ts, ts)
+            last_ts = ts if last_ts is None else max(last_ts, ts)
+        stats[campaign_id] = (size + 1, first_ts, last_ts)
+        if sender is not None:
+            senders[(campaign_id, sender)] = senders.get((campaign_id, sender), 0) + 1
+    conn.executemany(
+        "UPDATE campaigns SET size = size + ?, "
+        "first_ts = coalesce(min(first_ts, ?), first_ts, ?), last_ts = coalesce(max(last_ts, ?), last_ts, ?) "
+        "WHERE id = ?",
+        [(size, first_ts, first_ts, last_ts, last_ts, campaign_id)
+         for campaign_id, (size, first_ts, last_ts) in stats.items()]
+    )
+    conn.executemany(
+        "INSERT INTO campaign_senders (campaign_id, contact_id, messages) VALUES (?, ?, ?) "
+        "ON CONFLICT (campaign_id, contact_id) DO UPDATE SET messages = messages + excluded.messages",
+        [(campaign_id, sender, n) for (campaign_id, sender), n in senders.items()]
+    )
+    return ids, {campaign_id: first for campaign_id, (_, _, first) in new.items()}
+
+
+def set_representatives(conn, representatives):
+    """Records the representative SMS of new campaigns ({campaign id: sms id})."""
+    conn.executemany("UPDATE campaigns SET representative = ? WHERE id = ?",
+                     [(sms_id, campaign_id) for campaign_id, sms_id in representatives.items()])
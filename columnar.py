@@ -0,0 +1,259 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from evidence_store import TABLES
+
+# Columnar evidence records: one array per field instead of one dict per record.
+# Timestamps are int64 epoch seconds (MISSING_TS, which is also NaT, when
+# unparseable), numbers, call types and risk labels are int32 codes into an
+# interned StringTable, durations and scores are float64 arrays and free text
+# stays one object array. A call costs ~36 bytes of arrays instead of ~600 as a dict.
+# Values that would not come back unchanged from their encoding (timestamps not
+# in "YYYY-MM-DD HH:MM:SS" form, odd durations) are kept verbatim, by record id.
+
+MISSING_TS = np.iinfo(np.int64).min
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+STRING, TEXT, NUMBER, DURATION = "string", "text", "number", "duration"
+# Encoding of every stored column except the timestamp
+ENCODINGS = {
+    "call": {"caller": STRING, "receiver": STRING, "duration": DURATION, "type": STRING},
+    "sms": {"sender": STRING, "receiver": STRING, "content": TEXT, "risk": STRING},
+    "alert": {"type": STRING, "desc": TEXT, "score": NUMBER},
+}
+
+_CLOCK = re.compile(r"^(\d+):([0-5]\d)(?::([0-5]\d))?$")
+
+
+class StringTable:
+    """
+    Interned string dictionary: each distinct value is stored once and columns
+    refer to it by int32 code (-1 = missing). Shared by every column and block
+    built from it, so codes stay comparable across blocks.
+    """
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+        self._lookup = None
+
+    def encode(self, values):
+        """int32 codes for an iterable of values (one dict lookup per distinct value)."""
+        local, uniques = pd.factorize(np.asarray(values, dtype=object), use_na_sentinel=True)
+        for value in uniques:
+            if value not in self.codes:
+                self.codes[value] = len(self.values)
+                self.values.append(value)
+                self._lookup = None
+        remap = np.array([self.codes[value] for value in uniques] + [-1], dtype=np.int32)
+        return remap[local]
+
+    def decode(self, codes):
+        """Object array of the values behind `codes`; the strings themselves are shared, not copied."""
+        if self._lookup is None or len(self._lookup) != len(self.values) + 1:
+            # Trailing None so that code -1 decodes to a missing value
+            self._lookup = np.array(self.values + [None], dtype=object)
+        return self._lookup[codes]
+
+    def __len__(self):
+        return len(self.values)
+
+
+def _encode_number(value, clock):
+    """(float value, is clock string), or None for values that are not numbers or durations."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value), False
+    if clock and isinstance(value, str):
+        match = _CLOCK.match(value)
+        if match:
+            a, b, c = match.groups()
+            seconds = int(a) * 60 + int(b) if c is None else int(a) * 3600 + int(b) * 60 + int(c)
+            return float(seconds), True
+    return None
+
+
+def _format_number(value, clock):
+    if clock:
+        seconds = int(value)
+        if seconds >= 3600:
+            return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+        return f"{seconds // 60:02d}:{seconds % 60:02d}"
+    return int(value) if value.is_integer() else value
+
+
+class RecordColumns:
+    """
+    Column arrays for the records of one evidence kind, ordered by (ts, id) like
+    the store's range scans. Slicing by time or cursor position (between(),
+    after(), [a:b]) returns views over the same arrays, and to_pandas() wraps
+    them without copying the numeric columns.
+    """
+
+    def __init__(self, kind, ts, ids, columns, strings, verbatim, clock=None):
+        self.kind = kind
+        self.ts = ts
+        self.ids = ids
+        self.columns = columns        # name -> array (int32 codes, float64 or object)
+        self.strings = strings
+        self.verbatim = verbatim      # name -> {record id: original value}
+        self.clock = clock            # durations given as "MM:SS" / "HH:MM:SS"
+
+    @classmethod
+    def from_rows(cls, kind, rows, strings=None):
+        """Builds columns from store rows, (ts, id, *columns) tuples as yielded by iter_row_batches()."""
+        strings = strings if strings is not None else StringTable()
+        names = TABLES[kind][1]
+        n = len(rows)
+        fields = list(zip(*rows)) if n else [()] * (len(names) + 2)
+        ts = np.array([MISSING_TS if t is None else t for t in fields[0]], dtype=np.int64)
+        ids = np.array(fields[1], dtype=np.int64)
+        columns, verbatim, clock = {}, {}, None
+
+        for name, values in zip(names, fields[2:]):
+            if name == "timestamp":
+                expected = np.char.replace(np.datetime_as_string(ts.view("datetime64[s]"), unit="s"), "T", " ")
+                differs = expected.astype(object) != np.array(values, dtype=object)
+                verbatim[name] = {int(ids[i]): values[i] for i in np.flatnonzero(differs) if values[i] is not None}
+                continue
+            encoding = ENCODINGS[kind][name]
+            if encoding == STRING:
+                columns[name] = strings.encode(values)
+            elif encoding == TEXT:
+                columns[name] = np.array(values, dtype=object)
+            else:
+                numbers = np.full(n, np.nan)
+                is_clock = np.zeros(n, dtype=bool)
+                kept = {}
+                for i, value in enumerate(values):
+                    encoded = _encode_number(value, encoding == DURATION)
+                    if encoded is not None:
+                        numbers[i], is_clock[i] = encoded
+                        decoded = _format_number(*encoded)
+                    if value is not None and (encoded is None or decoded != value or type(decoded) is not type(value)):
+                        kept[int(ids[i])] = value
+                columns[name] = numbers
+                verbatim[name] = kept
+                if encoding == DURATION:
+                    clock = is_clock
+        return cls(kind, ts, ids, columns, strings, {k: v for k, v in verbatim.items() if v}, clock)
+
+    @classmethod
+    def concat(cls, blocks, kind=None, strings=None):
+        """Joins consecutive blocks built on the same StringTable (one copy into contiguous arrays)."""
+        blocks = list(blocks)
+        if not blocks:
+            return cls.from_rows(kind, [], strings)
+        first = blocks[0]
+        columns = {name: np.concatenate([b.columns[name] for b in blocks]) for name in first.columns}
+        clock = np.concatenate([b.clock for b in blocks]) if first.clock is not None else None
+        verbatim = {}
+        for block in blocks:
+            for name, kept in block.verbatim.items():
+                verbatim.setdefault(name, {}).update(kept)
+        return cls(first.kind, np.concatenate([b.ts for b in blocks]), np.concatenate([b.ids for b in blocks]),
+                   columns, first.strings, verbatim, clock)
+
+    # --- Views ---
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice) or index.step not in (None, 1):
+            raise TypeError("RecordColumns only supports contiguous slices")
+        columns = {name: values[index] for name, values in self.columns.items()}
+        clock = self.clock[index] if self.clock is not None else None
+        return RecordColumns(self.kind, self.ts[index], self.ids[index], columns, self.strings, self.verbatim, clock)
+
+    def between(self, start=None, end=None):
+        """Records with start <= ts <= end (epoch seconds), as a view; same bounds as the store's range scans."""
+        if start is None and end is not None:
+            start = MISSING_TS + 1  # a bounded range never includes undated records
+        lo = 0 if start is None else int(np.searchsorted(self.ts, start, side="left"))
+        hi = len(self) if end is None else int(np.searchsorted(self.ts, end, side="right"))
+        return self[lo:max(lo, hi)]
+
+    def after(self, position):
+        """Records strictly after a (ts, id) position, as a view."""
+        ts, record_id = position
+        lo = int(np.searchsorted(self.ts, ts, side="left"))
+        hi = int(np.searchsorted(self.ts, ts, side="right"))
+        return self[lo + int(np.searchsorted(self.ids[lo:hi], record_id, side="right")):]
+
+    # --- Records ---
+
+    def value(self, name, i):
+        """Decoded value of one field, as the store would return it."""
+        if name == "id":
+            return int(self.ids[i])
+        kept = self.verbatim.get(name)
+        if kept and int(self.ids[i]) in kept:
+            return kept[int(self.ids[i])]
+        if name == "timestamp":
+            ts = int(self.ts[i])
+            return None if ts == MISSING_TS else pd.Timestamp(ts, unit="s").strftime(TIMESTAMP_FORMAT)
+        values = self.columns[name]
+        encoding = ENCODINGS[self.kind][name]
+        if encoding == STRING:
+            code = int(values[i])
+            return None if code < 0 else self.strings.values[code]
+        if encoding == TEXT:
+            return values[i]
+        number = float(values[i])
+        if np.isnan(number):
+            return None
+        return _format_number(number, self.clock is not None and bool(self.clock[i]))
+
+    def record(self, i):
+        """Row i as a store record dict (id first, then the table's columns)."""
+        return {name: self.value(name, i) for name in ("id", *TABLES[self.kind][1])}
+
+    def iter_records(self):
+        for i in range(len(self)):
+            yield self.record(i)
+
+    # --- Interop ---
+
+    def to_pandas(self, categorical=True, rename=None):
+        """
+        DataFrame over the column arrays: `timestamp` is a datetime64[s] view of
+        the epoch array (NaT when missing) and numbers are float seconds/scores,
+        both without copying. Interned columns become Categoricals over the shared
+        codes, or object columns of the interned strings when `categorical` is off.
+        `rename` maps column names to new names, None dropping the column.
+        """
+        rename = rename or {}
+        data = {"id": self.ids, "timestamp": self.ts.view("datetime64[s]")}
+        for name, values in self.columns.items():
+            encoding = ENCODINGS[self.kind][name]
+            if encoding == STRING and categorical:
+                values = pd.Categorical.from_codes(values, categories=pd.Index(self.strings.values, dtype=object))
+            elif encoding == STRING:
+                values = pd.Series(self.strings.decode(values), dtype=object, copy=False)
+            elif encoding == TEXT:
+                values = pd.Series(values, dtype=object, copy=False)
+            data[name] = values
+        data = {rename.get(name, name): values for name, values in data.items() if rename.get(name, name) is not None}
+        return pd.DataFrame(data, copy=False)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the column arrays (object columns count their pointers only)."""
+        arrays = [self.ts, self.ids, *self.columns.values()] + ([self.clock] if self.clock is not None else [])
+        return sum(a.nbytes for a in arrays)
+
+
+def iter_blocks(store, kind, start=None, end=None, after=None, batch_size=10000, timed=False, strings=None):
+    """Streams the store's (ts, id)-ordered range scan as RecordColumns blocks sharing one StringTable."""
+    strings = strings if strings is not None else StringTable()
+    for rows in store.iter_row_batches(kind, start, end, after, batch_size, timed):
+        yield RecordColumns.from_rows(kind, rows, strings)
+
+
+def load_columns(store, kind, start=None, end=None, strings=None, batch_size=10000):
+    """All records of `kind` in [start, end] as one contiguous RecordColumns."""
+    strings = strings if strings is not None else StringTable()
+    return RecordColumns.concat(iter_blocks(store, kind, start, end, batch_size=batch_size, strings=strings),
+                                kind, strings)
@@ -0,0 +1,124 @@
+import json
+import os
+import re
+
+import numpy as np
+from scipy import sparse
+
+# Compact, memory-mappable form of the TF-IDF + MultinomialNB pipeline.
+# The vocabulary is stored as a sorted fixed-width string array whose position
+# is the feature index, next to the IDF weights and NB log-probabilities, all as
+# plain .npy files. Loading maps them read-only, so forked gunicorn workers
+# share one copy through the page cache instead of unpickling their own.
+
+ARRAYS = ("terms", "idf", "feature_log_prob", "class_log_prior", "classes")
+
+
+def export_compact_model(pipeline, directory):
+    """Writes a fitted Pipeline(tfidf, clf) as .npy arrays + meta.json (meta is written last)."""
+    tfidf, clf = pipeline.named_steps['tfidf'], pipeline.named_steps['clf']
+    if tfidf.analyzer != 'word' or tfidf.tokenizer or tfidf.preprocessor or tfidf.stop_words or tfidf.sublinear_tf:
+        raise ValueError("Only plain word n-gram TfidfVectorizer settings can be exported")
+
+    vocabulary = tfidf.vocabulary_
+    terms = sorted(vocabulary)
+    order = np.array([vocabulary[t] for t in terms])
+    arrays = {
+        "terms": np.array(terms),
+        # Without IDF weighting the vectorizer has no idf_ (and transform skips it)
+        "idf": tfidf.idf_[order] if tfidf.use_idf else np.ones(len(terms)),
+        "feature_log_prob": np.ascontiguousarray(clf.feature_log_prob_[:, order]),
+        "class_log_prior": clf.class_log_prior_,
+        "classes": np.array([str(c) for c in clf.classes_]),
+    }
+    meta = {
+        "lowercase": tfidf.lowercase,
+        "token_pattern": tfidf.token_pattern,
+        "ngram_range": list(tfidf.ngram_range),
+        "norm": tfidf.norm,
+        "use_idf": tfidf.use_idf,
+    }
+
+    os.makedirs(directory, exist_ok=True)
+    for name, array in arrays.items():
+        tmp = os.path.join(directory, f".{name}.npy.tmp")
+        with open(tmp, 'wb') as f:
+            np.save(f, array)
+        os.replace(tmp, os.path.join(directory, f"{name}.npy"))
+    tmp = os.path.join(directory, ".meta.json.tmp")
+    with open(tmp, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp, os.path.join(directory, "meta.json"))
+
+
+class CompactTextModel:
+    """Drop-in for the pipeline's predict/predict_proba, backed by memory-mapped arrays."""
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r') for name in ARRAYS}
+        self.terms = arrays["terms"]
+        self.idf = arrays["idf"]
+        self.feature_log_prob = arrays["feature_log_prob"]
+        self.class_log_prior = np.asarray(arrays["class_log_prior"])
+        self.classes_ = np.asarray(arrays["classes"]).astype(object)
+        self.lowercase = meta["lowercase"]
+        self.min_n, self.max_n = meta["ngram_range"]
+        self.norm = meta["norm"]
+        self.use_idf = meta["use_idf"]
+        self._token_re = re.compile(meta["token_pattern"])
+
+    def _ngrams(self, text):
+        if self.lowercase:
+            text = text.lower()
+        tokens = self._token_re.findall(text)
+        grams = []
+        for n in range(self.min_n, self.max_n + 1):
+            grams.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return grams
+
+    def transform(self, texts):
+        """TF-IDF matrix in the exported feature order (vocabulary lookups are a vectorized binary search)."""
+        grams, rows = [], []
+        for row, text in enumerate(texts):
+            doc = self._ngrams(text)
+            grams.extend(doc)
+            rows.extend([row] * len(doc))
+
+        n_features = len(self.terms)
+        if grams:
+            grams = np.array(grams)
+            cols = np.searchsorted(self.terms, grams)
+            known = cols < n_features
+            known[known] = self.terms[cols[known]] == grams[known]
+            rows, cols = np.asarray(rows)[known], cols[known]
+        else:
+            rows, cols = np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+
+        X = sparse.csr_matrix((np.ones(len(cols)), (rows, cols)), shape=(len(texts), n_features))
+        X.sum_duplicates()
+        if self.use_idf:
+            X.data *= self.idf[X.indices]
+        if self.norm == 'l2':
+            norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+            norms[norms == 0] = 1
+            X = sparse.diags(1 / norms) @ X
+        elif self.norm == 'l1':
+            norms = np.asarray(abs(X).sum(axis=1)).ravel()
+            norms[norms == 0] = 1
+            X = sparse.diags(1 / norms) @ X
+        return X
+
+    def predict_proba_features(self, X):
+        """Class probabilities for an already transformed TF-IDF matrix."""
+        jll = np.asarray(X @ self.feature_log_prob.T) + self.class_log_prior
+        jll -= jll.max(axis=1, keepdims=True)
+        probs = np.exp(jll)
+        return probs / probs.sum(axis=1, keepdims=True)
+
+    def predict_proba(self, texts):
+        return self.predict_proba_features(self.transform(texts))
+
+    def predict(self, texts):
+        return self.classes_[self.predict_proba(texts).argmax(axis=1)]
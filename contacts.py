@@ -0,0 +1,151 @@
+import os
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Contact interning: every caller/receiver/sender is normalized to a canonical
+# number once, at ingestion, and stored as an integer contact id next to the
+# raw value. The contacts table keeps per-contact aggregates (first/last seen,
+# call/SMS/missed counts) that are updated in the same transaction as the
+# evidence insert, so they never have to be recomputed from the raw strings.
+
+DEFAULT_COUNTRY_CODE = os.environ.get('DEFAULT_COUNTRY_CODE', '1')
+NATIONAL_NUMBER_LENGTH = int(os.environ.get('NATIONAL_NUMBER_LENGTH', 10))
+UNKNOWN = "Unknown"
+UNKNOWN_ALIASES = {"", "unknown", "private", "private number", "withheld", "anonymous", "restricted",
+                   "no caller id", "none", "null", "nan"}
+
+_SEPARATORS = re.compile(r"[\s\-().]")
+_DIALABLE = re.compile(r"\+?\d+")
+
+# Evidence kind -> (number column, contact id column, role) for every party of a record
+PARTIES = {
+    "call": [("caller", "caller_contact", "from"), ("receiver", "receiver_contact", "to")],
+    "sms": [("sender", "sender_contact", "from"), ("receiver", "receiver_contact", "to")],
+}
+
+CONTACTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS contacts (
+    id INTEGER PRIMARY KEY,
+    number TEXT NOT NULL UNIQUE,
+    first_ts INTEGER,
+    last_ts INTEGER,
+    calls_out INTEGER NOT NULL DEFAULT 0,
+    calls_in INTEGER NOT NULL DEFAULT 0,
+    missed INTEGER NOT NULL DEFAULT 0,
+    sms_out INTEGER NOT NULL DEFAULT 0,
+    sms_in INTEGER NOT NULL DEFAULT 0
+);
+-- Top-contact rankings (EvidenceStore.contacts sort keys) read these instead of sorting the table
+CREATE INDEX IF NOT EXISTS idx_contacts_first_ts ON contacts (first_ts);
+CREATE INDEX IF NOT EXISTS idx_contacts_last_ts ON contacts (last_ts);
+CREATE INDEX IF NOT EXISTS idx_contacts_calls ON contacts ((calls_out + calls_in));
+CREATE INDEX IF NOT EXISTS idx_contacts_sms ON contacts ((sms_out + sms_in));
+CREATE INDEX IF NOT EXISTS idx_contacts_missed ON contacts (missed);
+"""
+STAT_COLUMNS = ["calls_out", "calls_in", "missed", "sms_out", "sms_in"]
+
+
+@lru_cache(maxsize=200_000)
+def normalize_number(value):
+    """
+    Canonical form of a phone number or sender id: dialable numbers become
+    E.164-style "+<digits>" (national numbers get DEFAULT_COUNTRY_CODE, "00"
+    becomes "+", separators are dropped), short codes keep their digits,
+    alphanumeric ids ("Mom", "BANK-ALERT", "+1555Phish") only have their
+    whitespace collapsed and missing/withheld numbers all map to "Unknown".
+    """
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return UNKNOWN
+    text = " ".join(str(value).split())
+    if text.lower() in UNKNOWN_ALIASES:
+        return UNKNOWN
+    compact = _SEPARATORS.sub("", text)
+    if compact.startswith("00"):
+        compact = "+" + compact[2:]
+    if not _DIALABLE.fullmatch(compact):
+        return text
+    if compact.startswith("+"):
+        return compact
+    if len(compact) == NATIONAL_NUMBER_LENGTH:
+        return f"+{DEFAULT_COUNTRY_CODE}{compact}"
+    if len(compact) == NATIONAL_NUMBER_LENGTH + len(DEFAULT_COUNTRY_CODE) and compact.startswith(DEFAULT_COUNTRY_CODE):
+        return "+" + compact
+    return compact
+
+
+def intern_numbers(numbers):
+    """
+    (int32 codes, canonical numbers) for an array of raw numbers. Raw values are
+    factorized first, so each distinct spelling is hashed and normalized once.
+    """
+    raw_codes, uniques = pd.factorize(np.asarray(numbers, dtype=object), use_na_sentinel=False)
+    canonical_codes, canonical = pd.factorize(np.array([normalize_number(u) for u in uniques], dtype=object))
+    return canonical_codes.astype(np.int32)[raw_codes], np.asarray(canonical, dtype=object)
+
+
+def ranked_counts(counts, labels, threshold):
+    """(label, count) for counts above `threshold`, most frequent first, ties by label."""
+    hot = np.flatnonzero(np.asarray(counts) > threshold)
+    return sorted(((labels[i], int(counts[i])) for i in hot), key=lambda item: (-item[1], item[0]))
+
+
+# --- Store Integration ---
+
+def migrate(conn, tables):
+    """Adds the contact id columns (and their indexes) to evidence tables created before contact interning."""
+    for kind, parties in PARTIES.items():
+        table = tables[kind][0]
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        for _, column, _ in parties:
+            if column not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} INTEGER")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table} ({column}, ts)")
+
+
+def record_contacts(conn, kind, records):
+    """
+    Interns the parties of records about to be inserted, adds them to the
+    per-contact aggregates and returns one {contact column: id} dict per record.
+    `records` are (ts, record) pairs. Ids are read back inside the same
+    transaction, so a rolled back insert cannot leave a stale mapping behind.
+    """
+    deltas = {}
+    for ts, record in records:
+        for field, _, role in PARTIES[kind]:
+            number = normalize_number(record.get(field))
+            stats = deltas.get(number)
+            if stats is None:
+                stats = deltas[number] = {"first_ts": ts, "last_ts": ts, **dict.fromkeys(STAT_COLUMNS, 0)}
+            elif ts is not None:
+                stats["first_ts"] = ts if stats["first_ts"] is None else min(stats["first_ts"], ts)
+                stats["last_ts"] = ts if stats["last_ts"] is None else max(stats["last_ts"], ts)
+            if kind == "call":
+                stats["calls_out" if role == "from" else "calls_in"] += 1
+                if role == "from" and record.get("type") == "Missed":
+                    stats["missed"] += 1
+            else:
+                stats["sms_out" if role == "from" else "sms_in"] += 1
+    if not deltas:
+        return []
+
+    conn.executemany(
+        f"INSERT INTO contacts (number, first_ts, last_ts, {', '.join(STAT_COLUMNS)}) "
+        f"VALUES (?, ?, ?, {', '.join('?' for _ in STAT_COLUMNS)}) "
+        "ON CONFLICT (number) DO UPDATE SET "
+        "first_ts = coalesce(min(first_ts, excluded.first_ts), first_ts, excluded.first_ts), "
+        "last_ts = coalesce(max(last_ts, excluded.last_ts), last_ts, excluded.last_ts), "
+        + ", ".join(f"{c} = {c} + excluded.{c}" for c in STAT_COLUMNS),
+        [(number, s["first_ts"], s["last_ts"], *(s[c] for c in STAT_COLUMNS)) for number, s in deltas.items()]
+    )
+    ids = {}
+    numbers = list(deltas)
+    for start in range(0, len(numbers), 500):
+        chunk = numbers[start:start + 500]
+        ids.update(conn.execute(
+            f"SELECT number, id FROM contacts WHERE number IN ({', '.join('?' for _ in chunk)})", chunk
+        ).fetchall())
+    return [{column: ids[normalize_number(record.get(field))] for field, column, _ in PARTIES[kind]}
+            for _, record in records]
@@ -0,0 +1,545 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import campaigns
+import contacts
+import merkle
+import rollups
+
+DEFAULT_DB_PATH = os.environ.get('EVIDENCE_DB_PATH', 'forensic_evidence.db')
+EPOCH = datetime(1970, 1, 1)
+
+# Evidence kind -> (table, public columns). `ts` (epoch seconds) is kept alongside
+# the original timestamp string for indexed range queries and is never returned.
+TABLES = {
+    "call": ("calls", ["caller", "receiver", "timestamp", "duration", "type"]),
+    "sms": ("sms", ["sender", "receiver", "timestamp", "content", "risk"]),
+    "alert": ("alerts", ["type", "desc", "timestamp", "score"]),
+}
+# Evidence covered by the integrity tree (alerts are derived, not evidence)
+INTEGRITY_KINDS = ("call", "sms")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    caller TEXT,
+    receiver TEXT,
+    timestamp TEXT,
+    ts INTEGER,
+    duration,
+    type TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_calls_ts ON calls (ts, id);
+CREATE INDEX IF NOT EXISTS idx_calls_caller ON calls (caller, ts);
+CREATE INDEX IF NOT EXISTS idx_calls_receiver ON calls (receiver, ts);
+
+CREATE TABLE IF NOT EXISTS sms (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sender TEXT,
+    receiver TEXT,
+    timestamp TEXT,
+    ts INTEGER,
+    content TEXT,
+    risk TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sms_ts ON sms (ts, id);
+CREATE INDEX IF NOT EXISTS idx_sms_sender ON sms (sender, ts);
+CREATE INDEX IF NOT EXISTS idx_sms_receiver ON sms (receiver, ts);
+
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    type TEXT,
+    "desc" TEXT,
+    timestamp TEXT,
+    ts INTEGER,
+    score INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_alerts_ts ON alerts (ts, id);
+"""
+
+
+def _column_list(columns):
+    return ", ".join(f'"{c}"' for c in columns)
+
+
+def parse_timestamp(value):
+    """Converts an evidence timestamp ("2023-10-24 10:00:00" / ISO 8601) to epoch seconds, or None."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        try:
+            dt = datetime.fromisoformat(str(value).strip())
+        except ValueError:
+            return None
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return int((dt - EPOCH).total_seconds())
+
+
+def format_timestamp(ts):
+    """Epoch seconds -> "YYYY-MM-DD HH:MM:SS" (None stays None)."""
+    return None if ts is None else (EPOCH + timedelta(seconds=ts)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def parse_date_range(start_date=None, end_date=None):
+    """
+    Parses optional start_date/end_date query params into inclusive epoch bounds.
+    A bare date (YYYY-MM-DD) as end_date covers that whole day. Raises ValueError.
+    """
+    start = parse_timestamp(start_date) if start_date else None
+    end = parse_timestamp(end_date) if end_date else None
+    if (start_date and start is None) or (end_date and end is None):
+        raise ValueError("invalid start_date/end_date")
+    if end_date and len(end_date.strip()) == 10:
+        end += 86399
+    return start, end
+
+
+# Sort keys accepted by EvidenceStore.contacts()
+CONTACT_ORDER = {
+    "last_seen": "last_ts DESC",
+    "first_seen": "first_ts",
+    "calls": "calls_out + calls_in DESC",
+    "sms": "sms_out + sms_in DESC",
+    "missed": "missed DESC",
+}
+
+
+def _contact_record(row):
+    record = dict(row)
+    record["first_seen"] = format_timestamp(record.pop("first_ts"))
+    record["last_seen"] = format_timestamp(record.pop("last_ts"))
+    return record
+
+
+# Sort keys accepted by EvidenceStore.campaigns()
+CAMPAIGN_ORDER = {
+    "size": "size DESC",
+    "last_seen": "last_ts DESC",
+    "first_seen": "first_ts",
+}
+CAMPAIGN_FIELDS = "id, size, first_ts, last_ts, representative"
+
+
+def _campaign_record(row):
+    record = dict(row)
+    record["first_seen"] = format_timestamp(record.pop("first_ts"))
+    record["last_seen"] = format_timestamp(record.pop("last_ts"))
+    record["representative_id"] = record.pop("representative")
+    return record
+
+
+class EvidenceStore:
+    """
+    Embedded SQLite evidence store shared by every API worker.
+    WAL mode lets concurrent readers proceed while one worker writes; ids are
+    assigned by SQLite so they stay unique across processes.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        conn.executescript(merkle.MERKLE_SCHEMA)
+        conn.executescript(contacts.CONTACTS_SCHEMA)
+        contacts.migrate(conn, TABLES)
+        conn.executescript(campaigns.CAMPAIGNS_SCHEMA)
+        campaigns.migrate(conn, TABLES["sms"][0])
+        conn.executescript(rollups.ROLLUPS_SCHEMA)
+        self._backfill_integrity()
+        self._backfill_contacts()
+        self._backfill_campaigns()
+        self._backfill_rollups()
+
+    def _conn(self):
+        """One connection per thread and process (connections must not cross a fork)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """Write transaction; the lock is taken up front so concurrent writers queue instead of failing."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @contextmanager
+    def snapshot(self):
+        """Read transaction, so multi-query reads see one consistent state."""
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        finally:
+            conn.execute("COMMIT")
+
+    # --- Writes ---
+
+    def _insert(self, conn, kind, records):
+        table, columns = TABLES[kind]
+        contact_columns = [column for _, column, _ in contacts.PARTIES.get(kind, [])]
+        extra_columns = contact_columns + (["campaign_id"] if kind == "sms" else [])
+        fields = _column_list(columns + extra_columns)
+        placeholders = ", ".join("?" for _ in columns + extra_columns)
+        # Rows come back as stored (after column affinity, e.g. a numeric caller
+        # becomes TEXT), so hashes and callers see what later reads will return
+        returning = f"RETURNING id, {_column_list(columns)}"
+        insert_auto = f"INSERT INTO {table} ({fields}, ts) VALUES ({placeholders}, ?) {returning}"
+        insert_with_id = f"INSERT INTO {table} (id, {fields}, ts) VALUES (?, {placeholders}, ?) {returning}"
+
+        timed = [(parse_timestamp(record.get("timestamp")), record) for record in records]
+        # Case rollups (totals, time series, type/risk breakdowns) move with the insert
+        rollups.record_rollups(conn, kind, timed)
+        # Every party is interned to a contact id once, here, with its aggregates updated
+        contact_ids = contacts.record_contacts(conn, kind, timed) if contact_columns else [{}] * len(timed)
+        if kind == "sms":
+            # ... and every message joins its near-duplicate campaign
+            campaign_ids, started = campaigns.record_campaigns(
+                conn, [(ts, record, ids["sender_contact"]) for (ts, record), ids in zip(timed, contact_ids)]
+            )
+        else:
+            campaign_ids, started = [None] * len(timed), {}
+        stored = []
+        for (ts, record), ids, campaign_id in zip(timed, contact_ids, campaign_ids):
+            values = [record.get(c) for c in columns]
+            extra = [ids[c] for c in contact_columns] + ([campaign_id] if kind == "sms" else [])
+            if record.get("id") is not None:
+                cursor = conn.execute(insert_with_id, [record["id"], *values, *extra, ts])
+            else:
+                cursor = conn.execute(insert_auto, [*values, *extra, ts])
+            stored.append(dict(cursor.fetchone()))
+        if started:
+            campaigns.set_representatives(conn, {c: stored[i]["id"] for c, i in started.items()})
+        if kind in INTEGRITY_KINDS:
+            # Per-record hashes are computed once, here, and chained into the Merkle tree
+            merkle.append_leaves(conn, [(kind, r["id"], merkle.record_hash(r)) for r in stored])
+        return stored
+
+    def insert_many(self, kind, records):
+        """Bulk ingestion path: inserts all records in one transaction and returns them with their ids."""
+        with self.transaction() as conn:
+            return self._insert(conn, kind, records)
+
+    def add(self, kind, record):
+        return self.insert_many(kind, [record])[0]
+
+    def seed(self, kind, records):
+        """Inserts sample records only if the table is still empty (safe when several workers start at once)."""
+        table, _ = TABLES[kind]
+        with self.transaction() as conn:
+            if conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() is None:
+                self._insert(conn, kind, records)
+
+    def _backfill_integrity(self):
+        """Adds tree leaves for evidence stored before integrity tracking existed."""
+        with self.transaction() as conn:
+            for kind in INTEGRITY_KINDS:
+                table, columns = TABLES[kind]
+                rows = conn.execute(
+                    f"SELECT t.id, {_column_list(columns)} FROM {table} t "
+                    f"LEFT JOIN merkle_leaves m ON m.kind = ? AND m.record_id = t.id "
+                    f"WHERE m.leaf IS NULL ORDER BY t.id", (kind,)
+                ).fetchall()
+                merkle.append_leaves(conn, [(kind, row["id"], merkle.record_hash(dict(row))) for row in rows])
+
+    def _backfill_contacts(self):
+        """Interns the parties of evidence stored before contact interning existed."""
+        with self.transaction() as conn:
+            for kind, parties in contacts.PARTIES.items():
+                table, columns = TABLES[kind]
+                rows = conn.execute(
+                    f"SELECT ts, id, {_column_list(columns)} FROM {table} WHERE {parties[0][1]} IS NULL ORDER BY id"
+                ).fetchall()
+                if not rows:
+                    continue
+                timed = [(row["ts"], dict(row)) for row in rows]
+                updates = [(*ids.values(), record["id"])
+                           for (_, record), ids in zip(timed, contacts.record_contacts(conn, kind, timed))]
+                assignments = ", ".join(f"{column} = ?" for _, column, _ in parties)
+                conn.executemany(f"UPDATE {table} SET {assignments} WHERE id = ?", updates)
+
+    def _backfill_campaigns(self, batch_size=10000):
+        """Clusters SMS stored before campaign clustering existed, oldest first."""
+        table, columns = TABLES["sms"]
+        with self.transaction() as conn:
+            while True:
+                rows = conn.execute(
+                    f"SELECT ts, id, sender_contact, content FROM {table} WHERE campaign_id IS NULL ORDER BY id LIMIT ?",
+                    (batch_size,)
+                ).fetchall()
+                if not rows:
+                    break
+                ids, started = campaigns.record_campaigns(
+                    conn, [(row["ts"], dict(row), row["sender_contact"]) for row in rows]
+                )
+                conn.executemany(f"UPDATE {table} SET campaign_id = ? WHERE id = ?",
+                                 [(campaign_id, row["id"]) for campaign_id, row in zip(ids, rows)])
+                campaigns.set_representatives(conn, {c: rows[i]["id"] for c, i in started.items()})
+
+    def _backfill_rollups(self):
+        """Builds the case rollups of evidence stored before they were maintained."""
+        with self.transaction() as conn:
+            rollups.backfill(conn, TABLES)
+
+    # --- Integrity ---
+
+    def merkle_root(self):
+        """(root hex, number of evidence records covered)."""
+        with self.snapshot() as conn:
+            size = merkle.tree_size(conn)
+            return merkle.root(conn, size), size
+
+    def inclusion_proof(self, kind, record_id):
+        with self.snapshot() as conn:
+            return merkle.inclusion_proof(conn, kind, record_id)
+
+    # --- Reads ---
+
+    def iter_records(self, kind, start=None, end=None, batch_size=1000, **filters):
+        """
+        Yields records ordered by (timestamp, id). `start`/`end` are inclusive bounds
+        (epoch seconds or timestamp strings); keyword filters match columns exactly,
+        e.g. caller="+15551234", contact=<contact id> matches either party and
+        campaign=<campaign id> the members of an SMS campaign.
+        """
+        table, columns = TABLES[kind]
+        where, params = [], []
+        contact = filters.pop("contact", None)
+        campaign = filters.pop("campaign", None)
+        if campaign is not None:
+            if kind != "sms":
+                raise ValueError(f"{kind} records have no campaigns")
+            where.append("campaign_id = ?")
+            params.append(campaign)
+        if contact is not None:
+            parties = contacts.PARTIES.get(kind)
+            if parties is None:
+                raise ValueError(f"{kind} records have no contacts")
+            where.append("(" + " OR ".join(f"{column} = ?" for _, column, _ in parties) + ")")
+            params.extend([contact] * len(parties))
+        if start is not None:
+            where.append("ts >= ?")
+            params.append(start if isinstance(start, int) else parse_timestamp(start))
+        if end is not None:
+            where.append("ts <= ?")
+            params.append(end if isinstance(end, int) else parse_timestamp(end))
+        for column, value in filters.items():
+            if column != "id" and column not in columns:
+                raise ValueError(f"unknown {kind} field: {column}")
+            where.append(f'"{column}" = ?')
+            params.append(value)
+
+        sql = f"SELECT id, {_column_list(columns)} FROM {table}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY ts, id"
+
+        cursor = self._conn().execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield dict(row)
+
+    def query(self, kind, start=None, end=None, **filters):
+        return list(self.iter_records(kind, start, end, **filters))
+
+    def iter_row_batches(self, kind, start=None, end=None, after=None, batch_size=1000, timed=False):
+        """
+        Range scan without per-row dicts: yields lists of (ts, id, *columns) tuples
+        ordered by (ts, id), records without a timestamp first. `timed` skips those;
+        `after` = (ts, id) resumes strictly after that position (ts None for a
+        record without a timestamp).
+        """
+        table, columns = TABLES[kind]
+        where, params = ["ts IS NOT NULL"] if timed else [], []
+        if start is not None:
+            where.append("ts >= ?")
+            params.append(start)
+        if end is not None:
+            where.append("ts <= ?")
+            params.append(end)
+        if after is not None and after[0] is None:
+            where.append("(ts IS NOT NULL OR id > ?)")
+            params.append(after[1])
+        elif after is not None:
+            where.append("(ts, id) > (?, ?)")
+            params.extend(after)
+        sql = f"SELECT ts, id, {_column_list(columns)} FROM {table}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY ts, id"
+
+        conn = self._conn()
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+
+    def iter_with_ts(self, kind, start=None, end=None, after=None, batch_size=1000):
+        """
+        Timeline range scan: yields (ts, record) pairs for records with a parseable
+        timestamp, ordered by (ts, id). `after` = (ts, id) resumes strictly after
+        that position.
+        """
+        fields = ["id", *TABLES[kind][1]]
+        for rows in self.iter_row_batches(kind, start, end, after, batch_size, timed=True):
+            for ts, *values in rows:
+                yield ts, dict(zip(fields, values))
+
+    def iter_since(self, kind, after_id=0, batch_size=1000, until_id=None, limit=None):
+        """
+        Yields (ts, record) for records with id > after_id (and <= until_id) in
+        insertion (id) order, at most `limit` of them.
+        """
+        table, columns = TABLES[kind]
+        sql, params = f"SELECT ts, id, {_column_list(columns)} FROM {table} WHERE id > ?", [after_id]
+        if until_id is not None:
+            sql += " AND id <= ?"
+            params.append(until_id)
+        sql += " ORDER BY id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        cursor = self._conn().execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                record = dict(row)
+                yield record.pop("ts"), record
+
+    # --- Contacts ---
+
+    def contacts(self, order_by="last_seen", limit=100, offset=0):
+        """Contact index rows, busiest/most recent first. `order_by` is one of CONTACT_ORDER."""
+        rows = self._conn().execute(
+            f"SELECT * FROM contacts ORDER BY {CONTACT_ORDER[order_by]}, id LIMIT ? OFFSET ?", (limit, offset)
+        ).fetchall()
+        return [_contact_record(row) for row in rows]
+
+    def contact(self, number):
+        """Index entry of a number in any spelling (it is normalized first), or None."""
+        row = self._conn().execute(
+            "SELECT * FROM contacts WHERE number = ?", (contacts.normalize_number(number),)
+        ).fetchone()
+        return _contact_record(row) if row else None
+
+    def contact_count(self):
+        return self._conn().execute("SELECT COUNT(*) FROM contacts").fetchone()[0]
+
+    # --- Campaigns ---
+
+    def campaigns(self, min_size=2, order_by="size", limit=100, offset=0):
+        """Campaigns of at least `min_size` messages. `order_by` is one of CAMPAIGN_ORDER."""
+        rows = self._conn().execute(
+            f"SELECT {CAMPAIGN_FIELDS} FROM campaigns WHERE size >= ? "
+            f"ORDER BY {CAMPAIGN_ORDER[order_by]}, id LIMIT ? OFFSET ?", (min_size, limit, offset)
+        ).fetchall()
+        return [_campaign_record(row) for row in rows]
+
+    def campaign_count(self, min_size=2):
+        return self._conn().execute("SELECT COUNT(*) FROM campaigns WHERE size >= ?", (min_size,)).fetchone()[0]
+
+    def campaign(self, campaign_id, max_senders=100):
+        """One campaign with its representative SMS and senders (busiest first), or None."""
+        with self.snapshot() as conn:
+            row = conn.execute(f"SELECT {CAMPAIGN_FIELDS} FROM campaigns WHERE id = ?", (campaign_id,)).fetchone()
+            if row is None:
+                return None
+            campaign = _campaign_record(row)
+            campaign["representative"] = self.get("sms", row["representative"]) if row["representative"] else None
+            campaign["sender_count"] = conn.execute(
+                "SELECT COUNT(*) FROM campaign_senders WHERE campaign_id = ?", (campaign_id,)
+            ).fetchone()[0]
+            campaign["senders"] = [dict(sender) for sender in conn.execute(
+                "SELECT c.number, s.messages FROM campaign_senders s JOIN contacts c ON c.id = s.contact_id "
+                "WHERE s.campaign_id = ? ORDER BY s.messages DESC, c.number LIMIT ?", (campaign_id, max_senders)
+            )]
+            return campaign
+
+    def campaign_representatives(self, sms_ids):
+        """{sms id: (campaign id, representative SMS id, representative content)} for clustered stored SMS."""
+        table, _ = TABLES["sms"]
+        found = {}
+        with self.snapshot() as conn:
+            for start in range(0, len(sms_ids), 500):
+                chunk = sms_ids[start:start + 500]
+                found.update((row[0], tuple(row[1:])) for row in conn.execute(
+                    f"SELECT s.id, c.id, r.id, r.content FROM {table} s "
+                    f"JOIN campaigns c ON c.id = s.campaign_id JOIN {table} r ON r.id = c.representative "
+                    f"WHERE s.id IN ({', '.join('?' for _ in chunk)})", chunk
+                ))
+        return found
+
+    def match_campaigns(self, contents):
+        """
+        Campaign of not yet stored messages, without writing: per message
+        (campaign id, representative SMS id, representative content), or None
+        when it is too short to cluster. Messages that would start a campaign
+        get (None, None, content of the batch's first message of it).
+        """
+        table, _ = TABLES["sms"]
+        with self.snapshot() as conn:
+            ids, started = campaigns.cluster(conn, contents)
+            existing = sorted({c for c in ids if c != campaigns.NO_CAMPAIGN and c not in started})
+            representatives = {}
+            for start in range(0, len(existing), 500):
+                chunk = existing[start:start + 500]
+                representatives.update((row[0], tuple(row)) for row in conn.execute(
+                    f"SELECT c.id, r.id, r.content FROM campaigns c JOIN {table} r ON r.id = c.representative "
+                    f"WHERE c.id IN ({', '.join('?' for _ in chunk)})", chunk
+                ))
+        leaders = {c: (None, None, contents[first]) for c, (_, _, first) in started.items()}
+        return [None if c == campaigns.NO_CAMPAIGN else leaders.get(c) or representatives.get(c) for c in ids]
+
+    # --- Rollups ---
+
+    def rollup(self, kind, dimension, first=None, last=None):
+        """
+        {bucket: records} of a materialized rollup: dimension "total", "day",
+        "hour", "hour_of_day" or a rollups.CATEGORIES dimension of the kind.
+        """
+        return rollups.read(self._conn(), kind, dimension, first, last)
+
+    def get(self, kind, record_id):
+        table, columns = TABLES[kind]
+        row = self._conn().execute(
+            f"SELECT id, {_column_list(columns)} FROM {table} WHERE id = ?",
+            (record_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def max_id(self, kind):
+        """Id of the newest record of a kind (0 when there is none)."""
+        table, _ = TABLES[kind]
+        return self._conn().execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+
+    def count(self, kind):
+        """Number of records of a kind, from its rollup rather than a table scan."""
+        return self.rollup(kind, "total").get(rollups.TOTAL, 0)
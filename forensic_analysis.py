@@ -2,9 +2,74 @@
 import pandas as pd
 import numpy as np
 import json
-import re
+import argparse
 from datetime import datetime, timedelta
 
+from burst_detection import BURST_THRESHOLD, BURST_WINDOW_SECONDS, find_bursts, find_bursts_by_key
+from contacts import intern_numbers, ranked_counts
+from rules import MALWARE_RULES
+
+ODD_HOURS = [0, 1, 2, 3, 4, 5]
+
+
+def sms_indicator_detections(sms):
+    """
+    Scans an SMS frame once with MALWARE_RULES and returns {indicator: [detection, ...]}
+    for every rule (each keyword, 'link' and 'file'), in report order.
+    """
+    hits, _ = MALWARE_RULES.scan(sms['message_content'])
+    content = sms['message_content'].to_numpy()
+    sender = sms['sender'].to_numpy()
+    detections = {}
+    for column, rule in enumerate(MALWARE_RULES):
+        detections[rule.name] = [rule.describe(sender=sender[row], snippet=content[row][:30])
+                                 for row in np.flatnonzero(hits[:, column])]
+    return detections
+
+
+def epoch_seconds(timestamps):
+    """int64 epoch seconds of a datetime Series, NaT dropped."""
+    return timestamps.dropna().to_numpy().astype('datetime64[s]').astype(np.int64)
+
+
+def call_burst_detections(callers, epoch, window=BURST_WINDOW_SECONDS, threshold=BURST_THRESHOLD, names=None):
+    """
+    Sliding-window call bursts: one detection per burst over all calls, then per
+    caller (ordered by number). `callers` are numbers, or integer codes into
+    `names` when given.
+    """
+    def when(ts):
+        return pd.Timestamp(ts, unit='s')
+
+    detections = []
+    for burst in find_bursts(epoch, window, threshold):
+        detections.append(f"High frequency call volume detected: {burst['calls']} calls between {when(burst['start'])} "
+                          f"and {when(burst['end'])} (peak {burst['peak']} within {window // 60} min)")
+    by_caller = find_bursts_by_key(callers, epoch, window, threshold)
+    label = (lambda key: names[key]) if names is not None else (lambda key: key)
+    for key in sorted(by_caller, key=label):
+        for burst in by_caller[key]:
+            detections.append(f"Call burst detected: {burst['calls']} calls from {label(key)} between "
+                              f"{when(burst['start'])} and {when(burst['end'])}")
+    return detections
+
+
+def risk_level(score):
+    """Maps a capped 0-100 risk score to its category."""
+    if score < 30:
+        return "LOW"
+    elif score < 70:
+        return "MEDIUM"
+    return "HIGH"
+
+
+class ForensicAnalyzer:
+    def __init__(self, calls_df, sms_df, burst_window=BURST_WINDOW_SECONDS, burst_threshold=BURST_THRESHOLD):
+        self.burst_window = burst_window
+        self.burst_threshold = burst_threshold
+        self.calls = calls_df.copy()
+        self.sms = sms_df.copy()
+        self.calls['timestamp'] = pd.to_datetime(self.calls['timestamp'], errors='coerce')
         self.sms['timestamp'] = pd.to_datetime(self.sms['timestamp'], errors='coerce')
         
         self.risk_report = {
@@ -30,19 +95,18 @@ from datetime import datetime, timedelta
         """Detects high frequency calls, odd hours, and interaction patterns."""
         detections = []
         
-        # 1. High Frequency Calls (e.g., > 10 calls in 1 hour)
-        # Resample by hour to find spikes
+        # 1. High Frequency Calls (> burst_threshold calls within any burst_window), overall and per caller
         if not self.calls.empty:
-            calls_per_hour = self.calls.set_index('timestamp').resample('H').size()
-            spikes = calls_per_hour[calls_per_hour > 10]
-            if not spikes.empty:
-                for time, count in spikes.items():
-                    detections.append(f"High frequency call volume detected: {count} calls at {time}")
-                    self.risk_score += 10
+            timed = self.calls[self.calls['timestamp'].notna()]
+            callers, numbers = intern_numbers(timed['caller_number'])
+            bursts = call_burst_detections(callers, epoch_seconds(timed['timestamp']), self.burst_window,
+                                           self.burst_threshold, names=numbers)
+            detections.extend(bursts)
+            self.risk_score += 10 * len(bursts)
 
         # 2. Odd Hours Activity (12 AM - 5 AM)
-        odd_hours_calls = self.calls[self.calls['timestamp'].dt.hour.isin([0, 1, 2, 3, 4, 5])]
-        odd_hours_sms = self.sms[self.sms['timestamp'].dt.hour.isin([0, 1, 2, 3, 4, 5])]
+        odd_hours_calls = self.calls[self.calls['timestamp'].dt.hour.isin(ODD_HOURS)]
+        odd_hours_sms = self.sms[self.sms['timestamp'].dt.hour.isin(ODD_HOURS)]
         
         if len(odd_hours_calls) > 0:
             detections.append(f"Suspicious activity during odd hours: {len(odd_hours_calls)} calls detected between 12 AM - 5 AM")
@@ -52,14 +116,12 @@ from datetime import datetime, timedelta
             detections.append(f"Suspicious activity during odd hours: {len(odd_hours_sms)} SMS detected between 12 AM - 5 AM")
             self.risk_score += 5 * len(odd_hours_sms)
 
-        # 3. Repeated calls to same number (Stalking/Harassment or Bot behavior)
+        # 3. Repeated calls to same number (Stalking/Harassment or Bot behavior), counted per contact
         if not self.calls.empty:
-            top_contacts = self.calls['receiver_number'].value_counts()
-            suspicious_contacts = top_contacts[top_contacts > 15] # Threshold
-            if not suspicious_contacts.empty:
-                for number, count in suspicious_contacts.items():
-                    detections.append(f"High repetition detected: {count} calls to {number}")
-                    self.risk_score += 15
+            receivers, numbers = intern_numbers(self.calls['receiver_number'])
+            for number, count in ranked_counts(np.bincount(receivers, minlength=len(numbers)), numbers, 15):
+                detections.append(f"High repetition detected: {count} calls to {number}")
+                self.risk_score += 15
 
         self.risk_report["detections"]["suspicious_behavior"] = detections
 
@@ -67,40 +129,18 @@ from datetime import datetime, timedelta
         """Detects phishing keywords, bad links, and file extensions."""
         detections = []
         
-        # Keywords for phishing/spam
-        suspicious_keywords = [r"click here", r"urgent", r"verify", r"free", r"reward", r"lottery", r"winner", r"bank", r"alert"]
-        for keyword in suspicious_keywords:
-            matches = self.sms[self.sms['message_content'].str.contains(keyword, case=False, na=False)]
-            if not matches.empty:
-                for _, row in matches.iterrows():
-                    detections.append(f"Suspicious keyword '{keyword}' found in SMS from {row['sender']}: '{row['message_content'][:30]}...'")
-                    self.risk_score += 20
-
-        # Short URLs and non-HTTPS
-        link_pattern = r"(http://|bit\.ly|tinyurl\.com|goo\.gl)"
-        unsafe_links = self.sms[self.sms['message_content'].str.contains(link_pattern, case=False, na=False)]
-        if not unsafe_links.empty:
-             for _, row in unsafe_links.iterrows():
-                detections.append(f"Unsafe or short link detected in SMS from {row['sender']}")
-                self.risk_score += 25
-
-        # APK/EXE/ZIP references
-        file_pattern = r"(\.apk|\.exe|\.zip|\.rar)"
-        malicious_files = self.sms[self.sms['message_content'].str.contains(file_pattern, case=False, na=False)]
-        if not malicious_files.empty:
-             for _, row in malicious_files.iterrows():
-                detections.append(f"Potential malware file reference detected in SMS from {row['sender']}")
-                self.risk_score += 40
+        # Keywords, short/unsafe links and APK/EXE/ZIP references (one MALWARE_RULES scan, see rules.py)
+        for indicator, found in sms_indicator_detections(self.sms).items():
+            detections.extend(found)
+            self.risk_score += MALWARE_RULES[indicator].weight * len(found)
 
         # Repeated missed calls from unknown/same numbers (Wangiri Fraud indicators)
         missed_calls = self.calls[self.calls['call_type'] == 'Missed']
         if not missed_calls.empty:
-            count = missed_calls['caller_number'].value_counts()
-            repeated_missed = count[count > 2]
-            if not repeated_missed.empty:
-                for number, cnt in repeated_missed.items():
-                    detections.append(f"Potential fraud (Wangiri): {cnt} missed calls from {number}")
-                    self.risk_score += 20
+            callers, numbers = intern_numbers(missed_calls['caller_number'])
+            for number, cnt in ranked_counts(np.bincount(callers, minlength=len(numbers)), numbers, 2):
+                detections.append(f"Potential fraud (Wangiri): {cnt} missed calls from {number}")
+                self.risk_score += 20
 
         self.risk_report["detections"]["malware_indicators"] = detections
 
@@ -134,13 +174,252 @@ from datetime import datetime, timedelta
         # Cap score at 100
         self.risk_score = min(100, self.risk_score)
         self.risk_report["summary"]["total_risk_score"] = self.risk_score
-        
-        if self.risk_score < 30:
-            self.risk_report["summary"]["risk_level"] = "LOW"
-        elif self.risk_score < 70:
-            self.risk_report["summary"]["risk_level"] = "MEDIUM"
-        else:
-            self.risk_report["summary"]["risk_level"] = "HIGH"
+        self.risk_report["summary"]["risk_level"] = risk_level(self.risk_score)
+
+# --- Streaming Mode for Exports Larger Than RAM ---
+def read_chunks(path, chunksize=500_000, columns=None):
+    """Yields DataFrame chunks from a CSV or Parquet file, optionally restricted to some columns."""
+    if str(path).endswith(('.parquet', '.pq')):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet requires pyarrow (pip install pyarrow)")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize, usecols=columns)
+
+
+def row_fingerprints(df):
+    """64-bit hash per row; numeric columns are widened so int/float chunks of one column hash alike."""
+    numeric = df.select_dtypes(include='number').columns
+    return pd.util.hash_pandas_object(df.astype({c: 'float64' for c in numeric}), index=False).to_numpy()
+
+
+class FingerprintSet:
+    """
+    Compact set of 64-bit row fingerprints: sorted uint64 runs merged like a
+    binary counter, so memory is 8 bytes per distinct row and inserts are
+    amortized O(log n).
+    """
+
+    def __init__(self):
+        self.runs = []
+
+    def add(self, fingerprints):
+        """Adds a batch and returns how many of its rows were already seen (earlier or within the batch)."""
+        fingerprints = np.asarray(fingerprints, dtype=np.uint64)
+        unique = np.unique(fingerprints)
+        duplicates = len(fingerprints) - len(unique)
+
+        new = np.ones(len(unique), dtype=bool)
+        for run in self.runs:
+            pos = np.searchsorted(run, unique).clip(max=len(run) - 1)
+            new &= run[pos] != unique
+        duplicates += int((~new).sum())
+
+        run = unique[new]
+        while self.runs and len(self.runs[-1]) <= len(run):
+            run = np.union1d(self.runs.pop(), run)
+        if len(run):
+            self.runs.append(run)
+        return duplicates
+
+    def merge(self, other):
+        """Folds another set in; returns how many of its fingerprints were already present."""
+        duplicates = 0
+        for run in other.runs:
+            duplicates += self.add(run)
+        return duplicates
+
+    def __len__(self):
+        return sum(len(run) for run in self.runs)
+
+
+class StreamingForensicAnalyzer:
+    """
+    Bounded-memory ForensicAnalyzer for CDR/SMS exports that do not fit in RAM.
+    Calls and SMS are consumed chunk by chunk and only incremental aggregates are
+    kept (call times and interned caller codes as packed int64/int32 arrays for
+    burst detection, per-contact call and missed-call counts indexed by the same
+    codes, row fingerprints, null counts); finalize() builds the same
+    risk_report as ForensicAnalyzer.analyze().
+
+    `time_range` = (start, end) restricts the analyzer to one half-open slice
+    of the case so a huge case can be split across processes and recombined
+    with merge(); records without a parseable timestamp belong to the slice
+    with an open start.
+    """
+
+    def __init__(self, chunksize=500_000, now=None, time_range=None,
+                 burst_window=BURST_WINDOW_SECONDS, burst_threshold=BURST_THRESHOLD):
+        self.chunksize = chunksize
+        self.burst_window = burst_window
+        self.burst_threshold = burst_threshold
+        self.now = now or datetime.now()
+        self.time_range = time_range
+        self.call_rows = 0
+        self.sms_rows = 0
+        self.risk_report = {
+            "summary": {"total_risk_score": 0, "risk_level": "LOW"},
+            "detections": {
+                "suspicious_behavior": [],
+                "malware_indicators": [],
+                "integrity_anomalies": []
+            }
+        }
+        self.risk_score = 0
+
+        self.call_times = []      # int64 epoch-second arrays, one per chunk
+        self.call_callers = []    # matching int32 codes into contact_numbers
+        self.contact_numbers = []  # canonical numbers, indexed by contact code
+        self.contact_codes = {}
+        self.calls_to_contact = np.zeros(0, dtype=np.int64)
+        self.missed_from_contact = np.zeros(0, dtype=np.int64)
+        self.call_fingerprints = FingerprintSet()
+        self.duplicate_calls = 0
+        self.future_calls = 0
+        self.odd_hour_calls = 0
+        self.odd_hour_sms = 0
+        self.sms_nulls = 0
+        self.indicator_detections = {rule.name: [] for rule in MALWARE_RULES}
+
+    def analyze_files(self, calls_path, sms_path):
+        """Streams both exports through the aggregates and returns the final report."""
+        print("Starting Forensic Analysis (streaming)...")
+        for chunk in read_chunks(calls_path, self.chunksize):
+            self.consume_calls(chunk)
+        for chunk in read_chunks(sms_path, self.chunksize):
+            self.consume_sms(chunk)
+        return self.finalize()
+
+    def _in_range(self, df):
+        if self.time_range is None:
+            return df
+        start, end = self.time_range
+        ts = df['timestamp']
+        mask = ts.notna() if start is not None else pd.Series(True, index=df.index)
+        if start is not None:
+            mask &= ts >= start
+        if end is not None:
+            mask &= ~(ts >= end)
+        return df[mask]
+
+    def consume_calls(self, calls):
+        calls = calls.copy()
+        calls['timestamp'] = pd.to_datetime(calls['timestamp'], errors='coerce')
+        calls = self._in_range(calls)
+        self.call_rows += len(calls)
+
+        self.future_calls += int((calls['timestamp'] > self.now).sum())
+        self.duplicate_calls += self.call_fingerprints.add(row_fingerprints(calls))
+        timed = calls['timestamp'].notna().to_numpy()
+        callers = self._intern(calls['caller_number'])
+        self.call_times.append(epoch_seconds(calls['timestamp']))
+        self.call_callers.append(callers[timed])
+        self.odd_hour_calls += int(calls['timestamp'].dt.hour.isin(ODD_HOURS).sum())
+        missed = (calls['call_type'] == 'Missed').to_numpy()
+        self.calls_to_contact = self._count(self.calls_to_contact, self._intern(calls['receiver_number']))
+        self.missed_from_contact = self._count(self.missed_from_contact, callers[missed])
+
+    def _intern(self, numbers):
+        """Maps raw numbers to stable contact codes (normalized once per distinct spelling)."""
+        local, canonical = intern_numbers(numbers)
+        for number in canonical:
+            if number not in self.contact_codes:
+                self.contact_codes[number] = len(self.contact_numbers)
+                self.contact_numbers.append(number)
+        remap = np.array([self.contact_codes[number] for number in canonical], dtype=np.int32)
+        return remap[local] if len(local) else np.zeros(0, dtype=np.int32)
+
+    def _count(self, counts, codes, weights=None):
+        """Adds per-contact occurrences of `codes` to a counts array, growing it to the current contact table."""
+        grown = np.zeros(len(self.contact_numbers), dtype=np.int64)
+        grown[:len(counts)] = counts
+        if len(codes):
+            grown += np.bincount(codes, weights=weights, minlength=len(grown)).astype(np.int64)
+        return grown
+
+    def consume_sms(self, sms):
+        sms = sms.copy()
+        sms['timestamp'] = pd.to_datetime(sms['timestamp'], errors='coerce')
+        sms = self._in_range(sms)
+        self.sms_rows += len(sms)
+
+        self.sms_nulls += int(sms.isnull().sum().sum())
+        self.odd_hour_sms += int(sms['timestamp'].dt.hour.isin(ODD_HOURS).sum())
+        for indicator, found in sms_indicator_detections(sms).items():
+            self.indicator_detections[indicator].extend(found)
+
+    def merge(self, other):
+        """Combines the aggregates of another slice of the same case (merge slices in time order)."""
+        self.call_rows += other.call_rows
+        self.sms_rows += other.sms_rows
+        remap = self._intern(np.array(other.contact_numbers, dtype=object))
+        self.call_times.extend(other.call_times)
+        self.call_callers.extend(remap[codes] for codes in other.call_callers)
+        self.calls_to_contact = self._count(self.calls_to_contact, remap[:len(other.calls_to_contact)],
+                                            other.calls_to_contact)
+        self.missed_from_contact = self._count(self.missed_from_contact, remap[:len(other.missed_from_contact)],
+                                               other.missed_from_contact)
+        self.duplicate_calls += other.duplicate_calls + self.call_fingerprints.merge(other.call_fingerprints)
+        self.future_calls += other.future_calls
+        self.odd_hour_calls += other.odd_hour_calls
+        self.odd_hour_sms += other.odd_hour_sms
+        self.sms_nulls += other.sms_nulls
+        for indicator, found in other.indicator_detections.items():
+            self.indicator_detections[indicator].extend(found)
+        return self
+
+    def finalize(self):
+        """Turns the aggregates into detections, in the same order and wording as analyze()."""
+        self.risk_score = 0
+
+        # Integrity
+        integrity = []
+        if self.future_calls:
+            integrity.append(f"Integrity Breach: {self.future_calls} call records have future timestamps")
+            self.risk_score += 30
+        if self.duplicate_calls > 0:
+            integrity.append(f"Data Integrity: {self.duplicate_calls} duplicate call records found")
+            self.risk_score += 10
+        if self.sms_nulls > 0:
+            integrity.append(f"Data Integrity: {self.sms_nulls} missing fields detected in SMS logs")
+            self.risk_score += 5
+
+        # Malware indicators
+        malware = []
+        for indicator, found in self.indicator_detections.items():
+            malware.extend(found)
+            self.risk_score += MALWARE_RULES[indicator].weight * len(found)
+        for number, cnt in ranked_counts(self.missed_from_contact, self.contact_numbers, 2):
+            malware.append(f"Potential fraud (Wangiri): {cnt} missed calls from {number}")
+            self.risk_score += 20
+
+        # Suspicious behavior
+        behavior = []
+        if self.call_times:
+            bursts = call_burst_detections(np.concatenate(self.call_callers), np.concatenate(self.call_times),
+                                           self.burst_window, self.burst_threshold, names=self.contact_numbers)
+            behavior.extend(bursts)
+            self.risk_score += 10 * len(bursts)
+        if self.odd_hour_calls > 0:
+            behavior.append(f"Suspicious activity during odd hours: {self.odd_hour_calls} calls detected between 12 AM - 5 AM")
+            self.risk_score += 5 * self.odd_hour_calls
+        if self.odd_hour_sms > 0:
+            behavior.append(f"Suspicious activity during odd hours: {self.odd_hour_sms} SMS detected between 12 AM - 5 AM")
+            self.risk_score += 5 * self.odd_hour_sms
+        for number, count in ranked_counts(self.calls_to_contact, self.contact_numbers, 15):
+            behavior.append(f"High repetition detected: {count} calls to {number}")
+            self.risk_score += 15
+
+        self.risk_report["detections"]["integrity_anomalies"] = integrity
+        self.risk_report["detections"]["malware_indicators"] = malware
+        self.risk_report["detections"]["suspicious_behavior"] = behavior
+        self.risk_score = min(100, self.risk_score)
+        self.risk_report["summary"]["total_risk_score"] = self.risk_score
+        self.risk_report["summary"]["risk_level"] = risk_level(self.risk_score)
+        return self.risk_report
 
 # --- Sample Data Generation for Demonstration ---
 def generate_sample_data():
@@ -178,14 +457,24 @@ def generate_sample_data():
     return pd.DataFrame(call_data), pd.DataFrame(sms_data)
 
 if __name__ == "__main__":
-    # Load Data
-    calls_df, sms_df = generate_sample_data()
-    
-    # Initialize Analyzer
-    analyzer = ForensicAnalyzer(calls_df, sms_df)
-    
-    # Run Analysis
-    report = analyzer.analyze()
+    parser = argparse.ArgumentParser(description="Mobile forensic risk analysis")
+    parser.add_argument("--calls", help="Call log export (CSV or Parquet); streamed in chunks")
+    parser.add_argument("--sms", help="SMS export (CSV or Parquet); streamed in chunks")
+    parser.add_argument("--chunksize", type=int, default=500_000)
+    args = parser.parse_args()
+
+    if args.calls and args.sms:
+        # Streaming mode for large exports
+        report = StreamingForensicAnalyzer(chunksize=args.chunksize).analyze_files(args.calls, args.sms)
+    else:
+        # Load Data
+        calls_df, sms_df = generate_sample_data()
+
+        # Initialize Analyzer
+        analyzer = ForensicAnalyzer(calls_df, sms_df)
+
+        # Run Analysis
+        report = analyzer.analyze()
     
     # Output Results
     print(json.dumps(report, indent=4, default=str))
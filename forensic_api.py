@@ -1,155 +1,347 @@
 
 import pandas as pd
+import numpy as np
 import hashlib
+import heapq
 import json
 from datetime import datetime
 from flask import Flask, jsonify, request
 
 import joblib
+import logging
 import os
+import threading
+import time
+
+from audit import AuditLog
+from bulk_ingest import ingest_upload, parquet_supported, spool_upload, upload_format
+from burst_detection import BURST_THRESHOLD, BURST_WINDOW_SECONDS
+from columnar import iter_blocks
+from compact_model import CompactTextModel
+from evidence_store import CAMPAIGN_ORDER, CONTACT_ORDER, EvidenceStore, parse_date_range
+from forensic_analysis import ODD_HOURS, StreamingForensicAnalyzer
+from jobs import JobQueue, JobStore, QueueFull
+from live_detection import DEFAULT_TTL_SECONDS, LiveForensicDetector
+from merkle import verify_inclusion
+from metrics import METRICS, instrument, observe_stages, stage, stage_timings
+from microbatch import MicroBatcher
+from online_model import CLASSES, ONLINE_MODEL_DIR, current_version, load_online_model, train_online, version_path
+from risk_cache import RiskCache, content_key
+from rollups import TIME_DIMENSIONS, time_bucket
+from rules import MESSAGE_RULES, RULE_SETS, SAFETY_NET_RULES
+from streaming import ndjson_response, wants_gzip, wants_ndjson
+from train_ai_model import TRAINING_DATA
+
+app = Flask(__name__)
+# Per-route/per-stage latency histograms, /metrics and the ?profile=1 sampling profiler
+instrument(app)
+logger = logging.getLogger(__name__)
+
+# --- Verdict Cache ---
+# Identical messages (OTP templates, broadcasts, spam runs) are scored once
+RISK_CACHE = RiskCache(
+    max_entries=int(os.environ.get('RISK_CACHE_ENTRIES', 100000)),
+    max_bytes=int(os.environ.get('RISK_CACHE_MB', 64)) * 1024 * 1024
+)
+
+# --- Campaigns ---
+# Near-duplicate SMS are clustered into campaigns at ingestion (see campaigns.py);
+# batch analysis scores one representative per campaign and propagates its verdict
+CAMPAIGN_PROPAGATION = os.environ.get('CAMPAIGN_PROPAGATION', '1') != '0'
 
 # --- AI Model Integration ---
+# A published online model (see online_model.py) is served first; otherwise the
+# compact memory-mapped export (see train_ai_model.py) is preferred over the
+# pickle: workers map the same arrays instead of each unpickling a private copy.
 AI_MODEL_PATH = 'forensic_ai_model.pkl'
+AI_COMPACT_MODEL_DIR = 'forensic_ai_model'
+AI_MODEL_LOAD_BUDGET_MS = float(os.environ.get('AI_MODEL_LOAD_BUDGET_MS', 50))
 AI_MODEL = None
+AI_MODEL_SOURCE = None  # (path, mtime) of the loaded model
+AI_MODEL_LOAD_MS = None
+AI_MODEL_CHECK_INTERVAL = 5  # seconds between on-disk model change checks
+_ai_model_loaded = False
+_ai_model_lock = threading.Lock()
+_last_model_check = 0.0
+
+def _ai_model_source():
+    """Model to serve: the current online version, else the compact export, else the pickle."""
+    version = current_version(ONLINE_MODEL_DIR)
+    if version is not None:
+        return version_path(ONLINE_MODEL_DIR, version), version
+    for path in (os.path.join(AI_COMPACT_MODEL_DIR, 'meta.json'), AI_MODEL_PATH):
+        if os.path.exists(path):
+            return path, os.path.getmtime(path)
+    return None
 
 def load_ai_model():
-    global AI_MODEL
-    if os.path.exists(AI_MODEL_PATH):
+    global AI_MODEL, AI_MODEL_SOURCE, AI_MODEL_LOAD_MS, _ai_model_loaded
+    source = _ai_model_source()
+    started = time.perf_counter()
+    if source is None:
+        AI_MODEL = None
+        print("[AI] Warning: AI model not found. Using rule-based fallback.")
+    elif source[0] == AI_MODEL_PATH:
         AI_MODEL = joblib.load(AI_MODEL_PATH)
-        print("[AI] Forensic AI Model loaded successfully.")
+    elif source[0] == os.path.join(AI_COMPACT_MODEL_DIR, 'meta.json'):
+        AI_MODEL = CompactTextModel(AI_COMPACT_MODEL_DIR)
     else:
-        print("[AI] Warning: AI model not found. Using rule-based fallback.")
+        AI_MODEL = load_online_model(source[0])
+    AI_MODEL_SOURCE = source
+    AI_MODEL_LOAD_MS = round((time.perf_counter() - started) * 1000, 2)
+    _ai_model_loaded = True
+    if AI_MODEL is not None:
+        print(f"[AI] Forensic AI Model loaded successfully from {source[0]} in {AI_MODEL_LOAD_MS} ms.")
+        if AI_MODEL_LOAD_MS > AI_MODEL_LOAD_BUDGET_MS:
+            print(f"[AI] Warning: model load exceeded the {AI_MODEL_LOAD_BUDGET_MS} ms startup budget.")
+    # Cached verdicts were produced by the previous model
+    RISK_CACHE.clear()
 
-load_ai_model()
+def get_ai_model():
+    """Loads the model on first use rather than at import, so workers boot without paying for it."""
+    if not _ai_model_loaded:
+        with _ai_model_lock:
+            if not _ai_model_loaded:
+                load_ai_model()
+    return AI_MODEL
 
-def analyze_risk(sms):
+def reload_ai_model_if_changed():
     """
-    Hybrid Forensic Analysis:
-    Combines AI (ML) predictions with Regex-based safety checks.
+    Reloads the model when its files on disk were replaced or a new online
+    version was published (checked at most every few seconds). The swap is a
+    single assignment: requests already scoring keep the model they started with.
     """
-    content = sms.get('content', '').lower()
-    score = 0
-    findings = []
-    
-    # 1. AI Inference
-    ai_verdict = "LOW"
-    ai_confidence = 0
-    if AI_MODEL:
+    global _last_model_check
+    now = time.monotonic()
+    if not _ai_model_loaded or now - _last_model_check < AI_MODEL_CHECK_INTERVAL:
+        return
+    _last_model_check = now
+    if _ai_model_source() != AI_MODEL_SOURCE:
+        with _ai_model_lock:
+            load_ai_model()
+
+@app.before_request
+def check_ai_model():
+    reload_ai_model_if_changed()
+
+def analyze_risk_batch(messages, campaigns=None):
+    """
+    Batch Hybrid Forensic Analysis:
+    AI (ML) predictions combined with the SAFETY_NET_RULES regex checks. The
+    whole batch is vectorized and classified with a single predict_proba call
+    and the rules are matched in one scan over the batch. Verdicts are served
+    from RISK_CACHE where possible and each distinct uncached message is
+    scored only once. With `campaigns` (one (campaign id, representative id,
+    representative content) or None per message, see campaign_representatives)
+    the model only scores each campaign's representative: a near-duplicate
+    still has the rules run on its own content and gets the higher of that
+    verdict and its representative's, so a payload added to a benign template
+    is never hidden by the template's verdict (as in /api/add-data).
+    Returns a list of (score, level, findings) tuples in input order.
+    """
+    # Stored records may hold a NULL or (from bulk imports) non-text content
+    contents = [m.get('content') for m in messages]
+    contents = [c if isinstance(c, str) else "" if c is None else str(c) for c in contents]
+    if campaigns is None or not CAMPAIGN_PROPAGATION:
+        return _cached_verdicts(contents, "hybrid", _score_batch)
+
+    members = [i for i, (c, content) in enumerate(zip(campaigns, contents)) if c is not None and c[2] != content]
+    scored = list(contents)
+    for i in members:
+        scored[i] = campaigns[i][2]
+    results = _cached_verdicts(scored, "hybrid", _score_batch)
+    if not members:
+        return results
+    own = _cached_verdicts([contents[i] for i in members], "safety_net", lambda batch: _score_batch(batch, model=False))
+    for i, (score, level, findings) in zip(members, own):
+        campaign_id, representative_id, _ = campaigns[i]
+        source = (f"Near-duplicate of SMS {representative_id} (campaign {campaign_id})" if campaign_id is not None
+                  else "Near-duplicate of an earlier message in this batch")
+        if score > results[i][0]:
+            results[i] = (score, level, findings + [f"{source}: own content riskier than its {results[i][1]} verdict"])
+        else:
+            results[i][2].append(f"{source}: verdict propagated")
+    return results
+
+def _cached_verdicts(contents, namespace, score_batch):
+    """Verdicts of message contents from RISK_CACHE, scoring each distinct uncached one once with score_batch."""
+    keys = [content_key(content, namespace) for content in contents]
+    results = [RISK_CACHE.get(key) for key in keys]
+
+    pending = {}
+    for i, (key, cached) in enumerate(zip(keys, results)):
+        if cached is None:
+            pending.setdefault(key, []).append(i)
+    if pending:
+        distinct = [contents[rows[0]].lower() for rows in pending.values()]
+        for (key, rows), verdict in zip(pending.items(), score_batch(distinct)):
+            RISK_CACHE.put(key, verdict)
+            for i in rows:
+                results[i] = (verdict[0], verdict[1], list(verdict[2]))
+    return results
+
+def model_predict_proba(model, texts):
+    """predict_proba with the feature transform and the classifier timed as separate stages."""
+    if hasattr(model, 'named_steps'):
+        transform, classify = model[:-1].transform, model[-1].predict_proba
+    else:
+        transform, classify = model.transform, model.predict_proba_features
+    with stage("model_transform"):
+        features = transform(texts)
+    with stage("model_predict"):
+        return classify(features)
+
+def _score_batch(contents, model=True):
+    """Uncached hybrid scoring of already lowercased message contents (the rules alone without `model`)."""
+    n = len(contents)
+
+    # 1. AI Inference (one transform + predict_proba for the whole batch)
+    verdicts = np.full(n, "LOW", dtype=object)
+    confidences = None
+    model = get_ai_model() if model else None
+    if model:
         try:
-            prediction = AI_MODEL.predict([content])[0]
-            probs = AI_MODEL.predict_proba([content])[0]
-            ai_confidence = round(max(probs) * 100, 2)
-            ai_verdict = prediction
-            findings.append(f"AI Classification: {ai_verdict} ({ai_confidence}% confidence)")
-        except Exception as e:
-            print(f"AI Inference Error: {e}")
-
-    # 2. Rule-based Safety Net (Regex)
-    # Malicious Link Detection
-    url_pattern = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\(\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
-    shortener_pattern = re.compile(r'(bit\.ly|t\.co|goo\.gl|tinyurl\.com)')
-    
-    urls = url_pattern.findall(content)
-    if urls:
-        score += 25
-        findings.append(f"Link detected: {len(urls)} URL(s)")
-        if shortener_pattern.search(content):
-            score += 20
-            findings.append("Suspicious URL shortener used")
-
-    # Payload Patterns
-    if re.search(r'\.(apk|exe|bat|sh|php|js|zip|scr)', content):
-        score += 50
-        findings.append("Potential malware payload reference found")
-
-    # IP Address Detection
-    if re.search(r'\b(?:\d{1,3}\.){3}\d{1,3}\b', content):
-        score += 30
-        findings.append("IP Address detected (Possible C2 server)")
+            probs = model_predict_proba(model, contents)
+            verdicts = model.classes_[probs.argmax(axis=1)]
+            confidences = [round(float(p) * 100, 2) for p in probs.max(axis=1)]
+        except Exception:
+            METRICS.count("inference_errors_total")
+            logger.exception("AI inference failed")
+
+    # 2. Rule-based Safety Net (Regex), one pass over the batch (timed per regex family too)
+    timings = stage_timings()
+    with stage("rules"):
+        hits, counts = SAFETY_NET_RULES.scan(contents, timings)
+    observe_stages("rules", timings)
 
     # 3. Final Aggregation
-    # If AI says HIGH, boost score
-    if ai_verdict == "HIGH":
-        score += 40
-    elif ai_verdict == "MEDIUM":
-        score += 20
-
-    # Cap score at 100
-    final_score = min(score, 100)
-    
-    # Final Risk Level
-    level = "LOW"
-    if final_score >= 80: level = "CRITICAL"
-    elif final_score >= 50: level = "HIGH"
-    elif final_score >= 30: level = "MEDIUM"
-    
-    return final_score, level, findings
+    scores = SAFETY_NET_RULES.score(hits) + 40 * (verdicts == "HIGH") + 20 * (verdicts == "MEDIUM")
+    scores = np.minimum(scores, 100)
+    levels = np.select([scores >= 80, scores >= 50, scores >= 30], ["CRITICAL", "HIGH", "MEDIUM"], default="LOW")
+
+    results = []
+    rules = SAFETY_NET_RULES.rules
+    for i, (row, score, level) in enumerate(zip(hits.tolist(), scores.tolist(), levels.tolist())):
+        findings = []
+        if confidences is not None:
+            findings.append(f"AI Classification: {verdicts[i]} ({confidences[i]}% confidence)")
+        if any(row):
+            for rule, hit in zip(rules, row):
+                if hit:
+                    findings.append(rule.describe(count=counts[rule.name][i] if rule.counted else 1))
+        results.append((score, level, findings))
+    return results
+
+# --- Micro-batched Scoring ---
+# Concurrent single-message requests share one analyze_risk_batch call (one
+# predict_proba); see forensic_asgi.py for the async serving mode
+SCORE_BATCHER = MicroBatcher(analyze_risk_batch, name="hybrid_score")
+
+def parse_score_request(data):
+    """(message, None) for a valid /api/score body, else (None, error message)."""
+    if not isinstance(data, dict) or not isinstance(data.get('content'), str):
+        return None, "body must be a JSON object with a content string"
+    return {"id": data.get('id'), "content": data['content']}, None
+
+def score_payload(message, verdict):
+    score, level, findings = verdict
+    return {"status": "analyzed", "id": message.get('id'), "risk_score": score, "risk_level": level,
+            "findings": findings}
+
+# --- Evidence Store ---
+# Shared by all gunicorn workers and persistent across restarts
+STORE = EvidenceStore()
+
+# Timeline risk vocabulary for stored SMS verdicts
+RISK_LABELS = {"LOW": "low", "MEDIUM": "med", "HIGH": "high", "CRITICAL": "high"}
+
+def campaign_representatives(messages):
+    """
+    Campaign representative of each SMS for analyze_risk_batch: looked up by id
+    for stored messages and matched against the campaign index for new ones.
+    """
+    if not CAMPAIGN_PROPAGATION:
+        return None
+    with stage("campaign_lookup"):
+        ids = [m.get('id') for m in messages]
+        if all(isinstance(i, int) for i in ids):
+            found = STORE.campaign_representatives(ids)
+            return [found.get(i) for i in ids]
+        return STORE.match_campaigns([m.get('content') or '' for m in messages])
 
 # --- Mock Data ---
-CALL_LOGS = [
+MOCK_CALL_LOGS = [
     {"id": 1, "caller": "+15551234", "receiver": "Self", "timestamp": "2023-10-24 10:00:00", "duration": 120, "type": "Incoming"},
     {"id": 2, "caller": "+15559999", "receiver": "Self", "timestamp": "2023-10-24 23:05:00", "duration": 0, "type": "Missed"}
 ]
 
-SMS_LOGS = [
-    {"id": 1, "sender": "+15558888", "timestamp": "2023-10-24 10:05:00", "content": "Your code is 1234. Do not click http://bit.ly/malware"}
+MOCK_SMS_LOGS = [
+    {"id": 1, "sender": "+15558888", "receiver": "Self", "timestamp": "2023-10-24 10:05:00", "content": "Your code is 1234. Do not click http://bit.ly/malware"}
 ]
 
+STORE.seed("call", MOCK_CALL_LOGS)
+STORE.seed("sms", MOCK_SMS_LOGS)
+
+# --- Background Jobs ---
+# Heavy work (bulk imports, full-case analysis, reports) runs on a bounded pool
+# per worker; job state lives in the evidence database so any worker can serve it.
+JOBS = JobStore(STORE.path)
+JOBS.recover_interrupted()
+JOB_QUEUE = JobQueue(
+    JOBS,
+    max_workers=int(os.environ.get('JOB_WORKERS', 2)),
+    max_pending=int(os.environ.get('JOB_QUEUE_LIMIT', 100))
+)
+JOB_BATCH_SIZE = 10000
+
+# --- Audit Log ---
+# Append-only, hash-chained evidence access log written by a background thread
+AUDIT_LOG = AuditLog()
+
+# --- Bulk Ingestion ---
+BULK_CHUNKSIZE = int(os.environ.get('BULK_CHUNKSIZE', 50000))
+BULK_SPOOL_DIR = os.environ.get('BULK_SPOOL_DIR') or None
+
+# --- Live Detection ---
+# ForensicAnalyzer rules evaluated incrementally as records arrive through /api/add-data
+LIVE_DETECTOR = LiveForensicDetector(
+    ttl=int(os.environ.get('LIVE_STATE_TTL_SECONDS', DEFAULT_TTL_SECONDS)),
+    burst_window=int(os.environ.get('BURST_WINDOW_SECONDS', BURST_WINDOW_SECONDS)),
+    burst_threshold=int(os.environ.get('BURST_THRESHOLD', BURST_THRESHOLD))
+)
+
 # --- Core Forensic Logic ---
 
 def compute_hash(data):
     """Compute SHA-256 hash of a data structure for integrity."""
-    encoded = json.dumps(data, sort_keys=True).encode()
-    return hashlib.sha256(encoded).hexdigest()
-
-import re
+    with stage("hash_record"):
+        encoded = json.dumps(data, sort_keys=True).encode()
+        return hashlib.sha256(encoded).hexdigest()
 
 def analyze_risk(sms):
     """
     Advanced Forensic Analysis Model
     Detects patterns of: Phishing, Malware, Social Engineering, and Data Exfiltration
     """
-    score = 0
+    key = content_key(sms.get('content', ''), "rules")
+    cached = RISK_CACHE.get(key)
+    if cached is not None:
+        return cached
+    timings = stage_timings()
+    with stage("rules"):
+        score, level, findings = _score_rules(sms, timings)
+    observe_stages("rules", timings)
+    RISK_CACHE.put(key, (score, level, findings))
+    return score, level, findings
+
+def _score_rules(sms, timings=None):
+    """Uncached rule-based scoring of one message against MESSAGE_RULES (`timings`: see RuleSet.match)."""
     content = sms.get('content', '').lower()
+    score = 0
     findings = []
-
-    # 1. Phishing & Urgency Patterns
-    urgency_keywords = ["urgent", "action required", "verify", "suspended", "security alert", "help desk"]
-    for kw in urgency_keywords:
-        if kw in content:
-            score += 15
-            findings.append(f"Urgency keyword: {kw}")
-
-    # 2. Financial / Sensitve Target Patterns
-    financial_keywords = ["bank", "login", "password", "crypto", "wallet", "invoice", "payment", "amazon", "paypal"]
-    for kw in financial_keywords:
-        if kw in content:
-            score += 10
-            findings.append(f"Sensitive target: {kw}")
-
-    # 3. Malicious Link Detection (Regex)
-    url_pattern = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\(\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
-    shortener_pattern = re.compile(r'(bit\.ly|t\.co|goo\.gl|tinyurl\.com)')
-    
-    urls = url_pattern.findall(content)
-    if urls:
-        score += 25
-        findings.append(f"Link detected: {len(urls)} URLs")
-        if shortener_pattern.search(content):
-            score += 20
-            findings.append("URL shortener detected (High risk)")
-
-    # 4. File Extension / Payload Patterns
-    payload_pattern = re.compile(r'\.(apk|exe|bat|sh|php|js|zip|scr)')
-    if payload_pattern.search(content):
-        score += 50
-        findings.append("Potential malware payload file reference")
-
-    # 5. Data Exfiltration / IP Patterns
-    ip_pattern = re.compile(r'\b(?:\d{1,3}\.){3}\d{1,3}\b')
-    if ip_pattern.search(content):
-        score += 30
-        findings.append("IP Address detected (Potential C2 communications)")
+    for rule, count in MESSAGE_RULES.match(content, timings):
+        score += rule.weight
+        findings.append(rule.describe(count=count))
 
     # Final Risk Level
     level = "LOW"
@@ -161,10 +353,15 @@ def analyze_risk(sms):
 
 @app.route('/api/analyze', methods=['GET'])
 def get_analysis():
-    """Runs automated analysis and returns risk scores."""
+    """
+    Runs automated analysis and returns risk scores.
+    Query Params: async=1 (run as a background job; returns 202 with the job id)
+    """
+    if request.args.get('async') == '1':
+        return submit_job("analyze", analyze_case_job)
     results = []
-    for s in SMS_LOGS:
-        score, level, _ = analyze_risk(s) # Updated to unpack findings
+    sms_logs = STORE.query("sms")
+    for s, (score, level, _) in zip(sms_logs, analyze_risk_batch(sms_logs, campaign_representatives(sms_logs))):
         results.append({
             "id": s['id'],
             "content": s['content'],
@@ -174,69 +371,558 @@ def get_analysis():
         })
     return jsonify({"status": "analyzed", "data": results})
 
+@app.route('/api/analyze/batch', methods=['POST'])
+def analyze_batch():
+    """
+    Scores a batch of SMS in one model call.
+    Body: {"messages": [{"id": ..., "content": ...}, ...]} (plain strings are accepted too)
+    """
+    data = request.json or {}
+    messages = data.get('messages') if isinstance(data, dict) else data
+    if not isinstance(messages, list):
+        return jsonify({"error": "messages must be a list"}), 400
+
+    messages = [{"content": m} if isinstance(m, str) else m for m in messages]
+    for i, m in enumerate(messages):
+        if not isinstance(m, dict) or not isinstance(m.get('content'), str):
+            return jsonify({"error": f"messages[{i}] must be a string or an object with a content string"}), 400
+    results = []
+    for msg, (score, level, findings) in zip(messages, analyze_risk_batch(messages)):
+        results.append({
+            "id": msg.get('id'),
+            "risk_score": score,
+            "risk_level": level,
+            "findings": findings
+        })
+    return jsonify({"status": "analyzed", "count": len(results), "data": results})
+
+@app.route('/api/score', methods=['POST'])
+def score_message():
+    """
+    Hybrid verdict for one message, micro-batched with concurrent requests
+    (MICROBATCH_MAX_SIZE, MICROBATCH_MAX_WAIT_MS).
+    Body: {"id": ..., "content": ...}
+    """
+    message, error = parse_score_request(request.get_json(silent=True))
+    if error:
+        return jsonify({"error": error}), 400
+    return jsonify(score_payload(message, SCORE_BATCHER(message)))
+
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """Hit/miss counters and occupancy of the verdict cache."""
+    return jsonify({"status": "success", "cache": RISK_CACHE.stats()})
+
+@app.route('/api/rules', methods=['GET'])
+def rule_stats():
+    """Detection rules per rule set with their weights and hit counters (messages each rule fired on)."""
+    return jsonify({"status": "success", "rule_sets": {name: rule_set.stats() for name, rule_set in RULE_SETS.items()}})
+
+@app.route('/api/live/summary', methods=['GET'])
+def live_summary():
+    """Case-level score and rule counters of the live detector (after catching up with the store; records
+    stored before its first use are replayed in the background, see backlog_pending)."""
+    LIVE_DETECTOR.sync(STORE)
+    return jsonify({"status": "success", "live": LIVE_DETECTOR.summary()})
+
+@app.route('/api/model', methods=['GET'])
+def model_info():
+    """Which model file is serving and how long it took to load."""
+    model = get_ai_model()
+    return jsonify({
+        "status": "success",
+        "model": {
+            "loaded": model is not None,
+            "source": AI_MODEL_SOURCE[0] if AI_MODEL_SOURCE else None,
+            "format": type(model).__name__ if model is not None else None,
+            "classes": [str(c) for c in model.classes_] if model is not None else [],
+            "load_ms": AI_MODEL_LOAD_MS,
+            "load_budget_ms": AI_MODEL_LOAD_BUDGET_MS,
+            "online_version": getattr(model, "version", None),
+            "trained_messages": getattr(model, "trained", None)
+        },
+        "micro_batching": SCORE_BATCHER.stats()
+    })
+
+@app.route('/api/model/train', methods=['POST'])
+def train_model():
+    """
+    Online update: absorbs newly labelled messages into the online model,
+    publishes it as the next version and swaps it in. This worker serves it
+    immediately, the others within AI_MODEL_CHECK_INTERVAL seconds.
+    Body: {"messages": [{"content": ..., "label": "HIGH" | "MEDIUM" | "LOW"}, ...]}
+    """
+    data = request.json or {}
+    messages = data.get('messages') if isinstance(data, dict) else data
+    if not isinstance(messages, list) or not messages:
+        return jsonify({"error": "messages must be a non-empty list"}), 400
+    if not all(isinstance(m, dict) and isinstance(m.get('content'), str) and m.get('label') in CLASSES
+               for m in messages):
+        return jsonify({"error": f"every message needs a content string and a label in: {', '.join(CLASSES)}"}), 400
+
+    started = time.perf_counter()
+    with stage("model_partial_fit"):
+        model, path = train_online([m['content'] for m in messages], [m['label'] for m in messages],
+                                   ONLINE_MODEL_DIR, bootstrap=TRAINING_DATA)
+    train_ms = round((time.perf_counter() - started) * 1000, 2)
+    with _ai_model_lock:
+        load_ai_model()
+    AUDIT_LOG.log("Forensic_Investigator_01", "MODEL_UPDATE", os.path.basename(path),
+                  version=model.version, messages=len(messages))
+    return jsonify({
+        "status": "success",
+        "model": {"version": model.version, "source": path, "absorbed": len(messages),
+                  "trained_messages": model.trained, "train_ms": train_ms, "load_ms": AI_MODEL_LOAD_MS}
+    })
+
 @app.route('/api/timeline', methods=['GET'])
 def get_timeline():
-    """Unified chronological timeline."""
-    events = []
-    for c in CALL_LOGS:
-        events.append({"time": c['timestamp'], "type": "Incoming Call", "desc": f"From {c['caller']}", "risk": "low"})
-    for s in SMS_LOGS:
-        _, level = analyze_risk(s)
-        events.append({"time": s['timestamp'], "type": "Suspicious SMS", "desc": f"Content: {s['content'][:20]}...", "risk": level.lower()})
-    
-    events.sort(key=lambda x: x['time'])
-    return jsonify({"status": "success", "data": events})
+    """
+    Unified chronological timeline.
+    Query Params: start_date, end_date (optional), format=ndjson (streamed export), gzip=1
+    """
+    try:
+        start, end = parse_date_range(request.args.get('start_date'), request.args.get('end_date'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def events():
+        # Both sources come ordered by parsed timestamp; merge them lazily
+        calls = ((ts, 0, c) for ts, c in STORE.iter_with_ts("call", start, end))
+        sms = ((ts, 1, s) for ts, s in STORE.iter_with_ts("sms", start, end))
+        for _, source, record in heapq.merge(calls, sms, key=lambda item: item[:2]):
+            if source == 0:
+                yield {"time": record['timestamp'], "type": "Incoming Call", "desc": f"From {record['caller']}", "risk": "low"}
+            else:
+                _, level, _ = analyze_risk(record)
+                yield {"time": record['timestamp'], "type": "Suspicious SMS", "desc": f"Content: {record['content'][:20]}...", "risk": level.lower()}
+
+    if wants_ndjson(request):
+        return ndjson_response(events(), compress=wants_gzip(request))
+    return jsonify({"status": "success", "data": list(events())})
 
 @app.route('/api/report', methods=['GET'])
 def generate_report():
-    """Generates a structured forensic case file with hashes."""
+    """
+    Generates a structured forensic case file with hashes.
+    Query Params: async=1 (background job that also runs the full forensic analysis)
+    """
+    if request.args.get('async') == '1':
+        return submit_job("report", report_job)
+    return jsonify(build_report())
+
+def build_report():
     case_id = f"CASE-{datetime.now().strftime('%Y%m%d-%H%M')}"
     
-    raw_data = {"calls": CALL_LOGS, "sms": SMS_LOGS}
-    data_hash = compute_hash(raw_data)
+    # Merkle root over the per-record hashes taken at ingestion: O(log n), no rehashing
+    with stage("merkle_root"):
+        data_hash, evidence_count = STORE.merkle_root()
+    # Counts and flags from the rollups maintained at ingestion: no recounting
+    with stage("rollups"):
+        summary = case_summary()
     
     report = {
         "case_metadata": {
             "case_id": case_id,
             "investigator": "System.AI",
             "generation_time": datetime.now().isoformat(),
-            "data_integrity_hash": data_hash
+            "data_integrity_hash": data_hash,
+            "integrity_tree_size": evidence_count
         },
         "summary": {
-            "total_calls": len(CALL_LOGS),
-            "total_sms": len(SMS_LOGS),
-            "flags": "Malware Keywords Detected"
+            "total_calls": summary["total_calls"],
+            "total_sms": summary["total_sms"],
+            "flags": case_flags(summary),
+            "calls_by_type": summary["calls_by_type"],
+            "sms_by_risk": summary["sms_by_risk"],
+            "odd_hour_activity": summary["odd_hour_activity"]
         },
         "verification_steps": [
-            "SHA-256 Hash comparison for tampering detection",
+            "SHA-256 Merkle root comparison for tampering detection (per-record inclusion proofs available)",
             "Timestamp chronological consistency check",
             "Short-URL entropy analysis"
         ]
     }
-    return jsonify(report)
+    return report
+
+def case_summary(top=10):
+    """Case-wide aggregates read from the materialized rollups and the contact index, never from the evidence."""
+    with STORE.snapshot():
+        by_hour = {kind: STORE.rollup(kind, "hour_of_day") for kind in ("call", "sms")}
+        return {
+            "total_calls": STORE.count("call"),
+            "total_sms": STORE.count("sms"),
+            "calls_by_type": STORE.rollup("call", "type"),
+            "sms_by_risk": STORE.rollup("sms", "risk"),
+            "activity_by_hour_of_day": {
+                f"{h:02d}": {"calls": by_hour["call"].get(f"{h:02d}", 0), "sms": by_hour["sms"].get(f"{h:02d}", 0)}
+                for h in range(24)
+            },
+            "odd_hour_activity": {
+                "hours": ODD_HOURS,
+                "calls": sum(by_hour["call"].get(f"{h:02d}", 0) for h in ODD_HOURS),
+                "sms": sum(by_hour["sms"].get(f"{h:02d}", 0) for h in ODD_HOURS)
+            },
+            "top_contacts": {"calls": STORE.contacts("calls", top), "sms": STORE.contacts("sms", top)},
+            "campaigns": STORE.campaign_count()
+        }
+
+def case_flags(summary):
+    """Report flags backed by what was actually detected and ingested."""
+    flags = []
+    risky = {label: summary["sms_by_risk"].get(label, 0) for label in ("high", "med")}
+    if risky["high"]:
+        flags.append(f"{risky['high']} high-risk SMS")
+    if risky["med"]:
+        flags.append(f"{risky['med']} medium-risk SMS")
+    if summary["campaigns"]:
+        flags.append(f"{summary['campaigns']} near-duplicate SMS campaigns")
+    missed = summary["calls_by_type"].get("Missed", 0)
+    if missed:
+        flags.append(f"{missed} missed calls")
+    odd = summary["odd_hour_activity"]
+    if odd["calls"] or odd["sms"]:
+        flags.append(f"Odd-hour activity ({ODD_HOURS[0]:02d}:00-{ODD_HOURS[-1]:02d}:59): "
+                     f"{odd['calls']} calls, {odd['sms']} SMS")
+    return flags
+
+@app.route('/api/summary', methods=['GET'])
+def get_summary():
+    """
+    Dashboard aggregates: totals, calls by type, SMS by risk level, activity by
+    hour of day, odd-hour activity, top contacts and report flags. Constant
+    time in the case size.
+    Query Params: top (contacts per ranking, default 10)
+    """
+    try:
+        top = min(int(request.args.get('top', 10)), 1000)
+    except ValueError:
+        return jsonify({"error": "top must be an integer"}), 400
+    summary = case_summary(top)
+    summary["flags"] = case_flags(summary)
+    return jsonify({"status": "success", "summary": summary})
+
+@app.route('/api/summary/timeseries', methods=['GET'])
+def get_summary_timeseries():
+    """
+    Record counts per time bucket from the rollups.
+    Query Params: kind (call|sms|alert, default call), granularity (day|hour|hour_of_day, default day),
+                  start_date, end_date (day/hour only)
+    """
+    kind = request.args.get('kind', 'call')
+    granularity = request.args.get('granularity', 'day')
+    if kind not in ('call', 'sms', 'alert'):
+        return jsonify({"error": "kind must be 'call', 'sms' or 'alert'"}), 400
+    if granularity not in TIME_DIMENSIONS:
+        return jsonify({"error": f"granularity must be one of: {', '.join(TIME_DIMENSIONS)}"}), 400
+    try:
+        start, end = parse_date_range(request.args.get('start_date'), request.args.get('end_date'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if granularity == "hour_of_day" and (start is not None or end is not None):
+        return jsonify({"error": "start_date/end_date apply to day and hour granularity"}), 400
+    counts = STORE.rollup(kind, granularity,
+                          None if start is None else time_bucket(start, granularity),
+                          None if end is None else time_bucket(end, granularity))
+    return jsonify({"status": "success", "kind": kind, "granularity": granularity,
+                    "data": [{"bucket": bucket, "records": n} for bucket, n in counts.items()]})
+
+@app.route('/api/evidence/<kind>/<int:record_id>/proof', methods=['GET'])
+def evidence_proof(kind, record_id):
+    """
+    Merkle inclusion proof for a single evidence record. The record is re-hashed
+    and checked against the current root without touching the rest of the case.
+    """
+    if kind not in ('call', 'sms'):
+        return jsonify({"error": "kind must be 'call' or 'sms'"}), 400
+    proof = STORE.inclusion_proof(kind, record_id)
+    record = STORE.get(kind, record_id)
+    if proof is None or record is None:
+        return jsonify({"error": "evidence not found"}), 404
+
+    current_hash = compute_hash(record)
+    proof["record"] = record
+    proof["record_unchanged"] = current_hash == proof["record_hash"]
+    proof["verified"] = proof["record_unchanged"] and verify_inclusion(current_hash, proof["proof"], proof["root"])
+    return jsonify({"status": "success", "integrity": proof})
+
+@app.route('/api/contacts', methods=['GET'])
+def list_contacts():
+    """
+    Contact index: every number seen in the evidence, normalized and interned at
+    ingestion, with first/last seen and call/SMS/missed counts.
+    Query Params: sort (last_seen|first_seen|calls|sms|missed), limit (default 100), offset
+    """
+    order_by = request.args.get('sort', 'last_seen')
+    if order_by not in CONTACT_ORDER:
+        return jsonify({"error": f"sort must be one of: {', '.join(CONTACT_ORDER)}"}), 400
+    try:
+        limit = min(int(request.args.get('limit', 100)), 10000)
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({"error": "limit/offset must be integers"}), 400
+    return jsonify({
+        "status": "success",
+        "total": STORE.contact_count(),
+        "data": STORE.contacts(order_by, limit, offset)
+    })
+
+@app.route('/api/contacts/<path:number>', methods=['GET'])
+def get_contact(number):
+    """Index entry of one number, looked up in any spelling (e.g. 555-012-3456 or +15550123456)."""
+    contact = STORE.contact(number)
+    if contact is None:
+        return jsonify({"error": "contact not found"}), 404
+    return jsonify({"status": "success", "contact": contact})
+
+@app.route('/api/campaigns', methods=['GET'])
+def list_campaigns():
+    """
+    Near-duplicate SMS campaigns found at ingestion, with size and time span.
+    Query Params: min_size (default 2), sort (size|last_seen|first_seen), limit (default 100), offset
+    """
+    order_by = request.args.get('sort', 'size')
+    if order_by not in CAMPAIGN_ORDER:
+        return jsonify({"error": f"sort must be one of: {', '.join(CAMPAIGN_ORDER)}"}), 400
+    try:
+        min_size = int(request.args.get('min_size', 2))
+        limit = min(int(request.args.get('limit', 100)), 10000)
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({"error": "min_size/limit/offset must be integers"}), 400
+    return jsonify({
+        "status": "success",
+        "total": STORE.campaign_count(min_size),
+        "data": STORE.campaigns(min_size, order_by, limit, offset)
+    })
+
+@app.route('/api/campaigns/<int:campaign_id>', methods=['GET'])
+def get_campaign(campaign_id):
+    """
+    One campaign: size, time span, senders, the representative SMS with its
+    verdict (the floor of every member's verdict), and its first members.
+    Query Params: limit (members returned, default 100)
+    """
+    try:
+        limit = min(int(request.args.get('limit', 100)), 10000)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    campaign = STORE.campaign(campaign_id)
+    if campaign is None:
+        return jsonify({"error": "campaign not found"}), 404
+    if campaign["representative"] is not None:
+        score, level, findings = analyze_risk_batch([campaign["representative"]])[0]
+        campaign["verdict"] = {"risk_score": score, "risk_level": level, "findings": findings}
+    members = STORE.iter_records("sms", campaign=campaign_id)
+    campaign["members"] = [record for _, record in zip(range(limit), members)]
+    return jsonify({"status": "success", "campaign": campaign})
 
 @app.route('/api/evidence/view', methods=['GET'])
 def view_evidence():
-    """Returns evidence with audit log entry."""
+    """
+    Returns evidence with audit log entry.
+    Query Params: id, type (call|sms), start_date, end_date, contact (a number, any spelling) (optional filters),
+                  format=ndjson (streamed: access log line, then one record per line), gzip=1
+    """
     evidence_id = request.args.get('id', 'ALL')
+    evidence_type = request.args.get('type')
+    if evidence_type not in (None, 'call', 'sms'):
+        return jsonify({"error": "type must be 'call' or 'sms'"}), 400
+    try:
+        start, end = parse_date_range(request.args.get('start_date'), request.args.get('end_date'))
+        filters = {} if evidence_id == 'ALL' else {"id": int(evidence_id)}
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if request.args.get('contact'):
+        contact = STORE.contact(request.args['contact'])
+        # An unknown number matches no evidence
+        filters["contact"] = contact["id"] if contact else -1
+    kinds = [evidence_type] if evidence_type else ["call", "sms"]
     
-    # Audit Logging Simulation
-    log_entry = {
-        "timestamp": datetime.now().isoformat(),
-        "user": "Forensic_Investigator_01",
-        "action": "READ_ONLY_ACCESS",
-        "artifact": evidence_id,
-        "integrity_check": "PASSED"
-    }
-    print(f"AUDIT LOG: {log_entry}")
+    # Chain-of-custody entry: queued for the background audit writer, no I/O here
+    log_entry = AUDIT_LOG.log(
+        "Forensic_Investigator_01", "READ_ONLY_ACCESS", evidence_id,
+        integrity_check="PASSED",
+        query={k: v for k, v in request.args.items() if k in ('type', 'start_date', 'end_date', 'contact')}
+    )
     
     # Return data
+    if wants_ndjson(request):
+        def lines():
+            yield {"status": "authorized", "access_logs": log_entry}
+            for kind in kinds:
+                for record in STORE.iter_records(kind, start, end, **filters):
+                    yield {"source": kind, **record}
+        return ndjson_response(lines(), compress=wants_gzip(request))
+
+    evidence = []
+    for kind in kinds:
+        evidence.extend(STORE.iter_records(kind, start, end, **filters))
     return jsonify({
         "status": "authorized",
         "access_logs": log_entry,
-        "evidence_data": CALL_LOGS + SMS_LOGS
+        "evidence_data": evidence
     })
 
+@app.route('/api/audit', methods=['GET'])
+def audit_entries():
+    """
+    Audit trail lookup through the (artifact, user) index, newest first.
+    Query Params: artifact, user, action, since, until (epoch seconds), limit (default 100)
+    """
+    try:
+        limit = min(int(request.args.get('limit', 100)), 10000)
+        since = float(request.args['since']) if request.args.get('since') else None
+        until = float(request.args['until']) if request.args.get('until') else None
+    except ValueError:
+        return jsonify({"error": "limit/since/until must be numbers"}), 400
+    AUDIT_LOG.flush()  # read this worker's own queued entries
+    entries = AUDIT_LOG.query(request.args.get('artifact'), request.args.get('user'), request.args.get('action'),
+                              since, until, limit)
+    return jsonify({"status": "success", "count": len(entries), "data": entries, "writer": AUDIT_LOG.stats()})
+
+@app.route('/api/audit/verify', methods=['GET'])
+def audit_verify():
+    """Recomputes the audit hash chain over all segments (after flushing this worker's queue)."""
+    AUDIT_LOG.flush()
+    return jsonify({"status": "success", "audit_chain": AUDIT_LOG.verify()})
+
+def label_sms_batch(records):
+    """Risk labels for a chunk of SMS records (one batched hybrid scoring pass)."""
+    messages = [{"content": r.get('content') or ''} for r in records]
+    verdicts = analyze_risk_batch(messages, campaign_representatives(messages))
+    return [RISK_LABELS[level] for _, level, _ in verdicts]
+
+@app.route('/api/ingest/bulk', methods=['POST'])
+def bulk_ingest():
+    """
+    Bulk import of a call or SMS extraction streamed in the request body.
+    Query Params: kind (call|sms), format (csv|ndjson|parquet; defaults to the Content-Type),
+                  chunksize (rows per analysis/insert batch)
+    The body is spooled to disk and imported by a background job; returns 202
+    with the job id. Poll GET /api/jobs/<job_id> for progress and throughput.
+    """
+    kind = request.args.get('kind')
+    if kind not in ('call', 'sms'):
+        return jsonify({"error": "kind must be 'call' or 'sms'"}), 400
+    fmt = upload_format(request.args.get('format'), request.content_type)
+    if fmt is None:
+        return jsonify({"error": "format must be csv, ndjson or parquet"}), 400
+    if fmt == "parquet" and not parquet_supported():
+        return jsonify({"error": "Parquet uploads require pyarrow, which is not installed on this server"}), 400
+    try:
+        chunksize = int(request.args.get('chunksize', BULK_CHUNKSIZE))
+    except ValueError:
+        return jsonify({"error": "chunksize must be an integer"}), 400
+
+    path, size = spool_upload(request.stream, fmt, BULK_SPOOL_DIR)
+    if size == 0:
+        os.remove(path)
+        return jsonify({"error": "empty upload"}), 400
+    response = submit_job(
+        "bulk_ingest",
+        lambda job: ingest_upload(STORE, kind, path, fmt, job, label_sms=label_sms_batch, chunksize=chunksize),
+        detail={"kind": kind, "format": fmt, "bytes": size},
+        # ingest_upload removes the spooled file, unless it never runs
+        cleanup=lambda: os.remove(path)
+    )
+    if response[1] != 202:
+        os.remove(path)
+    return response
+
+@app.route('/api/ingest/<job_id>', methods=['GET'])
+def bulk_ingest_status(job_id):
+    """Status of a bulk import (same as GET /api/jobs/<job_id>)."""
+    return get_job(job_id)
+
+# --- Job Endpoints ---
+
+def analyze_case_job(job):
+    """Scores every stored SMS in batches; the result keeps level counts and the flagged messages."""
+    total = max(STORE.count("sms"), 1)
+    levels, flagged, done = {}, [], 0
+    batch = []
+    for sms in STORE.iter_records("sms", batch_size=JOB_BATCH_SIZE):
+        batch.append(sms)
+        if len(batch) == JOB_BATCH_SIZE:
+            done += _score_job_batch(batch, levels, flagged)
+            batch = []
+            job.progress(done / total, scored=done)
+    done += _score_job_batch(batch, levels, flagged)
+    return {"count": done, "levels": levels, "flagged": flagged}
+
+def _score_job_batch(batch, levels, flagged):
+    for s, (score, level, findings) in zip(batch, analyze_risk_batch(batch, campaign_representatives(batch))):
+        levels[level] = levels.get(level, 0) + 1
+        if level != "LOW":
+            flagged.append({"id": s['id'], "risk_score": score, "risk_level": level,
+                            "timestamp": s['timestamp'], "findings": findings})
+    return len(batch)
+
+def report_job(job):
+    """Case report plus the full forensic analysis, streamed from the store in columnar batches."""
+    analyzer = StreamingForensicAnalyzer()
+    total = max(STORE.count("call") + STORE.count("sms"), 1)
+    done = 0
+    for kind, consume, columns in (
+        ("call", analyzer.consume_calls, {"caller": "caller_number", "receiver": "receiver_number", "type": "call_type"}),
+        ("sms", analyzer.consume_sms, {"content": "message_content", "risk": None}),
+    ):
+        for block in iter_blocks(STORE, kind, batch_size=JOB_BATCH_SIZE):
+            # Analyzer schema straight from the column arrays (the id is dropped)
+            consume(block.to_pandas(categorical=False, rename={"id": None, **columns}))
+            done += len(block)
+            job.progress(done / total, records=done)
+
+    report = build_report()
+    report["forensic_analysis"] = analyzer.finalize()
+    return report
+
+JOB_TYPES = {"analyze": analyze_case_job, "report": report_job}
+
+def submit_job(kind, task, detail=None, cleanup=None):
+    """Queues a job; returns the 202 response with its id, or 429 when the queue is full."""
+    try:
+        job_id = JOB_QUEUE.submit(kind, task, detail, cleanup)
+    except QueueFull as e:
+        return jsonify({"error": f"job queue is full ({e})"}), 429
+    return jsonify({"status": "accepted", "job_id": job_id, "status_url": f"/api/jobs/{job_id}"}), 202
+
+@app.route('/api/jobs', methods=['POST'])
+def create_job():
+    """
+    Submits a background job.
+    Body: {"type": "analyze" | "report"}
+    """
+    job_type = (request.json or {}).get('type') if request.is_json else request.args.get('type')
+    if job_type not in JOB_TYPES:
+        return jsonify({"error": f"type must be one of: {', '.join(JOB_TYPES)}"}), 400
+    return submit_job(job_type, JOB_TYPES[job_type])
+
+@app.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    """Recent jobs, newest first. Query Params: status, limit (default 50)"""
+    try:
+        limit = min(int(request.args.get('limit', 50)), 1000)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    return jsonify({"status": "success", "jobs": JOBS.list(request.args.get('status'), limit)})
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status, progress (0-1), detail and, once finished, the result or error of a job."""
+    job = JOBS.get(job_id)
+    if job is None:
+        return jsonify({"error": "job not found"}), 404
+    return jsonify({"status": "success", "job": job})
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Cancels a queued job, or stops a running one at its next progress report."""
+    if JOBS.get(job_id) is None:
+        return jsonify({"error": "job not found"}), 404
+    return jsonify({"status": "success", "job_id": job_id, "job_status": JOB_QUEUE.cancel(job_id)})
+
 @app.route('/api/add-data', methods=['POST'])
 def add_forensic_data():
     """Endpoint for real-time data ingestion and analysis."""
@@ -245,13 +931,23 @@ def add_forensic_data():
     
     if data_type == 'sms':
         new_sms = {
-            "id": len(SMS_LOGS) + 1,
             "sender": data.get('sender', 'Unknown'),
+            "receiver": "Self",
             "timestamp": data.get('timestamp', datetime.now().strftime('%Y-%m-%d %H:%M:%S')),
             "content": data.get('content', '')
         }
-        SMS_LOGS.append(new_sms)
         score, level, findings = analyze_risk(new_sms)
+        # A near-duplicate of a known campaign is at least as risky as its representative
+        campaign = campaign_representatives([new_sms])
+        if campaign and campaign[0] is not None and campaign[0][0] is not None:
+            rep_score, rep_level, _ = analyze_risk({"content": campaign[0][2]})
+            if rep_score > score:
+                score, level = rep_score, rep_level
+                findings = findings + [f"Near-duplicate of SMS {campaign[0][1]} (campaign {campaign[0][0]}): "
+                                       f"verdict propagated"]
+        new_sms["risk"] = RISK_LABELS[level]
+        new_sms = STORE.add("sms", new_sms)
+        case = LIVE_DETECTOR.ingest(STORE, "sms", new_sms)
         return jsonify({
             "status": "ingested",
             "analysis": {
@@ -259,25 +955,29 @@ def add_forensic_data():
                 "level": level,
                 "findings": findings
             },
+            "case": case,
             "hash": compute_hash(new_sms)
         })
         
     elif data_type == 'call':
         new_call = {
-            "id": len(CALL_LOGS) + 1,
             "caller": data.get('number', 'Unknown'),
             "receiver": "Self",
             "timestamp": data.get('timestamp', datetime.now().strftime('%Y-%m-%d %H:%M:%S')),
             "duration": data.get('duration', '00:00'),
             "type": data.get('call_type', 'Incoming')
         }
-        CALL_LOGS.append(new_call)
+        new_call = STORE.add("call", new_call)
         # Basic rule: Missed calls from unknown numbers are suspicious
         score = 40 if new_call['type'] == 'Missed' else 10
-        level = "MEDIUM" if score > 30 else "LOW"
+        # Stateful rules (Wangiri, repetition, bursts, odd hours, duplicates) over the live case
+        case = LIVE_DETECTOR.ingest(STORE, "call", new_call)
+        score = min(100, score + case["event_score"])
+        level = "HIGH" if score >= 70 else "MEDIUM" if score > 30 else "LOW"
         return jsonify({
             "status": "ingested",
-            "analysis": {"score": score, "level": level},
+            "analysis": {"score": score, "level": level, "findings": case["detections"]},
+            "case": case,
             "hash": compute_hash(new_call)
         })
 
@@ -0,0 +1,178 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from forensic_api import SCORE_BATCHER, app as wsgi_app, parse_score_request, reload_ai_model_if_changed, score_payload
+from metrics import METRICS
+
+# Async serving mode: an ASGI entrypoint alongside the WSGI forensic_api:app,
+# e.g. `uvicorn forensic_asgi:app --workers 4`. POST /api/score is served on
+# the event loop: requests only await the shared micro-batcher, so many
+# concurrent messages cost one predict_proba per batch and no thread each.
+# Every other route runs the Flask app on a bounded thread pool (WSGI bridge),
+# so blocking store/SQLite work never stalls the loop.
+
+WSGI_THREADS = int(os.environ.get('ASGI_WSGI_THREADS', 16))
+SPOOL_BYTES = 1024 * 1024  # request bodies above this are spooled to disk for the WSGI bridge
+BRIDGE_CHUNKS = 16  # response chunks buffered between the app thread and the event loop
+
+_executor = ThreadPoolExecutor(max_workers=WSGI_THREADS, thread_name_prefix="wsgi")
+
+
+async def _read_body(receive, spool=False):
+    body = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES) if spool else bytearray()
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise ConnectionAbortedError("client disconnected")
+        body.write(message.get("body", b"")) if spool else body.extend(message.get("body", b""))
+        if not message.get("more_body"):
+            return body
+
+
+async def _send_json(send, status, payload):
+    body = json.dumps(payload).encode()
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def score(scope, receive, send):
+    """POST /api/score on the event loop (same contract as the Flask route)."""
+    started = time.perf_counter()
+    try:
+        data = json.loads(await _read_body(receive) or b"null")
+    except ValueError:
+        data = None
+    message, error = parse_score_request(data)
+    if error:
+        status, payload = 400, {"error": error}
+    else:
+        reload_ai_model_if_changed()
+        status, payload = 200, score_payload(message, await SCORE_BATCHER.run(message))
+    await _send_json(send, status, payload)
+    METRICS.observe("request_seconds", time.perf_counter() - started,
+                    route="/api/score", method="POST", status=str(status))
+
+
+NATIVE_ROUTES = {("POST", "/api/score"): score}
+
+
+def _environ(scope, body):
+    path = scope.get("root_path", "") + scope["path"]
+    server = scope.get("server") or ("localhost", 80)
+    length = body.tell()
+    body.seek(0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode().decode("latin-1"),
+        "PATH_INFO": scope["path"].encode().decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": (scope.get("client") or ("", 0))[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+        "wsgi.input_terminated": True,
+        "RAW_URI": path,
+    }
+    for name, value in scope.get("headers", []):
+        key = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if key in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            environ[key] = value
+        else:
+            key = f"HTTP_{key}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    # The body is fully buffered, so its length is known even for chunked uploads
+    environ["CONTENT_LENGTH"] = str(length)
+    environ.pop("HTTP_TRANSFER_ENCODING", None)
+    return environ
+
+
+async def wsgi_bridge(scope, receive, send):
+    """Runs the Flask app for one request on the thread pool, streaming its body back chunk by chunk."""
+    loop = asyncio.get_running_loop()
+    body = await _read_body(receive, spool=True)
+    environ = _environ(scope, body)
+    chunks = asyncio.Queue(maxsize=BRIDGE_CHUNKS)
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response["status"] = int(status.split(" ", 1)[0])
+        response["headers"] = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers]
+
+    def put(item):
+        asyncio.run_coroutine_threadsafe(chunks.put(item), loop).result()
+
+    def run():
+        # The app call, iteration and close stay on one thread: Flask's streamed
+        # responses keep their request context in thread-bound context variables
+        try:
+            result = wsgi_app(environ, start_response)
+            try:
+                for chunk in result:
+                    if chunk:
+                        put(chunk)
+            finally:
+                if hasattr(result, "close"):
+                    result.close()
+            put(None)
+        except BaseException as e:
+            put(e)
+
+    task = loop.run_in_executor(_executor, run)
+    try:
+        started = False
+        while True:
+            item = await chunks.get()
+            if isinstance(item, BaseException):
+                raise item
+            if not started:
+                await send({"type": "http.response.start", "status": response["status"], "headers": response["headers"]})
+                started = True
+            if item is None:
+                break
+            await send({"type": "http.response.body", "body": item, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+    finally:
+        # Keep draining if we stopped early, so the app thread is never left blocked on a full queue
+        while not task.done():
+            getter = asyncio.ensure_future(chunks.get())
+            await asyncio.wait({task, getter}, return_when=asyncio.FIRST_COMPLETED)
+            getter.cancel()
+        body.close()
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            _executor.shutdown(wait=False)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI 3 application."""
+    if scope["type"] == "lifespan":
+        return await _lifespan(receive, send)
+    if scope["type"] != "http":
+        raise ValueError(f"unsupported ASGI scope type: {scope['type']}")
+    handler = NATIVE_ROUTES.get((scope["method"], scope["path"]), wsgi_bridge)
+    try:
+        await handler(scope, receive, send)
+    except ConnectionAbortedError:
+        pass
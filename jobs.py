@@ -0,0 +1,246 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Long-running work (bulk imports, case analysis, reports) runs outside the
+# request on a small bounded pool per API worker and is tracked in a `jobs`
+# table next to the evidence, so any worker can report or cancel a job and
+# its outcome survives restarts.
+
+JOBS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    detail TEXT,
+    result TEXT,
+    error TEXT,
+    owner TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created);
+CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs (created);
+"""
+
+# queued -> running -> succeeded | failed; cancellation goes through "cancelling"
+# while the task is running and ends in "cancelled"
+ACTIVE = ("queued", "running", "cancelling")
+FINISHED = ("succeeded", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class QueueFull(Exception):
+    pass
+
+
+def _owner():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobStore:
+    """
+    Job table inside the evidence database. It uses its own per-thread
+    connections: a job reporting progress while it scans evidence must not
+    write through the connection holding the scan's read snapshot.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(JOBS_SCHEMA)
+        if "owner" not in {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}:
+            conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def create(self, kind, detail=None):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._conn().execute(
+            "INSERT INTO jobs (id, kind, status, detail, owner, created, updated) VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+            (job_id, kind, json.dumps(detail or {}), _owner(), now, now)
+        )
+        return job_id
+
+    def update(self, job_id, status=None, progress=None, detail=None, result=None, error=None, expect=None):
+        """
+        Updates a job; with `expect` (a tuple of statuses) only if it is currently
+        in one of them. Returns whether a row was changed.
+        """
+        fields, params = ["updated = ?"], [time.time()]
+        for column, value in (("status", status), ("progress", progress), ("error", error)):
+            if value is not None:
+                fields.append(f"{column} = ?")
+                params.append(value)
+        for column, value in (("detail", detail), ("result", result)):
+            if value is not None:
+                fields.append(f"{column} = ?")
+                params.append(json.dumps(value, default=str))
+        sql = f"UPDATE jobs SET {', '.join(fields)} WHERE id = ?"
+        params.append(job_id)
+        if expect:
+            sql += f" AND status IN ({', '.join('?' for _ in expect)})"
+            params.extend(expect)
+        return self._conn().execute(sql, params).rowcount > 0
+
+    def status(self, job_id):
+        row = self._conn().execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row[0] if row else None
+
+    def get(self, job_id):
+        row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._decode(row) if row else None
+
+    def list(self, status=None, limit=50):
+        """Most recent jobs first, without their results."""
+        sql = "SELECT id, kind, status, progress, detail, error, created, updated FROM jobs"
+        params = []
+        if status:
+            sql += " WHERE status = ?"
+            params.append(status)
+        sql += " ORDER BY created DESC LIMIT ?"
+        params.append(limit)
+        return [self._decode(row) for row in self._conn().execute(sql, params)]
+
+    @staticmethod
+    def _decode(row):
+        job = dict(row)
+        for column in ("detail", "result"):
+            if column in job:
+                job[column] = json.loads(job[column]) if job[column] else None
+        return job
+
+    def recover_interrupted(self):
+        """Fails unfinished jobs whose owning process on this host no longer exists."""
+        host = socket.gethostname()
+        rows = self._conn().execute(
+            f"SELECT id, owner FROM jobs WHERE status IN ({', '.join('?' for _ in ACTIVE)})", ACTIVE
+        ).fetchall()
+        for job_id, owner in rows:
+            owner_host, _, pid = (owner or "").rpartition(":")
+            if owner_host == host and pid.isdigit() and not _pid_alive(int(pid)):
+                self.update(job_id, status="failed", error="interrupted: worker process exited", expect=ACTIVE)
+
+
+class JobHandle:
+    """Passed to a running task for progress reports and cancellation checks."""
+
+    def __init__(self, jobs, job_id, detail=None):
+        self.jobs = jobs
+        self.id = job_id
+        self.detail = dict(detail or {})
+
+    def check_cancelled(self):
+        if self.jobs.status(self.id) == "cancelling":
+            raise JobCancelled(self.id)
+
+    def progress(self, fraction, **detail):
+        """
+        Stores the completed fraction, merges `detail` into the job's detail and
+        raises JobCancelled if cancellation was requested meanwhile.
+        """
+        self.detail.update(detail)
+        self.jobs.update(self.id, progress=round(min(max(fraction, 0.0), 1.0), 4), detail=self.detail)
+        self.check_cancelled()
+
+
+class JobQueue:
+    """
+    Bounded job runner: at most `max_workers` tasks run at once per process
+    and at most `max_pending` wait, so heavy jobs cannot take over the
+    threads that serve interactive requests.
+    """
+
+    def __init__(self, jobs, max_workers=2, max_pending=100):
+        self.jobs = jobs
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._pid = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        # Created lazily so forked workers each get their own threads
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+            self._pid = os.getpid()
+            self._pending = 0
+        return self._executor
+
+    def submit(self, kind, task, detail=None, cleanup=None):
+        """
+        Queues task(handle); its return value becomes the job result. Returns
+        the job id, or raises QueueFull when too many jobs are waiting.
+        cleanup() runs instead of the task when the job is cancelled while
+        still queued, for resources the task would otherwise release.
+        """
+        with self._lock:
+            pool = self._pool()
+            if self._pending >= self.max_pending:
+                raise QueueFull(f"{self._pending} jobs already queued")
+            self._pending += 1
+        job_id = self.jobs.create(kind, detail)
+        pool.submit(self._run, JobHandle(self.jobs, job_id, detail), task, cleanup)
+        return job_id
+
+    def _run(self, handle, task, cleanup=None):
+        with self._lock:
+            self._pending -= 1
+        # Skipped if cancelled while still queued
+        if not self.jobs.update(handle.id, status="running", expect=("queued",)):
+            if cleanup is not None:
+                try:
+                    cleanup()
+                except Exception:
+                    traceback.print_exc()
+            return
+        try:
+            result = task(handle)
+        except JobCancelled:
+            self.jobs.update(handle.id, status="cancelled")
+        except Exception as e:
+            traceback.print_exc()
+            self.jobs.update(handle.id, status="failed", error=f"{type(e).__name__}: {e}")
+        else:
+            if not self.jobs.update(handle.id, status="succeeded", progress=1.0, result=result, expect=("running",)):
+                # Cancellation arrived after the last progress check
+                self.jobs.update(handle.id, status="cancelled")
+
+    def cancel(self, job_id):
+        """Cancels a queued job, or asks a running one to stop at its next progress report."""
+        if self.jobs.update(job_id, status="cancelled", expect=("queued",)):
+            return "cancelled"
+        if self.jobs.update(job_id, status="cancelling", expect=("running",)):
+            return "cancelling"
+        return self.jobs.status(job_id)
@@ -0,0 +1,283 @@
+import os
+import threading
+import traceback
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from burst_detection import BURST_THRESHOLD, BURST_WINDOW_SECONDS, BurstDetector
+from contacts import normalize_number
+from evidence_store import EPOCH, parse_timestamp
+from forensic_analysis import ODD_HOURS, risk_level
+from rules import MALWARE_RULES
+
+# Per-number state is dropped once a number has been idle for this long (event time)
+DEFAULT_TTL_SECONDS = 7 * 86400
+# Results of records replayed from other workers' writes, kept until claimed
+REPLAYED_RESULTS = 1024
+# Records stored before a worker's first live event are replayed in the
+# background, this many per lock acquisition
+BACKLOG_CHUNK = 5000
+
+
+class _NumberState:
+    __slots__ = ("missed", "received", "last_ts")
+
+    def __init__(self):
+        self.missed = 0
+        self.received = 0
+        self.last_ts = None
+
+
+class LiveForensicDetector:
+    """
+    ForensicAnalyzer rules evaluated one event at a time for /api/add-data.
+
+    Each rule keeps just the state it needs: per-number counters (missed calls
+    for Wangiri, calls received for high repetition), call fingerprints for
+    duplicates, case-level integrity/odd-hour counts and a BurstDetector. Rules
+    fire when a counter crosses the analyzer's threshold, so every event costs
+    O(1) amortized. Numbers and fingerprints idle for longer than `ttl` are
+    evicted (least recently seen first); a number that comes back starts over.
+
+    All workers share the evidence store, so before scoring an event the
+    detector replays any records other workers stored since its last sync.
+    Records already stored when a worker first uses the detector (the case
+    so far) are replayed by a background thread instead, in chunks, so no
+    request pays for the size of the case.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL_SECONDS, burst_window=BURST_WINDOW_SECONDS, burst_threshold=BURST_THRESHOLD):
+        self.ttl = ttl
+        self.numbers = OrderedDict()   # number -> _NumberState, least recently seen first
+        self.fingerprints = OrderedDict()  # call fingerprint -> last seen ts
+        self.bursts = BurstDetector(burst_window, burst_threshold)
+        self.watermark = None          # newest event time seen
+        self._burst_sweep = None
+        self.raw_score = 0
+        self.counts = {"calls": 0, "sms": 0, "future_calls": 0, "duplicate_calls": 0,
+                       "sms_nulls": 0, "odd_hour_calls": 0, "odd_hour_sms": 0}
+        self.last_id = {"call": 0, "sms": 0}
+        self.backlog = None  # {kind: [last replayed id, last backlog id]} while the case so far is replayed
+        self._backlog_pid = None
+        self._backlog_thread = None
+        self._replayed = OrderedDict()  # (kind, id) -> result, bounded by REPLAYED_RESULTS
+        self._lock = threading.Lock()
+
+    # --- State ---
+
+    def _number(self, number, ts):
+        state = self.numbers.get(number)
+        if state is None:
+            state = self.numbers[number] = _NumberState()
+        else:
+            self.numbers.move_to_end(number)
+        if ts is not None and (state.last_ts is None or ts > state.last_ts):
+            state.last_ts = ts
+        return state
+
+    def _advance(self, ts):
+        """Moves the event-time watermark and evicts state idle for longer than the TTL."""
+        if ts is None or (self.watermark is not None and ts <= self.watermark):
+            return
+        self.watermark = ts
+        cutoff = ts - self.ttl
+        for table in (self.numbers, self.fingerprints):
+            while table:
+                key, value = next(iter(table.items()))
+                last_ts = value.last_ts if isinstance(value, _NumberState) else value
+                if last_ts is not None and last_ts >= cutoff:
+                    break
+                del table[key]
+        # Burst state is swept once per burst window of event time; call times are
+        # kept for the TTL so late (client-timestamped) calls still give exact bursts
+        if self._burst_sweep is None or ts - self._burst_sweep >= self.bursts.window:
+            self.bursts.evict(cutoff, keep_closed=False)
+            self._burst_sweep = ts
+
+    # --- Rules ---
+
+    def _observe_call(self, call, ts):
+        findings = []
+        # Per-number rules key on the canonical number, as the batch analyzer does
+        caller, receiver = normalize_number(call.get('caller')), normalize_number(call.get('receiver'))
+        self.counts["calls"] += 1
+
+        # Integrity: future timestamps and duplicate records score once per case
+        if ts is not None and ts > parse_timestamp(datetime.now()):
+            self.counts["future_calls"] += 1
+            findings.append((f"Integrity Breach: call record from {caller} has a future timestamp",
+                             30 if self.counts["future_calls"] == 1 else 0))
+        fingerprint = hash((call.get('caller'), call.get('receiver'), call.get('timestamp'), call.get('duration'), call.get('type')))
+        if fingerprint in self.fingerprints:
+            self.counts["duplicate_calls"] += 1
+            findings.append((f"Data Integrity: duplicate call record from {caller}",
+                             10 if self.counts["duplicate_calls"] == 1 else 0))
+            self.fingerprints.move_to_end(fingerprint)
+        self.fingerprints[fingerprint] = ts
+
+        # Wangiri: more than 2 missed calls from one number
+        if call.get('type') == 'Missed':
+            state = self._number(caller, ts)
+            state.missed += 1
+            if state.missed == 3:
+                findings.append((f"Potential fraud (Wangiri): {state.missed} missed calls from {caller}", 20))
+        else:
+            self._number(caller, ts)
+
+        # High repetition: more than 15 calls to one number
+        state = self._number(receiver, ts)
+        state.received += 1
+        if state.received == 16:
+            findings.append((f"High repetition detected: {state.received} calls to {receiver}", 15))
+
+        if ts is not None:
+            if (ts // 3600) % 24 in ODD_HOURS:
+                self.counts["odd_hour_calls"] += 1
+                findings.append((f"Suspicious activity during odd hours: call from {caller} at {call.get('timestamp')}", 5))
+            for key in (caller, None):
+                status = self.bursts.add(key, ts)
+                if status is None:
+                    continue
+                burst = self.bursts.burst_at(key, ts)
+                source = f"from {key}" if key is not None else "overall"
+                text = (f"Call burst {source}: {burst['calls']} calls since {EPOCH + timedelta(seconds=burst['start'])}"
+                        f" (peak {burst['peak']} within {self.bursts.window // 60} min)")
+                findings.append((text, 10 if status == "started" else 0))
+        return findings
+
+    def _observe_sms(self, sms, ts):
+        findings = []
+        sender, content = sms.get('sender'), sms.get('content')
+        self.counts["sms"] += 1
+        self._number(normalize_number(sender), ts)
+
+        nulls = sum(sms.get(field) is None for field in ('sender', 'receiver', 'timestamp', 'content'))
+        if nulls:
+            first = self.counts["sms_nulls"] == 0
+            self.counts["sms_nulls"] += nulls
+            findings.append((f"Data Integrity: {nulls} missing fields in SMS from {sender}", 5 if first else 0))
+
+        for rule, _ in MALWARE_RULES.match(content):
+            findings.append((rule.describe(sender=sender, snippet=content[:30]), rule.weight))
+
+        if ts is not None and (ts // 3600) % 24 in ODD_HOURS:
+            self.counts["odd_hour_sms"] += 1
+            findings.append((f"Suspicious activity during odd hours: SMS from {sender} at {sms.get('timestamp')}", 5))
+        return findings
+
+    def observe(self, kind, record, ts=None):
+        """
+        Applies the rules to one stored record and returns the case-level
+        change: {"risk_delta", "total_risk_score", "risk_level", "event_score", "detections"}.
+        """
+        if ts is None:
+            ts = parse_timestamp(record.get('timestamp'))
+        self._advance(ts)
+        findings = self._observe_call(record, ts) if kind == "call" else self._observe_sms(record, ts)
+        if record.get('id') is not None:
+            self.last_id[kind] = max(self.last_id[kind], record['id'])
+
+        before = min(100, self.raw_score)
+        event_score = sum(points for _, points in findings)
+        self.raw_score += event_score
+        total = min(100, self.raw_score)
+        return {
+            "risk_delta": total - before,
+            "total_risk_score": total,
+            "risk_level": risk_level(total),
+            "event_score": event_score,
+            "detections": [text for text, _ in findings],
+        }
+
+    # --- Shared Store ---
+
+    def _start_backlog(self, store, kind=None, record_id=None):
+        """
+        On first use in a process, hands every record stored so far (before
+        `record_id`, the record being ingested) to a background replay; live
+        catch-up starts after them.
+        """
+        if self._backlog_pid == os.getpid():
+            return
+        self._backlog_pid = os.getpid()
+        backlog = {}
+        for source in ("call", "sms"):
+            last = record_id - 1 if source == kind else store.max_id(source)
+            if last > self.last_id[source]:
+                backlog[source] = [self.last_id[source], last]
+                self.last_id[source] = last
+        if backlog:
+            self.backlog = backlog
+            self._backlog_thread = threading.Thread(target=self._replay_backlog, args=(store,),
+                                                    name="live-backlog", daemon=True)
+            self._backlog_thread.start()
+
+    def _replay_backlog(self, store):
+        try:
+            for source in ("call", "sms"):
+                while source in self.backlog:
+                    with self._lock:
+                        after, until = self.backlog[source]
+                        for ts, stored in store.iter_since(source, after, until_id=until, limit=BACKLOG_CHUNK):
+                            self.observe(source, stored, ts)
+                            after = stored['id']
+                        if after >= until or after == self.backlog[source][0]:
+                            del self.backlog[source]
+                        else:
+                            self.backlog[source][0] = after
+        except Exception:
+            traceback.print_exc()
+        finally:
+            with self._lock:
+                self.backlog = None
+
+    def _catch_up(self, store):
+        for source in ("call", "sms"):
+            for ts, stored in store.iter_since(source, self.last_id[source]):
+                self._replayed[(source, stored['id'])] = self.observe(source, stored, ts)
+                if len(self._replayed) > REPLAYED_RESULTS:
+                    self._replayed.popitem(last=False)
+
+    def sync(self, store):
+        """Replays every record stored since the last sync."""
+        with self._lock:
+            self._start_backlog(store)
+            self._catch_up(store)
+
+    def ingest(self, store, kind, record):
+        """
+        Scores a record just stored by this worker. Everything stored since the
+        last sync (including other workers' writes) is replayed in id order and
+        the result for this record is returned.
+        """
+        with self._lock:
+            self._start_backlog(store, kind, record['id'])
+            self._catch_up(store)
+            result = self._replayed.pop((kind, record['id']), None)
+            if result is None:
+                # Replayed long ago by another request: its effect is already in the case score
+                result = {"risk_delta": 0, "event_score": 0, "detections": []}
+            # Records replayed after this one may have moved the case score further
+            total = min(100, self.raw_score)
+            return {**result, "total_risk_score": total, "risk_level": risk_level(total)}
+
+    def wait_for_backlog(self, timeout=None):
+        """Blocks until the background replay of the case so far is done (returns whether it is)."""
+        thread = self._backlog_thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout)
+        return self.backlog is None
+
+    def summary(self):
+        with self._lock:
+            total = min(100, self.raw_score)
+            return {
+                "total_risk_score": total,
+                "risk_level": risk_level(total),
+                "counts": dict(self.counts),
+                "tracked_numbers": len(self.numbers),
+                "tracked_fingerprints": len(self.fingerprints),
+                "last_id": dict(self.last_id),
+                # Records stored before this worker's first live event still being replayed
+                "backlog_pending": {kind: until - after for kind, (after, until) in (self.backlog or {}).items()},
+            }
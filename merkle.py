@@ -0,0 +1,142 @@
+import hashlib
+import json
+
+# Append-only Merkle tree over per-record evidence hashes (RFC 6962 layout).
+# Complete subtrees are stored as (level, idx) nodes; a tree of n leaves has a
+# "peak" at every level whose bit is set in n, with index (n >> level) - 1.
+# Appending a leaf touches O(log n) nodes, the root and inclusion proofs read
+# O(log n) nodes, and the case never has to be re-serialized.
+
+MERKLE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS merkle_leaves (
+    leaf INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    record_id INTEGER NOT NULL,
+    record_hash TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_merkle_record ON merkle_leaves (kind, record_id);
+
+CREATE TABLE IF NOT EXISTS merkle_nodes (
+    level INTEGER NOT NULL,
+    idx INTEGER NOT NULL,
+    hash BLOB NOT NULL,
+    PRIMARY KEY (level, idx)
+) WITHOUT ROWID;
+"""
+
+EMPTY_ROOT = hashlib.sha256(b"").hexdigest()
+
+
+def record_hash(record):
+    """SHA-256 of one evidence record (same canonical JSON as forensic_api.compute_hash)."""
+    return hashlib.sha256(json.dumps(record, sort_keys=True).encode()).hexdigest()
+
+
+def leaf_node(record_digest):
+    return hashlib.sha256(b"\x00" + bytes.fromhex(record_digest)).digest()
+
+
+def parent_node(left, right):
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def tree_size(conn):
+    row = conn.execute("SELECT MAX(leaf) FROM merkle_leaves").fetchone()
+    return 0 if row[0] is None else row[0] + 1
+
+
+def _node(conn, level, idx):
+    return conn.execute("SELECT hash FROM merkle_nodes WHERE level = ? AND idx = ?", (level, idx)).fetchone()[0]
+
+
+def _peaks(conn, size):
+    """[(level, idx, hash)] of the complete subtrees, left to right."""
+    return [(level, (size >> level) - 1, _node(conn, level, (size >> level) - 1))
+            for level in reversed(range(size.bit_length())) if size >> level & 1]
+
+
+def append_leaves(conn, entries):
+    """
+    Appends [(kind, record_id, record_hash), ...] inside the caller's write
+    transaction. Only the current peaks are read; every new node is written once.
+    """
+    if not entries:
+        return
+    size = tree_size(conn)
+    frontier = {level: digest for level, _, digest in _peaks(conn, size)}
+    leaves, nodes = [], []
+    for kind, record_id, digest in entries:
+        leaves.append((size, kind, record_id, digest))
+        idx, level, node = size, 0, leaf_node(digest)
+        nodes.append((level, idx, node))
+        # Odd index: the left sibling is the current peak at this level, so merge upwards
+        while idx & 1:
+            node = parent_node(frontier.pop(level), node)
+            idx, level = idx >> 1, level + 1
+            nodes.append((level, idx, node))
+        frontier[level] = node
+        size += 1
+    conn.executemany("INSERT INTO merkle_leaves (leaf, kind, record_id, record_hash) VALUES (?, ?, ?, ?)", leaves)
+    conn.executemany("INSERT INTO merkle_nodes (level, idx, hash) VALUES (?, ?, ?)", nodes)
+
+
+def _bag(hashes):
+    """Folds peaks right to left: H(p0, H(p1, H(p2, ...)))."""
+    node = hashes[-1]
+    for digest in reversed(hashes[:-1]):
+        node = parent_node(digest, node)
+    return node
+
+
+def root(conn, size=None):
+    size = tree_size(conn) if size is None else size
+    if size == 0:
+        return EMPTY_ROOT
+    return _bag([digest for _, _, digest in _peaks(conn, size)]).hex()
+
+
+def inclusion_proof(conn, kind, record_id):
+    """
+    Returns {"leaf", "tree_size", "record_hash", "root", "proof"} for one record,
+    where proof is a list of {"side", "hash"} steps from the leaf up to the root,
+    or None if the record is not in the tree.
+    """
+    row = conn.execute("SELECT leaf, record_hash FROM merkle_leaves WHERE kind = ? AND record_id = ?",
+                       (kind, record_id)).fetchone()
+    if row is None:
+        return None
+    leaf, digest = row
+    size = tree_size(conn)
+    peaks = _peaks(conn, size)
+
+    # Locate the peak whose subtree covers the leaf
+    for position, (level, idx, _) in enumerate(peaks):
+        if leaf >> level == idx:
+            break
+
+    proof = []
+    for lvl in range(level):
+        sibling = (leaf >> lvl) ^ 1
+        proof.append({"side": "left" if sibling < leaf >> lvl else "right", "hash": _node(conn, lvl, sibling).hex()})
+    later = [digest_ for _, _, digest_ in peaks[position + 1:]]
+    if later:
+        proof.append({"side": "right", "hash": _bag(later).hex()})
+    for _, _, earlier in reversed(peaks[:position]):
+        proof.append({"side": "left", "hash": earlier.hex()})
+
+    return {
+        "leaf": leaf,
+        "tree_size": size,
+        "record_hash": digest,
+        "root": _bag([d for _, _, d in peaks]).hex(),
+        "proof": proof
+    }
+
+
+def verify_inclusion(record_digest, proof, expected_root):
+    """Recomputes the root from a record hash and its proof steps."""
+    node = leaf_node(record_digest)
+    for step in proof:
+        sibling = bytes.fromhex(step["hash"])
+        node = parent_node(sibling, node) if step["side"] == "left" else parent_node(node, sibling)
+    return node.hex() == expected_root
@@ -0,0 +1,290 @@
+import bisect
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import Response, g, jsonify, request
+
+# In-process latency instrumentation. Histograms use fixed log-spaced buckets
+# (Prometheus style), so observing is a bisect plus two additions under a lock
+# and percentiles are read from the bucket counts. Each gunicorn worker keeps
+# and exports its own registry. With METRICS_ENABLED=0 every timer is a shared
+# no-op context manager.
+
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') != '0'
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', '0') == '1'
+PROFILE_INTERVAL = float(os.environ.get('PROFILE_INTERVAL_MS', 5)) / 1000
+
+# Upper bounds in seconds: 50 us .. ~100 s, four buckets per power of ten
+BUCKETS = tuple(round(5e-5 * 10 ** (i / 4), 8) for i in range(26))
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """Latency histogram over BUCKETS with count and sum."""
+
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile, interpolated linearly inside the bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = BUCKETS[i - 1] if i else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return BUCKETS[-1]
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("registry", "key", "started")
+
+    def __init__(self, registry, key):
+        self.registry = registry
+        self.key = key
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry._observe(self.key, time.perf_counter() - self.started)
+        return False
+
+
+class MetricsRegistry:
+    """
+    Named histograms and counters with string labels, e.g.
+    timer("stage_seconds", stage="model_predict") or
+    count("inference_errors_total", model="compact").
+    """
+
+    def __init__(self, prefix="forensic", enabled=METRICS_ENABLED):
+        self.prefix = prefix
+        self.enabled = enabled
+        self.histograms = {}  # (name, labels tuple) -> Histogram
+        self.counters = Counter()
+        self._lock = threading.Lock()
+
+    def timer(self, name, **labels):
+        if not self.enabled:
+            return NULL_TIMER
+        return _Timer(self, (name, tuple(sorted(labels.items()))))
+
+    def observe(self, name, seconds, **labels):
+        if self.enabled:
+            self._observe((name, tuple(sorted(labels.items()))), seconds)
+
+    def _observe(self, key, seconds):
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def count(self, name, amount=1, **labels):
+        if self.enabled:
+            with self._lock:
+                self.counters[(name, tuple(sorted(labels.items())))] += amount
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def summary(self):
+        """JSON view: count, mean and p50/p95/p99 in ms per histogram, plus counters."""
+        with self._lock:
+            histograms = [(key, h.count, h.sum, [h.quantile(q) for q in QUANTILES])
+                          for key, h in self.histograms.items()]
+            counters = list(self.counters.items())
+        timers = []
+        for (name, labels), count, total, quantiles in sorted(histograms):
+            entry = {"name": name, **dict(labels), "count": count, "mean_ms": round(total / count * 1000, 3)}
+            entry.update({f"p{int(q * 100)}_ms": round(v * 1000, 3) for q, v in zip(QUANTILES, quantiles)})
+            timers.append(entry)
+        return {
+            "timers": timers,
+            "counters": [{"name": name, **dict(labels), "value": value} for (name, labels), value in sorted(counters)]
+        }
+
+    def render_prometheus(self):
+        """Text exposition format (version 0.0.4)."""
+        with self._lock:
+            histograms = [(key, list(h.counts), h.count, h.sum) for key, h in self.histograms.items()]
+            counters = list(self.counters.items())
+
+        lines, typed = [], set()
+        for (name, labels), counts, count, total in sorted(histograms):
+            metric = f"{self.prefix}_{name}"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} histogram")
+                typed.add(metric)
+            cumulative = 0
+            for bound, n in zip(BUCKETS + (None,), counts):
+                cumulative += n
+                le = "+Inf" if bound is None else repr(bound)
+                lines.append(f"{metric}_bucket{_labels(labels, le=le)} {cumulative}")
+            lines.append(f"{metric}_sum{_labels(labels)} {total}")
+            lines.append(f"{metric}_count{_labels(labels)} {count}")
+        for (name, labels), value in sorted(counters):
+            metric = f"{self.prefix}_{name}"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            lines.append(f"{metric}{_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+METRICS = MetricsRegistry()
+
+
+def timer(name, **labels):
+    return METRICS.timer(name, **labels)
+
+
+def stage(name):
+    """Timer for one hot-path stage (model transform, a regex family, JSON encoding, hashing...)."""
+    return METRICS.timer("stage_seconds", stage=name)
+
+
+def stage_timings():
+    """A dict for code that times its own sub-stages (e.g. RuleSet timings), or None with metrics off."""
+    return {} if METRICS.enabled else None
+
+
+def observe_stages(prefix, timings):
+    """Records {name: seconds} from stage_timings() as the stages '<prefix>.<name>'."""
+    for name, seconds in (timings or {}).items():
+        METRICS.observe("stage_seconds", seconds, stage=f"{prefix}.{name}")
+
+
+# --- Sampling Profiler ---
+
+class SamplingProfiler:
+    """
+    Samples one thread's Python stack every `interval` seconds from a helper
+    thread and counts identical stacks. Only the profiled request pays for it.
+    """
+
+    def __init__(self, thread_id, interval=PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.seconds = time.perf_counter() - self.started
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+    def report(self, top=40):
+        """Collapsed stacks (flame graph input), busiest first, after a summary header."""
+        lines = [f"# {self.samples} samples every {self.interval * 1000:g} ms over {self.seconds * 1000:.1f} ms"]
+        lines.extend(f"{stack} {count}" for stack, count in self.stacks.most_common(top))
+        return "\n".join(lines) + "\n"
+
+
+# --- Flask Integration ---
+
+def instrument(app, registry=METRICS):
+    """
+    Times every request by route and status code, JSON encoding as its own
+    stage, and serves GET /metrics (Prometheus text) and GET /metrics/summary.
+    With PROFILING_ENABLED=1 a request with ?profile=1 is run under the
+    sampling profiler and answered with its collapsed stacks instead.
+    """
+    json_provider = type(app.json)
+
+    class TimedJSONProvider(json_provider):
+        def dumps(self, obj, **kwargs):
+            with registry.timer("stage_seconds", stage="json_encode"):
+                return super().dumps(obj, **kwargs)
+
+    app.json = TimedJSONProvider(app)
+
+    @app.before_request
+    def _start_request_timer():
+        g.request_started = time.perf_counter()
+        if PROFILING_ENABLED and request.args.get('profile') == '1':
+            g.profiler = SamplingProfiler(threading.get_ident()).start()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop('request_started', None)
+        if started is not None and registry.enabled:
+            route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+            # Streamed bodies are produced after this point; this times the handler only
+            registry.observe("request_seconds", time.perf_counter() - started,
+                             route=route, method=request.method, status=str(response.status_code))
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            response.get_data()  # include lazily produced bodies in the profile
+            profiler.stop()
+            return Response(profiler.report(), mimetype="text/plain")
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    def prometheus_metrics():
+        return Response(registry.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+    @app.route('/metrics/summary', methods=['GET'])
+    def metrics_summary():
+        return jsonify({"status": "success", "enabled": registry.enabled,
+                        "profiling_enabled": PROFILING_ENABLED, **registry.summary()})
+
+    return app
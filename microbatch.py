@@ -0,0 +1,106 @@
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from metrics import METRICS
+
+# Request micro-batching: concurrent single-message calls are queued and
+# handed to one batch function (e.g. analyze_risk_batch, one predict_proba per
+# batch) on a dedicated thread, and each caller gets its own result back
+# through a Future. Works for blocking callers (Flask threads) and asyncio
+# callers (the ASGI entrypoint) alike.
+
+MAX_BATCH_SIZE = int(os.environ.get('MICROBATCH_MAX_SIZE', 64))
+MAX_WAIT = float(os.environ.get('MICROBATCH_MAX_WAIT_MS', 2)) / 1000
+
+
+class MicroBatcher:
+    """
+    Collects items until `max_batch_size` are queued or `max_wait` seconds
+    have passed since the first one, then calls fn(items), which must return
+    one result per item in order. With max_wait=0 a batch is whatever queued
+    up while the previous batch ran.
+    """
+
+    def __init__(self, fn, max_batch_size=MAX_BATCH_SIZE, max_wait=MAX_WAIT, name="microbatch"):
+        self.fn = fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self.name = name
+        self._pid = None
+        self._queue = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.largest = 0
+
+    def _ensure_thread(self):
+        # Started lazily so forked workers each get their own batcher thread
+        if self._thread is None or self._pid != os.getpid():
+            with self._start_lock:
+                if self._thread is None or self._pid != os.getpid():
+                    self._queue = queue.SimpleQueue()
+                    self._pid = os.getpid()
+                    self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                    self._thread.start()
+
+    def submit(self, item):
+        """Queues one item; returns a Future of its result."""
+        self._ensure_thread()
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def __call__(self, item, timeout=None):
+        """Blocking single-item call, batched with whatever else is in flight."""
+        return self.submit(item).result(timeout)
+
+    async def run(self, item):
+        """Awaitable single-item call for asyncio servers."""
+        return await asyncio.wrap_future(self.submit(item))
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = [entry for entry in self._collect() if entry[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            started = time.perf_counter()
+            try:
+                results = self.fn([item for item, _, _ in batch])
+            except BaseException as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future, _), result in zip(batch, results):
+                    future.set_result(result)
+            self.batches += 1
+            self.items += len(batch)
+            self.largest = max(self.largest, len(batch))
+            METRICS.observe("microbatch_queue_seconds", started - batch[0][2], batcher=self.name)
+            METRICS.observe("microbatch_run_seconds", time.perf_counter() - started, batcher=self.name)
+            METRICS.count("microbatch_items_total", len(batch), batcher=self.name)
+
+    def stats(self):
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else None,
+            "largest_batch": self.largest,
+        }
@@ -0,0 +1,142 @@
+import os
+import threading
+from contextlib import contextmanager
+
+import joblib
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.naive_bayes import MultinomialNB
+
+try:
+    import fcntl
+except ImportError:  # Windows: start.bat runs a single dev-server process
+    fcntl = None
+
+# Online-learning text model: hashed word 1-2 gram features and a MultinomialNB
+# updated with partial_fit. Hashing is stateless (there is no vocabulary or IDF
+# to refit), so absorbing a labelled mini-batch only adds to the NB counts.
+# Every update is published as a new numbered version file and the CURRENT
+# pointer is swapped with os.replace; API workers poll the pointer and load the
+# new version memory-mapped, in-flight requests finishing on the old one.
+
+ONLINE_MODEL_DIR = os.environ.get('ONLINE_MODEL_DIR', 'forensic_ai_model_online')
+N_FEATURES = 2 ** 18
+CLASSES = np.array(["HIGH", "LOW", "MEDIUM"], dtype=object)
+KEEP_VERSIONS = int(os.environ.get('ONLINE_MODEL_KEEP_VERSIONS', 5))
+CURRENT = "CURRENT"
+
+_update_lock = threading.Lock()
+
+
+class OnlineTextModel:
+    """Drop-in for the pipeline's predict/predict_proba that can also learn from new batches."""
+
+    def __init__(self, n_features=N_FEATURES, alpha=1.0):
+        self.vectorizer = HashingVectorizer(ngram_range=(1, 2), n_features=n_features,
+                                            alternate_sign=False, norm='l2')
+        self.clf = MultinomialNB(alpha=alpha)
+        self.version = 0
+        self.trained = 0  # labelled messages absorbed over all versions
+        self.weights = None  # (n_features, n_classes) contiguous copy of the NB log-probabilities
+
+    @property
+    def classes_(self):
+        return self.clf.classes_
+
+    def transform(self, texts):
+        return self.vectorizer.transform(texts)
+
+    def predict_proba_features(self, X):
+        """Class probabilities for an already hashed feature matrix (as CompactTextModel, without sklearn's checks)."""
+        jll = np.asarray(X @ self.weights) + self.clf.class_log_prior_
+        jll -= jll.max(axis=1, keepdims=True)
+        probs = np.exp(jll)
+        return probs / probs.sum(axis=1, keepdims=True)
+
+    def predict_proba(self, texts):
+        return self.predict_proba_features(self.transform(texts))
+
+    def predict(self, texts):
+        return self.classes_[self.predict_proba(texts).argmax(axis=1)]
+
+    def partial_fit(self, texts, labels):
+        """Adds a mini-batch of (text, "HIGH"|"MEDIUM"|"LOW") examples to the model."""
+        first = not hasattr(self.clf, "classes_")
+        self.clf.partial_fit(self.transform(texts), labels, classes=CLASSES if first else None)
+        self.weights = np.ascontiguousarray(self.clf.feature_log_prob_.T)
+        self.trained += len(texts)
+        return self
+
+
+# --- Versioned Storage ---
+
+def version_path(directory, version):
+    return os.path.join(directory, f"model-{version:06d}.joblib")
+
+
+def current_version(directory=ONLINE_MODEL_DIR):
+    """Published version number, or None when no online model exists."""
+    try:
+        with open(os.path.join(directory, CURRENT)) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def load_online_model(path, writable=False):
+    """Loads a published version; read-only loads map the arrays so workers share them."""
+    return joblib.load(path, mmap_mode=None if writable else 'r')
+
+
+@contextmanager
+def _locked(directory):
+    """Serializes updates across threads and, where flock exists, across worker processes."""
+    os.makedirs(directory, exist_ok=True)
+    with _update_lock, open(os.path.join(directory, ".lock"), "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _publish(model, directory):
+    model.version = (current_version(directory) or 0) + 1
+    path = version_path(directory, model.version)
+    tmp = os.path.join(directory, f".model-{model.version:06d}.tmp")
+    joblib.dump(model, tmp)
+    os.replace(tmp, path)
+    tmp = os.path.join(directory, f".{CURRENT}.tmp")
+    with open(tmp, "w") as f:
+        f.write(str(model.version))
+    os.replace(tmp, os.path.join(directory, CURRENT))
+    # Workers still serving an older version keep their mapping of it
+    for old in range(model.version - KEEP_VERSIONS, 0, -1):
+        try:
+            os.remove(version_path(directory, old))
+        except FileNotFoundError:
+            break
+        except OSError:
+            pass
+    return path
+
+
+def train_online(texts, labels, directory=ONLINE_MODEL_DIR, bootstrap=None):
+    """
+    Absorbs labelled messages into the current published model and publishes
+    the result as the next version. The first version starts from `bootstrap`
+    ((text, label) pairs), when given. Returns (model, path).
+    """
+    with _locked(directory):
+        version = current_version(directory)
+        if version is None:
+            model = OnlineTextModel()
+            if bootstrap:
+                model.partial_fit([text for text, _ in bootstrap], [label for _, label in bootstrap])
+        else:
+            model = load_online_model(version_path(directory, version), writable=True)
+        if texts:
+            model.partial_fit(texts, labels)
+        return model, _publish(model, directory)
@@ -0,0 +1,89 @@
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+
+# Rough per-entry bookkeeping cost (OrderedDict node + tuple) added to the payload size
+ENTRY_OVERHEAD = 200
+
+
+def content_key(content, namespace=""):
+    """SHA-256 of the normalized message content (lowercased, trimmed), scoped by rule set."""
+    normalized = f"{namespace}\0{str(content).strip().lower()}"
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+class RiskCache:
+    """
+    Bounded LRU cache of (score, level, findings) verdicts.
+    Evicts least recently used entries once either the entry count or the
+    estimated memory footprint exceeds its limit. Thread-safe.
+    """
+
+    def __init__(self, max_entries=100_000, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _size(key, value):
+        score, level, findings = value
+        return (ENTRY_OVERHEAD + sys.getsizeof(key) + sys.getsizeof(score) + sys.getsizeof(level)
+                + sys.getsizeof(findings) + sum(sys.getsizeof(f) for f in findings))
+
+    def get(self, key):
+        """Returns a copy of the cached verdict, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        value, _ = entry
+        return value[0], value[1], list(value[2])
+
+    def put(self, key, value):
+        score, level, findings = value
+        value = (score, level, tuple(findings))
+        size = self._size(key, value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        """Drops every entry, e.g. after the model producing the verdicts changed."""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
@@ -0,0 +1,110 @@
+from collections import Counter
+from datetime import datetime, timedelta
+
+# Materialized case rollups: record counts per (kind, dimension, bucket),
+# e.g. ("call", "day", "2024-01-05") or ("sms", "risk", "high"). They are
+# updated in the same transaction as every evidence insert, so totals, time
+# series and breakdowns are read from a few index rows instead of being
+# recounted from the evidence tables. Buckets are text; time buckets sort
+# chronologically ("YYYY-MM-DD", "YYYY-MM-DD HH:00", hour of day "00".."23").
+
+EPOCH = datetime(1970, 1, 1)
+TOTAL = "all"  # bucket of the "total" dimension
+UNSET = "none"  # bucket for a missing type/risk value
+
+# Evidence kind -> {dimension: record field} of the categorical rollups
+CATEGORIES = {
+    "call": {"type": "type"},
+    "sms": {"risk": "risk"},
+    "alert": {"type": "type"},
+}
+TIME_DIMENSIONS = ("day", "hour", "hour_of_day")
+# strftime formats of the time buckets (Python and SQLite agree on these)
+TIME_FORMATS = {"day": "%Y-%m-%d", "hour": "%Y-%m-%d %H:00", "hour_of_day": "%H"}
+
+ROLLUPS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollups (
+    kind TEXT NOT NULL,
+    dimension TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    records INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (kind, dimension, bucket)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollup_kinds (
+    kind TEXT PRIMARY KEY
+);
+"""
+
+
+def _hour_buckets(hour_ts):
+    """Time buckets of an epoch hour (seconds, a multiple of 3600)."""
+    return {dimension: time_bucket(hour_ts, dimension) for dimension in TIME_FORMATS}
+
+
+def time_bucket(ts, dimension):
+    """Bucket of epoch seconds `ts` in a time dimension."""
+    return (EPOCH + timedelta(seconds=ts)).strftime(TIME_FORMATS[dimension])
+
+
+def _bucket_value(value):
+    return UNSET if value is None or value == "" else str(value)
+
+
+def record_rollups(conn, kind, records):
+    """Adds records about to be inserted ((ts, record) pairs) to the rollups of their kind."""
+    deltas = Counter()
+    hours = {}
+    for ts, record in records:
+        deltas[("total", TOTAL)] += 1
+        if ts is not None:
+            hour = ts - ts % 3600
+            buckets = hours.get(hour)
+            if buckets is None:
+                buckets = hours[hour] = _hour_buckets(hour)
+            for dimension, bucket in buckets.items():
+                deltas[(dimension, bucket)] += 1
+        for dimension, field in CATEGORIES.get(kind, {}).items():
+            deltas[(dimension, _bucket_value(record.get(field)))] += 1
+    conn.executemany(
+        "INSERT INTO rollups (kind, dimension, bucket, records) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT (kind, dimension, bucket) DO UPDATE SET records = records + excluded.records",
+        [(kind, dimension, bucket, n) for (dimension, bucket), n in deltas.items()]
+    )
+
+
+def backfill(conn, tables):
+    """Builds the rollups of every kind not rolled up yet from its table, with one GROUP BY per dimension."""
+    done = {row[0] for row in conn.execute("SELECT kind FROM rollup_kinds")}
+    for kind, (table, _) in tables.items():
+        if kind in done:
+            continue
+        conn.execute("DELETE FROM rollups WHERE kind = ?", (kind,))
+        conn.execute(
+            f"INSERT INTO rollups (kind, dimension, bucket, records) SELECT ?, 'total', ?, COUNT(*) FROM {table}",
+            (kind, TOTAL)
+        )
+        for dimension, fmt in TIME_FORMATS.items():
+            conn.execute(
+                f"INSERT INTO rollups (kind, dimension, bucket, records) "
+                f"SELECT ?, ?, strftime(?, ts, 'unixepoch') AS bucket, COUNT(*) FROM {table} "
+                f"WHERE ts IS NOT NULL GROUP BY bucket", (kind, dimension, fmt)
+            )
+        for dimension, field in CATEGORIES.get(kind, {}).items():
+            conn.execute(
+                f"INSERT INTO rollups (kind, dimension, bucket, records) "
+                f"SELECT ?, ?, CASE WHEN \"{field}\" IS NULL OR \"{field}\" = '' THEN ? ELSE CAST(\"{field}\" AS TEXT) END "
+                f"AS bucket, COUNT(*) FROM {table} GROUP BY bucket", (kind, dimension, UNSET)
+            )
+        conn.execute("INSERT INTO rollup_kinds (kind) VALUES (?)", (kind,))
+
+
+def read(conn, kind, dimension, first=None, last=None):
+    """{bucket: records} of one rollup, in bucket order; `first`/`last` bound the buckets (inclusive)."""
+    sql, params = "SELECT bucket, records FROM rollups WHERE kind = ? AND dimension = ?", [kind, dimension]
+    if first is not None:
+        sql += " AND bucket >= ?"
+        params.append(first)
+    if last is not None:
+        sql += " AND bucket <= ?"
+        params.append(last)
+    return dict(conn.execute(sql + " ORDER BY bucket", params).fetchall())
@@ -0,0 +1,464 @@
+import re
+import threading
+import time
+from bisect import bisect_right
+from itertools import accumulate
+
+import numpy as np
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+# Declarative detection rules, compiled once at import into one RuleSet per
+# rule family. A batch scan merges every independent rule of a set into one
+# alternation and runs it once over the whole batch (case-insensitive sets on
+# the lowercased text), so each message is read once whatever the number of
+# rules. Per message, each rule is compiled to the cheapest test that is exact
+# for it: literal keywords become substring checks and everything else a
+# precompiled regex search. Rules that depend on another rule are only tested
+# where that rule fired. The same compiled set serves the pandas batch paths
+# (scan) and the per-message paths (match); `benchmark.py --suites rules`
+# reports the cost per message.
+
+
+# Timings key of RuleSet.scan's shared pass over the rules without `requires`
+JOINED_PASS = "joined_pass"
+
+
+def _add_time(timings, key, started):
+    timings[key] = timings.get(key, 0.0) + time.perf_counter() - started
+
+
+class Rule:
+    """
+    A detection rule: `pattern` is a regex, `weight` the risk points it adds
+    and `message` the finding text, a str.format template that may use
+    {count} (number of non-overlapping matches, for `counted` rules), {sender}
+    and {snippet} (first 30 characters of the message). A rule with `requires`
+    only fires when the named (earlier) rule fired on the same message.
+    """
+
+    __slots__ = ("name", "pattern", "weight", "category", "message", "requires", "counted", "regex", "literal",
+                 "folded")
+
+    def __init__(self, name, pattern, weight, category, message, requires=None, counted=False):
+        self.name = name
+        self.pattern = pattern
+        self.weight = weight
+        self.category = category
+        self.message = message
+        self.requires = requires
+        self.counted = counted
+        self.regex = None    # set when compiled into a RuleSet
+        self.literal = None  # plain substring equivalent of the pattern, when there is one
+        self.folded = None   # case-sensitive regex for lowercased text (case-insensitive sets only)
+
+    def describe(self, count=1, sender=None, snippet=""):
+        return self.message.format(count=count, sender=sender, snippet=snippet)
+
+
+def _literal(pattern, flags):
+    """
+    The plain string a pattern matches exactly, or None when it uses regex
+    syntax. Case-insensitive patterns give their lowercase form, to be found
+    in the lowercased text (see RuleSet.fold).
+    """
+    text = re.sub(r"\\(.)", r"\1", pattern)
+    if re.escape(text) != pattern:
+        return None
+    if flags & re.IGNORECASE:
+        return text.lower() if text.isascii() else None
+    return text
+
+
+def _folded(pattern, flags):
+    """
+    A case-sensitive compile of a case-insensitive pattern that matches
+    lowercased ASCII text exactly as the original matches the text, or None
+    when the pattern has uppercase letters, character codes or inline flags.
+    """
+    if not flags & re.IGNORECASE or re.search(r"\\[xuUN0]|\(\?[aiLmsux-]", pattern):
+        return None
+    if any(c.isupper() for c in re.sub(r"\\.", "", pattern)):
+        return None
+    return re.compile(pattern, flags & ~re.IGNORECASE)
+
+
+# Constructs that can match differently once a message is followed by the rest
+# of the batch: anchors, negative lookarounds, atomic groups and backreferences
+_ZERO_WIDTH = {sre_parse.AT_BOUNDARY, sre_parse.AT_NON_BOUNDARY}
+_UNSEPARABLE = {sre_parse.ASSERT_NOT, sre_parse.GROUPREF, sre_parse.GROUPREF_EXISTS,
+                getattr(sre_parse, "ATOMIC_GROUP", None), getattr(sre_parse, "POSSESSIVE_REPEAT", None)}
+_CLASS_CATEGORIES = {
+    sre_parse.CATEGORY_DIGIT: r"\d", sre_parse.CATEGORY_NOT_DIGIT: r"\D",
+    sre_parse.CATEGORY_WORD: r"\w", sre_parse.CATEGORY_NOT_WORD: r"\W",
+    sre_parse.CATEGORY_SPACE: r"\s", sre_parse.CATEGORY_NOT_SPACE: r"\S",
+}
+
+
+def _separable(items):
+    """Whether a parsed pattern matches a message the same way inside a longer string (no anchors etc.)."""
+    for op, av in items:
+        if op in _UNSEPARABLE or (op == sre_parse.AT and av not in _ZERO_WIDTH):
+            return False
+        if op == sre_parse.BRANCH:
+            nested = av[1]
+        elif op == sre_parse.SUBPATTERN:
+            nested = [av[3]]
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            nested = [av[2]]
+        elif op == sre_parse.ASSERT:
+            nested = [av[1]]
+        else:
+            nested = []
+        if not all(_separable(sub) for sub in nested):
+            return False
+    return True
+
+
+def _first_chars(items):
+    """
+    (character class fragments a parsed pattern can start with, whether it can
+    match the empty string), or (None, _) when the first characters are unknown.
+    """
+    chars = set()
+    for op, av in items:
+        if op in (sre_parse.AT, sre_parse.ASSERT):
+            continue
+        if op == sre_parse.LITERAL:
+            return chars | {re.escape(chr(av))}, False
+        if op == sre_parse.IN:
+            for item, value in av:
+                if item == sre_parse.LITERAL:
+                    chars.add(re.escape(chr(value)))
+                elif item == sre_parse.RANGE:
+                    chars.add(f"{re.escape(chr(value[0]))}-{re.escape(chr(value[1]))}")
+                elif item == sre_parse.CATEGORY and value in _CLASS_CATEGORIES:
+                    chars.add(_CLASS_CATEGORIES[value])
+                else:
+                    return None, False
+            return chars, False
+        if op == sre_parse.BRANCH:
+            branches = [_first_chars(branch) for branch in av[1]]
+            nullable = False
+        elif op == sre_parse.SUBPATTERN and not (av[1] or av[2]):
+            branches = [_first_chars(av[3])]
+            nullable = False
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            branches = [_first_chars(av[2])]
+            nullable = av[0] == 0
+        else:
+            return None, False
+        if any(found is None for found, _ in branches):
+            return None, False
+        for found, _ in branches:
+            chars |= found
+        if not (nullable or any(empty for _, empty in branches)):
+            return chars, False
+    return chars, True
+
+
+class _Alternation:
+    """
+    Patterns merged into one regex that is run once over a batch of messages
+    joined into one string. Every position where some pattern matches is
+    visited, in order, and there each pattern not yet found in that message is
+    tried on the message alone, so results are exactly those of testing each
+    pattern on each message.
+    """
+
+    def __init__(self, columns, patterns, flags):
+        self.columns = list(columns)
+        self.patterns = [re.compile(pattern, flags) for pattern in patterns]
+        self._first = []  # per pattern: regex for its possible first character, None if unknown
+        for compiled in self.patterns:
+            found, empty = _first_chars(sre_parse.parse(compiled.pattern, flags))
+            self._first.append(None if found is None or empty else re.compile(f"[{''.join(sorted(found))}]", flags))
+        self._candidates = {}  # first character at a match -> patterns that can start with it
+        # A leading class lets the engine skip ahead to the characters a rule can start with
+        known = None not in self._first
+        prefilter = f"(?=[{''.join(first.pattern[1:-1] for first in self._first)}])" if known else ""
+        # Non-capturing: group captures would slow every attempt down
+        alternatives = "|".join(f"(?:{compiled.pattern})" for compiled in self.patterns)
+        self.regex = re.compile(f"{prefilter}(?:{alternatives})", flags)
+
+    @classmethod
+    def build(cls, columns, patterns, flags):
+        """The alternation, or None when a pattern cannot be tested inside a joined batch."""
+        for pattern in patterns:
+            try:
+                parsed = sre_parse.parse(pattern, flags)
+            except re.error:
+                return None
+            if parsed.state.flags & ~(flags | re.UNICODE) or not _separable(parsed):
+                return None
+        return cls(columns, patterns, flags)
+
+    def _starting_with(self, char):
+        candidates = self._candidates.get(char)
+        if candidates is None:
+            candidates = self._candidates[char] = [
+                i for i, first in enumerate(self._first) if first is None or not char or first.match(char)]
+        return candidates
+
+    def scan(self, texts):
+        """(rows, columns) of every pattern match in a list of messages."""
+        starts = list(accumulate((len(text) + 1 for text in texts), initial=0))  # last one: end sentinel
+        joined = "\n".join(texts)
+        found_rows, found_columns = [], []
+        search, patterns, columns, total = self.regex.search, self.patterns, self.columns, len(self.patterns)
+        row, pos = -1, 0
+        while True:
+            m = search(joined, pos)
+            if m is None:
+                break
+            at = m.start()
+            if row < 0 or at >= starts[row + 1]:
+                row, fired = bisect_right(starts, at) - 1, set()
+            text, local = texts[row], at - starts[row]
+            for i in self._starting_with(text[local:local + 1]):
+                if i not in fired and patterns[i].match(text, local) is not None:
+                    fired.add(i)
+                    found_rows.append(row)
+                    found_columns.append(columns[i])
+            # Nothing left to find in this message: resume at the next one
+            pos = starts[row + 1] if len(fired) == total else at + 1
+        return found_rows, found_columns
+
+
+class RuleSet:
+    """
+    Rules compiled into one matcher, with a per-rule hit counter (messages a
+    rule fired on since start-up or reset(), across all callers of the set).
+    A case-insensitive set lowercases each ASCII message once and tests its
+    literal and lowercase-only rules on that case-sensitively; IGNORECASE
+    folds more than str.lower does, so other messages keep the regexes.
+    scan() tests the rules without `requires` with one _Alternation pass per
+    batch (a set whose patterns cannot be joined that way is scanned rule by
+    rule instead); match() keeps the per-rule tests, which beat an alternation
+    search on a single message.
+    """
+
+    def __init__(self, name, rules, flags=0):
+        self.name = name
+        self.rules = list(rules)
+        self.index = {}
+        for i, rule in enumerate(self.rules):
+            if rule.name in self.index:
+                raise ValueError(f"Duplicate rule '{rule.name}' in rule set '{name}'")
+            if rule.requires is not None and rule.requires not in self.index:
+                raise ValueError(f"Rule '{rule.name}' requires '{rule.requires}', which must come before it")
+            rule.regex = re.compile(rule.pattern, flags)
+            rule.literal = _literal(rule.pattern, flags)
+            rule.folded = _folded(rule.pattern, flags) if rule.literal is None else None
+            self.index[rule.name] = i
+        self.fold = bool(flags & re.IGNORECASE)
+        independent = [i for i, rule in enumerate(self.rules) if rule.requires is None]
+        # Lowercased (or, for a case-sensitive set, original) messages, and for a
+        # case-insensitive set the messages that cannot be lowercased safely
+        self._alternation = _Alternation.build(independent, [self._lowered_pattern(self.rules[i], flags)
+                                                             for i in independent], flags & ~re.IGNORECASE)
+        self._raw_alternation = _Alternation.build(independent, [self.rules[i].pattern for i in independent],
+                                                   flags) if self.fold else None
+        self.weights = np.array([rule.weight for rule in self.rules], dtype=np.int64)
+        self.hits = [0] * len(self.rules)
+        self._lock = threading.Lock()
+
+    def __iter__(self):
+        return iter(self.rules)
+
+    def __getitem__(self, name):
+        return self.rules[self.index[name]]
+
+    # --- Matching ---
+
+    @staticmethod
+    def _lowered_pattern(rule, flags):
+        """Pattern of a rule for the text _lower() returns, as a case-sensitive regex."""
+        if not flags & re.IGNORECASE:
+            return rule.pattern
+        if rule.literal is not None:
+            return re.escape(rule.literal)
+        if rule.folded is not None:
+            return rule.folded.pattern
+        return f"(?i:{rule.pattern})"
+
+    def _lower(self, text):
+        """The text the literal and folded tests run on: lowercased for a case-insensitive set, None if unsafe."""
+        if not self.fold:
+            return text
+        return text.lower() if text.isascii() else None
+
+    def _test(self, rule, rows, texts, lowered):
+        """Rows (of `rows`) that `rule` fires on, testing it alone."""
+        search = rule.regex.search
+        if rule.literal is not None:
+            literal = rule.literal
+            return [row for row in rows if (literal in lowered[row] if lowered[row] is not None
+                                             else search(texts[row]) is not None)]
+        if rule.folded is not None:
+            folded = rule.folded.search
+            return [row for row in rows if (folded(lowered[row]) if lowered[row] is not None
+                                             else search(texts[row])) is not None]
+        return [row for row in rows if search(texts[row]) is not None]
+
+    @staticmethod
+    def _mark(hits, alternation, rows, texts):
+        """Sets the hits of an _Alternation pass over `texts[rows]`."""
+        if rows:
+            found, columns = alternation.scan([texts[row] for row in rows])
+            hits[np.asarray(rows, dtype=np.int64)[found], columns] = True
+
+    def scan(self, texts, timings=None):
+        """
+        Matches a batch of messages (any iterable, non-strings never match):
+        the rules without `requires` in one pass over the whole batch, then each
+        dependent rule on the messages its required rule fired on. Returns
+        (hits, counts): a boolean matrix with one row per message and one column
+        per rule, and {rule name: int64 array of match counts} for the counted
+        rules (0 where the rule did not fire). With a `timings` dict, seconds
+        are added to it per rule category, the shared pass under JOINED_PASS.
+        """
+        texts = [text if isinstance(text, str) else None for text in texts]
+        lowered = [None if text is None else self._lower(text) for text in texts] if self.fold else texts
+        n = len(texts)
+        hits = np.zeros((n, len(self.rules)), dtype=bool)
+        counts = {}
+        one_pass = self._alternation is not None and (not self.fold or self._raw_alternation is not None)
+        if one_pass:
+            started = time.perf_counter()
+            self._mark(hits, self._alternation, [row for row in range(n) if lowered[row] is not None], lowered)
+            if self.fold:
+                self._mark(hits, self._raw_alternation,
+                           [row for row in range(n) if texts[row] is not None and lowered[row] is None], texts)
+            if timings is not None:
+                _add_time(timings, JOINED_PASS, started)
+        for column, rule in enumerate(self.rules):
+            started = time.perf_counter()
+            if rule.requires is not None:
+                fired = self._test(rule, np.flatnonzero(hits[:, self.index[rule.requires]]).tolist(), texts, lowered)
+                hits[fired, column] = True
+            elif one_pass:
+                fired = np.flatnonzero(hits[:, column]).tolist()
+            else:
+                fired = self._test(rule, [row for row, text in enumerate(texts) if text is not None], texts, lowered)
+                hits[fired, column] = True
+            if rule.counted:
+                found = np.zeros(n, dtype=np.int64)
+                findall = rule.regex.findall
+                found[fired] = [len(findall(texts[row])) for row in fired]
+                counts[rule.name] = found
+            if timings is not None:
+                _add_time(timings, rule.category, started)
+        self._record(enumerate(hits.sum(axis=0).tolist()))
+        return hits, counts
+
+    def match(self, text, timings=None):
+        """
+        (rule, match count) for every rule firing on one message, in rule order.
+        With a `timings` dict, the seconds spent on each rule are added to it
+        under the rule's category.
+        """
+        if not isinstance(text, str):
+            return []
+        lowered = self._lower(text)
+        found, fired = [], set()
+        for i, rule in enumerate(self.rules):
+            if rule.requires is not None and rule.requires not in fired:
+                continue
+            if timings is not None:
+                started = time.perf_counter()
+            if lowered is not None and rule.literal is not None:
+                hit = rule.literal in lowered
+            elif lowered is not None and rule.folded is not None:
+                hit = rule.folded.search(lowered) is not None
+            else:
+                hit = rule.regex.search(text) is not None
+            if hit:
+                fired.add(rule.name)
+                found.append((i, rule, len(rule.regex.findall(text)) if rule.counted else 1))
+            if timings is not None:
+                _add_time(timings, rule.category, started)
+        if found:
+            self._record((i, 1) for i, _, _ in found)
+        return [(rule, count) for _, rule, count in found]
+
+    def score(self, hits):
+        """Risk points per message of a scan() hit matrix."""
+        return hits.astype(np.int64) @ self.weights
+
+    # --- Hit Counters ---
+
+    def _record(self, increments):
+        with self._lock:
+            for i, amount in increments:
+                self.hits[i] += amount
+
+    def stats(self):
+        with self._lock:
+            hits = list(self.hits)
+        return [{"rule": rule.name, "category": rule.category, "weight": rule.weight, "hits": n}
+                for rule, n in zip(self.rules, hits)]
+
+    def reset(self):
+        with self._lock:
+            self.hits = [0] * len(self.rules)
+
+
+def keyword_rules(keywords, weight, category, message):
+    """One rule per literal keyword, named after it; `message` may use {keyword}."""
+    return [Rule(keyword, re.escape(keyword), weight, category, message.replace("{keyword}", keyword))
+            for keyword in keywords]
+
+
+# --- Shared Patterns ---
+URL_PATTERN = r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\(\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
+SHORTENER_PATTERN = r'(?:bit\.ly|t\.co|goo\.gl|tinyurl\.com)'
+PAYLOAD_PATTERN = r'\.(?:apk|exe|bat|sh|php|js|zip|scr)'
+# \b(?:\d{1,3}\.){3}\d{1,3}\b, written to start with \d so the engine can skip ahead to digits
+IP_PATTERN = r'\d(?<=\b\d)\d{0,2}\.(?:\d{1,3}\.){2}\d{1,3}\b'
+
+# --- Case Analysis (ForensicAnalyzer, streaming and live detection) ---
+# Keywords for phishing/spam
+SUSPICIOUS_KEYWORDS = ["click here", "urgent", "verify", "free", "reward", "lottery", "winner", "bank", "alert"]
+
+MALWARE_RULES = RuleSet("malware_indicators", [
+    *keyword_rules(SUSPICIOUS_KEYWORDS, 20, "phishing",
+                   "Suspicious keyword '{keyword}' found in SMS from {sender}: '{snippet}...'"),
+    # Short URLs and non-HTTPS
+    Rule("link", r"(?:http://|bit\.ly|tinyurl\.com|goo\.gl)", 25, "link",
+         "Unsafe or short link detected in SMS from {sender}"),
+    # APK/EXE/ZIP references
+    Rule("file", r"\.(?:apk|exe|zip|rar)", 40, "payload",
+         "Potential malware file reference detected in SMS from {sender}"),
+], flags=re.IGNORECASE)
+
+# --- Message Scoring API (lowercased content) ---
+URGENCY_KEYWORDS = ["urgent", "action required", "verify", "suspended", "security alert", "help desk"]
+FINANCIAL_KEYWORDS = ["bank", "login", "password", "crypto", "wallet", "invoice", "payment", "amazon", "paypal"]
+
+MESSAGE_RULES = RuleSet("message", [
+    # 1. Phishing & Urgency Patterns
+    *keyword_rules(URGENCY_KEYWORDS, 15, "urgency", "Urgency keyword: {keyword}"),
+    # 2. Financial / Sensitive Target Patterns
+    *keyword_rules(FINANCIAL_KEYWORDS, 10, "financial", "Sensitive target: {keyword}"),
+    # 3. Malicious Link Detection
+    Rule("url", URL_PATTERN, 25, "link", "Link detected: {count} URLs", counted=True),
+    Rule("shortener", SHORTENER_PATTERN, 20, "link", "URL shortener detected (High risk)", requires="url"),
+    # 4. File Extension / Payload Patterns
+    Rule("payload", PAYLOAD_PATTERN, 50, "payload", "Potential malware payload file reference"),
+    # 5. Data Exfiltration / IP Patterns
+    Rule("ip", IP_PATTERN, 30, "exfiltration", "IP Address detected (Potential C2 communications)"),
+])
+
+# --- Hybrid AI Scoring Safety Net (lowercased content) ---
+SAFETY_NET_RULES = RuleSet("safety_net", [
+    Rule("url", URL_PATTERN, 25, "link", "Link detected: {count} URL(s)", counted=True),
+    Rule("shortener", SHORTENER_PATTERN, 20, "link", "Suspicious URL shortener used", requires="url"),
+    Rule("payload", PAYLOAD_PATTERN, 50, "payload", "Potential malware payload reference found"),
+    Rule("ip", IP_PATTERN, 30, "exfiltration", "IP Address detected (Possible C2 server)"),
+])
+
+RULE_SETS = {rule_set.name: rule_set for rule_set in (MALWARE_RULES, MESSAGE_RULES, SAFETY_NET_RULES)}
@@ -0,0 +1,55 @@
+import json
+import time
+import zlib
+
+from flask import Response, stream_with_context
+
+from metrics import METRICS
+
+# Flush the stream roughly every 64 KB of encoded records
+FLUSH_BYTES = 64 * 1024
+
+
+def wants_ndjson(request):
+    return request.args.get('format', 'json').lower() == 'ndjson'
+
+
+def wants_gzip(request):
+    """gzip is opt-in (?gzip=1) and only used when the client accepts it."""
+    return (request.args.get('gzip', '').lower() in ('1', 'true')
+            and 'gzip' in request.headers.get('Accept-Encoding', ''))
+
+
+def ndjson_response(records, compress=False):
+    """
+    Streams an iterable of records as newline-delimited JSON, optionally gzip
+    compressed on the fly, so nothing is materialized before the first byte.
+    """
+    def generate():
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+        buffer, size = [], 0
+        encoding = 0.0  # encode time of the buffered records, reported per flush
+        for record in records:
+            started = time.perf_counter()
+            line = json.dumps(record, default=str) + "\n"
+            encoding += time.perf_counter() - started
+            buffer.append(line)
+            size += len(line)
+            if size >= FLUSH_BYTES:
+                METRICS.observe("stage_seconds", encoding, stage="ndjson_encode")
+                encoding = 0.0
+                chunk = "".join(buffer).encode()
+                buffer, size = [], 0
+                if compressor:
+                    chunk = compressor.compress(chunk)
+                if chunk:
+                    yield chunk
+        METRICS.observe("stage_seconds", encoding, stage="ndjson_encode")
+        chunk = "".join(buffer).encode()
+        if compressor:
+            chunk = compressor.compress(chunk) + compressor.flush()
+        if chunk:
+            yield chunk
+
+    headers = {"Content-Encoding": "gzip", "Vary": "Accept-Encoding"} if compress else {}
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson", headers=headers)
@@ -0,0 +1,169 @@
+import argparse
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# --- Message Templates ---
+HAM_TEMPLATES = [
+    "Hey how are you?",
+    "Call me back",
+    "Meeting at 3pm today in the conference room.",
+    "Your appointment is confirmed for tomorrow.",
+    "Running late, be there in 10",
+    "Your verification code is {n}. Do not share it.",
+    "Dinner tonight?",
+    "Happy birthday! Hope you have a great day",
+]
+SPAM_TEMPLATES = [
+    "URGENT! Verify your bank account now at http://bit.ly/{n}",
+    "Congratulations winner! Claim your free reward: http://tinyurl.com/{n}",
+    "Download this free game.apk now! Code {n}",
+    "Security alert: your account is suspended. Click here http://goo.gl/{n}",
+    "You won the lottery! Send fee to claim prize ref {n}",
+    "Invoice {n} attached: invoice.pdf.exe",
+    "Package delivery failed. Track at http://delivery-post.com/track/{n}",
+    "Login from new device. Verify at http://192.168.{n}.1/login",
+]
+CALL_TYPES = np.array(['Incoming', 'Outgoing', 'Missed'])
+
+
+def generate_case(n_calls=10_000, n_sms=10_000, spam_ratio=0.1, burst_ratio=0.05, duplicate_rate=0.01,
+                  null_rate=0.01, future_rate=0.001, n_contacts=500, days=30, seed=0, end=None):
+    """
+    Synthetic case in the ForensicAnalyzer schema, returned as (calls_df, sms_df).
+
+    - spam_ratio: share of SMS built from phishing/malware templates
+    - burst_ratio: share of calls emitted in bursts of 12-30 calls within an hour from one caller
+    - duplicate_rate: share of call rows that are exact copies of other rows
+    - null_rate: share of SMS rows with a missing sender or content
+    - future_rate: share of calls timestamped after `end` (default: now)
+    """
+    rng = np.random.default_rng(seed)
+    end = end or datetime.now()
+    span = days * 86400
+    start = np.datetime64(end - timedelta(days=days), 's')
+    contacts = np.array([f"+1555{n:07d}" for n in rng.choice(10_000_000, n_contacts, replace=False)])
+
+    # Calls: background traffic, then bursts
+    n_burst = int(n_calls * burst_ratio)
+    n_plain = n_calls - n_burst
+    offsets = rng.integers(0, span, n_plain)
+    callers = rng.integers(0, n_contacts, n_plain)
+    types = rng.choice(3, n_plain, p=[0.5, 0.35, 0.15])
+
+    burst_offsets, burst_callers = [], []
+    remaining = n_burst
+    while remaining > 0:
+        size = min(remaining, int(rng.integers(12, 31)))
+        center = rng.integers(0, span - 3600)
+        burst_offsets.append(center + rng.integers(0, 3600, size))
+        burst_callers.append(np.full(size, rng.integers(0, n_contacts)))
+        remaining -= size
+    if n_burst:
+        offsets = np.concatenate([offsets, *burst_offsets])
+        callers = np.concatenate([callers, *burst_callers])
+        types = np.concatenate([types, np.full(n_burst, 2)])  # bursts are mostly missed calls (Wangiri)
+
+    timestamps = start + offsets.astype('timedelta64[s]')
+    future = rng.random(n_calls) < future_rate
+    timestamps[future] = np.datetime64(end, 's') + rng.integers(3600, 86400 * 7, future.sum()).astype('timedelta64[s]')
+
+    calls = pd.DataFrame({
+        'caller_number': contacts[callers],
+        'receiver_number': 'Self',
+        'timestamp': timestamps,
+        'duration': np.where(types == 2, 0, rng.integers(5, 1800, n_calls)),
+        'call_type': CALL_TYPES[types],
+    })
+    n_dup = int(n_calls * duplicate_rate)
+    if n_dup:
+        dup_rows = rng.integers(0, n_calls, n_dup)
+        keep = rng.choice(n_calls, n_calls - n_dup, replace=False)
+        calls = pd.concat([calls.iloc[keep], calls.iloc[dup_rows]], ignore_index=True)
+    calls = calls.sort_values('timestamp', kind='stable', ignore_index=True)
+
+    # SMS: ham/spam templates with a varying number so messages are near-duplicates
+    spam = rng.random(n_sms) < spam_ratio
+    ham_idx = rng.integers(0, len(HAM_TEMPLATES), n_sms)
+    spam_idx = rng.integers(0, len(SPAM_TEMPLATES), n_sms)
+    numbers = rng.integers(0, 100_000, n_sms)
+    content = [
+        (SPAM_TEMPLATES[s] if is_spam else HAM_TEMPLATES[h]).format(n=n)
+        for is_spam, h, s, n in zip(spam, ham_idx, spam_idx, numbers)
+    ]
+    senders = contacts[rng.integers(0, n_contacts, n_sms)].astype(object)
+    # Spam comes from a small set of alphanumeric/unknown senders
+    spam_senders = np.array(['Unknown', '+1555Phish', 'BANK-ALERT', '+15550000000'], dtype=object)
+    senders[spam] = spam_senders[rng.integers(0, len(spam_senders), spam.sum())]
+
+    sms = pd.DataFrame({
+        'sender': senders,
+        'receiver': 'Self',
+        'timestamp': start + rng.integers(0, span, n_sms).astype('timedelta64[s]'),
+        'message_content': np.array(content, dtype=object),
+        'contains_link': spam & (spam_idx != 2) & (spam_idx != 4) & (spam_idx != 5),
+    })
+    nulls = rng.random(n_sms) < null_rate
+    if nulls.any():
+        column = np.where(rng.random(nulls.sum()) < 0.5, 'sender', 'message_content')
+        rows = np.flatnonzero(nulls)
+        sms.loc[rows[column == 'sender'], 'sender'] = None
+        sms.loc[rows[column == 'message_content'], 'message_content'] = None
+    sms = sms.sort_values('timestamp', kind='stable', ignore_index=True)
+
+    return calls, sms
+
+
+def to_api_records(calls, sms):
+    """Converts analyzer-schema frames into evidence-store records (call/sms dicts)."""
+    call_records = pd.DataFrame({
+        'caller': calls['caller_number'],
+        'receiver': calls['receiver_number'],
+        'timestamp': calls['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S'),
+        'duration': calls['duration'].astype(int),
+        'type': calls['call_type'],
+    }).to_dict('records')
+    sms_records = pd.DataFrame({
+        'sender': sms['sender'].fillna('Unknown'),
+        'receiver': sms['receiver'],
+        'timestamp': sms['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S'),
+        'content': sms['message_content'].fillna(''),
+    }).to_dict('records')
+    for record in call_records:
+        record['duration'] = int(record['duration'])
+    return call_records, sms_records
+
+
+def write_case(directory, calls, sms, fmt='csv'):
+    """Writes calls.<fmt> and sms.<fmt> in the layout batch_runner.py expects."""
+    os.makedirs(directory, exist_ok=True)
+    for name, df in (('calls', calls), ('sms', sms)):
+        path = os.path.join(directory, f"{name}.{fmt}")
+        if fmt == 'parquet':
+            df.to_parquet(path, index=False)
+        else:
+            df.to_csv(path, index=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic forensic cases")
+    parser.add_argument("out", help="Output directory (one sub-directory per case)")
+    parser.add_argument("--cases", type=int, default=1)
+    parser.add_argument("--calls", type=int, default=100_000)
+    parser.add_argument("--sms", type=int, default=100_000)
+    parser.add_argument("--spam-ratio", type=float, default=0.1)
+    parser.add_argument("--burst-ratio", type=float, default=0.05)
+    parser.add_argument("--duplicate-rate", type=float, default=0.01)
+    parser.add_argument("--null-rate", type=float, default=0.01)
+    parser.add_argument("--future-rate", type=float, default=0.001)
+    parser.add_argument("--format", choices=['csv', 'parquet'], default='csv')
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for i in range(args.cases):
+        calls_df, sms_df = generate_case(args.calls, args.sms, args.spam_ratio, args.burst_ratio,
+                                         args.duplicate_rate, args.null_rate, args.future_rate, seed=args.seed + i)
+        write_case(os.path.join(args.out, f"case-{i:04d}"), calls_df, sms_df, args.format)
+        print(f"[DATA] case-{i:04d}: {len(calls_df)} calls, {len(sms_df)} SMS")
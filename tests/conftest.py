@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# The API modules open their evidence store, audit log and model directory at
+# import: point them at a scratch directory before any test imports them
+_scratch = tempfile.mkdtemp(prefix="forensic-tests-")
+os.environ.setdefault('EVIDENCE_DB_PATH', os.path.join(_scratch, 'evidence.db'))
+os.environ.setdefault('AUDIT_LOG_DIR', os.path.join(_scratch, 'audit_log'))
+os.environ.setdefault('ONLINE_MODEL_DIR', os.path.join(_scratch, 'online_model'))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
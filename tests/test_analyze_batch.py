@@ -0,0 +1,23 @@
+import pytest
+
+import forensic_api
+
+
+@pytest.mark.parametrize("item", [{"content": None}, {"content": 5}, 5, None])
+def test_bad_item_is_rejected(item):
+    response = forensic_api.app.test_client().post('/api/analyze/batch', json={"messages": [{"content": "hi"}, item]})
+    assert response.status_code == 400
+    assert "messages[1]" in response.get_json()["error"]
+
+
+def test_strings_and_objects_are_scored():
+    response = forensic_api.app.test_client().post(
+        '/api/analyze/batch', json={"messages": ["see http://bit.ly/x.apk", {"id": 7, "content": "hello"}]})
+    data = response.get_json()["data"]
+    assert response.status_code == 200
+    assert data[0]["risk_level"] == "CRITICAL" and data[1]["id"] == 7
+
+
+def test_stored_records_without_text_content_are_scored():
+    verdicts = forensic_api.analyze_risk_batch([{"content": None}, {"content": 12345}])
+    assert [level for _, level, _ in verdicts] == ["LOW", "LOW"]
@@ -0,0 +1,103 @@
+import json
+import os
+import threading
+
+import pytest
+
+import forensic_api
+from audit import GENESIS_HASH, AuditLog
+
+
+def _log(directory, **kwargs):
+    return AuditLog(str(directory), fsync_interval=0, **kwargs)
+
+
+def _lines(log, segment=1):
+    with open(log.segment_path(segment)) as f:
+        return f.readlines()
+
+
+def _rewrite(log, lines, segment=1):
+    path = log.segment_path(segment)
+    os.chmod(path, 0o644)
+    with open(path, "w") as f:
+        f.writelines(lines)
+
+
+@pytest.fixture
+def audit_log(tmp_path):
+    log = _log(tmp_path, segment_bytes=4096)
+    threads = [threading.Thread(target=lambda u=user: [log.log(u, "VIEW", f"artifact-{i % 5}", n=i) for i in range(50)])
+               for user in ("alice", "bob", "carol")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert log.flush()
+    return log
+
+
+def test_concurrent_entries_form_one_chain(audit_log):
+    assert audit_log.verify() == {"valid": True, "entries": 150, "head": audit_log.query(limit=1)[0]["hash"]}
+    assert audit_log.stats()["written"] == 150 and audit_log.stats()["segments"] > 1
+    # Rotated segments are sealed read-only
+    assert os.stat(audit_log.segment_path(1)).st_mode & 0o777 == 0o444
+
+    entries = audit_log.query(limit=1000)
+    assert [e["seq"] for e in entries] == list(range(150, 0, -1))
+    assert entries[-1]["prev_hash"] == GENESIS_HASH
+    assert all(newer["prev_hash"] == older["hash"] for newer, older in zip(entries, entries[1:]))
+
+    bob = audit_log.query(artifact="artifact-3", user="bob")
+    assert len(bob) == 10 and {(e["user"], e["artifact"]) for e in bob} == {("bob", "artifact-3")}
+    assert [e["seq"] for e in bob] == sorted((e["seq"] for e in bob), reverse=True)
+
+
+def test_edited_entry_breaks_the_chain(audit_log):
+    lines = _lines(audit_log)
+    entry = json.loads(lines[2])
+    entry["user"] = "mallory"
+    lines[2] = json.dumps(entry, sort_keys=True) + "\n"
+    _rewrite(audit_log, lines)
+    assert audit_log.verify() == {"valid": False, "entries": 2, "broken_at": 3, "reason": "hash mismatch"}
+
+
+def test_dropped_entry_breaks_the_chain(audit_log):
+    lines = _lines(audit_log)
+    _rewrite(audit_log, lines[:4] + lines[5:])
+    result = audit_log.verify()
+    assert not result["valid"] and result["broken_at"] == 5 and result["reason"] == "expected seq 5, found 6"
+
+
+def test_truncated_tail_no_longer_matches_the_head(tmp_path):
+    log = _log(tmp_path)
+    for i in range(5):
+        log.log("alice", "VIEW", i)
+    log.flush()
+    _rewrite(log, _lines(log)[:-1])
+    assert log.verify() == {"valid": False, "entries": 4, "broken_at": 5,
+                            "reason": "chain ends at seq 4, index head is seq 5"}
+
+
+def test_reopened_log_continues_the_chain_and_cuts_uncommitted_lines(tmp_path):
+    log = _log(tmp_path)
+    log.log("alice", "VIEW", "a")
+    log.flush()
+    # A writer that died between appending and committing its batch
+    with open(log.segment_path(1), "a") as f:
+        f.write('{"seq": 2, "partial": tru')
+
+    reopened = _log(tmp_path)
+    reopened.log("bob", "EXPORT", "b")
+    reopened.flush()
+    assert reopened.verify()["valid"] and reopened.verify()["entries"] == 2
+    assert [e["user"] for e in reopened.query()] == ["bob", "alice"]
+
+
+def test_audit_endpoints_see_the_access_log():
+    client = forensic_api.app.test_client()
+    logged = client.get('/api/evidence/view?type=call&start_date=2033-06-01&end_date=2033-06-02').get_json()
+    found = client.get(f'/api/audit?artifact={logged["access_logs"]["artifact"]}&limit=10000').get_json()
+    assert logged["access_logs"]["entry_id"] in [e["entry_id"] for e in found["data"]]
+    assert client.get('/api/audit?limit=x').status_code == 400
+    assert client.get('/api/audit/verify').get_json()["audit_chain"]["valid"]
@@ -0,0 +1,41 @@
+import json
+import time
+
+import forensic_api
+
+
+def _import(client, kind, body, fmt):
+    response = client.post(f'/api/ingest/bulk?kind={kind}&format={fmt}', data=body)
+    assert response.status_code == 202, response.get_json()
+    job_id = response.get_json()["job_id"]
+    for _ in range(200):
+        job = client.get(f'/api/jobs/{job_id}').get_json()["job"]
+        if job["status"] in ("succeeded", "failed", "cancelled"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_ndjson_numbers_are_stored_as_text_with_valid_proofs():
+    client = forensic_api.app.test_client()
+    before = forensic_api.STORE.max_id("call")
+    rows = [{"caller": 15551234, "receiver": 447900900123, "timestamp": "2024-03-01 10:00:00", "duration": 30},
+            {"caller": None, "receiver": 15551234, "timestamp": "2024-03-01 10:01:00", "duration": "01:10"}]
+    body = "\n".join(json.dumps(row) for row in rows) + "\n"
+    assert _import(client, "call", body, "ndjson")["status"] == "succeeded"
+
+    stored = [forensic_api.STORE.get("call", record_id) for record_id in (before + 1, before + 2)]
+    assert [(r["caller"], r["receiver"], r["duration"]) for r in stored] == [
+        ("15551234", "447900900123", 30), (None, "15551234", "01:10")]
+    for record in stored:
+        integrity = client.get(f'/api/evidence/call/{record["id"]}/proof').get_json()["integrity"]
+        assert integrity["verified"]
+
+
+def test_parquet_without_pyarrow_is_rejected_before_spooling(monkeypatch, tmp_path):
+    monkeypatch.setattr(forensic_api, "parquet_supported", lambda: False)
+    monkeypatch.setattr(forensic_api, "BULK_SPOOL_DIR", str(tmp_path))
+    response = forensic_api.app.test_client().post('/api/ingest/bulk?kind=call&format=parquet', data=b"PAR1")
+    assert response.status_code == 400
+    assert "pyarrow" in response.get_json()["error"]
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,56 @@
+import random
+
+from burst_detection import BurstDetector, find_bursts, find_bursts_by_key
+
+
+def _random_case(rng):
+    window = rng.choice([60, 300, 3600])
+    threshold = rng.randint(1, 6)
+    span = window * rng.randint(1, 20)
+    times = [rng.randrange(span) for _ in range(rng.randint(0, 120))]
+    return window, threshold, times
+
+
+def test_shuffled_input_matches_find_bursts():
+    rng = random.Random(20240105)
+    for _ in range(600):
+        window, threshold, times = _random_case(rng)
+        rng.shuffle(times)
+        detector = BurstDetector(window, threshold)
+        for ts in times:
+            detector.add(None, ts)
+        assert detector.bursts(None) == find_bursts(times, window, threshold), (window, threshold, times)
+
+
+def test_sorted_input_matches_find_bursts():
+    rng = random.Random(7)
+    for _ in range(200):
+        window, threshold, times = _random_case(rng)
+        detector = BurstDetector(window, threshold)
+        for ts in sorted(times):
+            detector.add(None, ts)
+        assert detector.bursts(None) == find_bursts(times, window, threshold)
+
+
+def test_shuffled_keyed_input_matches_find_bursts_by_key():
+    rng = random.Random(11)
+    for _ in range(100):
+        window, threshold, times = _random_case(rng)
+        keys = [rng.choice("abc") for _ in times]
+        events = list(zip(keys, times))
+        rng.shuffle(events)
+        detector = BurstDetector(window, threshold)
+        for key, ts in events:
+            detector.add(key, ts)
+        expected = find_bursts_by_key(keys, times, window, threshold) if times else {}
+        assert {key: detector.bursts(key) for key in "abc" if detector.bursts(key)} == expected
+
+
+def test_late_event_reports_the_burst_it_opens():
+    detector = BurstDetector(window=60, threshold=2)
+    assert detector.add("x", 100) is None
+    assert detector.add("x", 200) is None
+    assert detector.add("x", 110) is None
+    assert detector.add("x", 105) == "started"
+    assert detector.add("x", 101) == "extended"
+    assert detector.burst_at("x", 105)["calls"] == 4
@@ -0,0 +1,25 @@
+import forensic_api
+
+TEMPLATE = "Hello dear customer, your parcel is waiting at the depot, reply to reschedule delivery today thanks"
+WITH_PAYLOAD = TEMPLATE + " http://bit.ly/x.apk"
+
+
+def test_payload_member_is_not_downgraded_to_its_template():
+    representative, member = forensic_api.STORE.insert_many("sms", [
+        {"sender": "+15550001111", "receiver": "Self", "timestamp": "2024-01-05 10:00:00", "content": TEMPLATE},
+        {"sender": "+15550002222", "receiver": "Self", "timestamp": "2024-01-05 10:01:00", "content": WITH_PAYLOAD},
+    ])
+    messages = [representative, member]
+    campaigns = forensic_api.campaign_representatives(messages)
+    # The pair clusters together, the template being the representative
+    assert campaigns[1] is not None and campaigns[1][1] == representative["id"]
+
+    (_, template_level, _), (score, level, findings) = forensic_api.analyze_risk_batch(messages, campaigns)
+    own_score, own_level, _ = forensic_api.analyze_risk_batch([member])[0]
+    assert template_level == "LOW"
+    assert level == "CRITICAL" and score >= own_score
+    assert any("Potential malware payload" in finding for finding in findings)
+
+    response = forensic_api.app.test_client().get('/api/analyze')
+    verdicts = {row["id"]: row["risk_level"] for row in response.get_json()["data"]}
+    assert verdicts[member["id"]] == "CRITICAL"
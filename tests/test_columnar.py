@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from columnar import MISSING_TS, RecordColumns, StringTable, iter_blocks, load_columns
+from evidence_store import EvidenceStore, parse_timestamp
+
+CALLS = [
+    {"caller": "+15551230001", "receiver": "Self", "timestamp": "2024-03-01 10:00:00", "duration": 42, "type": "Missed"},
+    {"caller": "+15551230002", "receiver": "Self", "timestamp": "2024-03-01 10:00:00", "duration": "01:10", "type": "Incoming"},
+    {"caller": "+15551230001", "receiver": "Self", "timestamp": "2024-03-02T08:30:00", "duration": "1:05:03", "type": "Outgoing"},
+    {"caller": "+15551230003", "receiver": "Self", "timestamp": None, "duration": None, "type": None},
+    {"caller": None, "receiver": "Self", "timestamp": "not a date", "duration": "n/a", "type": "Missed"},
+    {"caller": "+15551230002", "receiver": "Self", "timestamp": "2024-03-03 23:59:59", "duration": 12.5, "type": "Missed"},
+    {"caller": "+15551230004", "receiver": "Self", "timestamp": "2024-03-01 09:00:00", "duration": "7", "type": "Missed"},
+]
+SMS = [
+    {"sender": "+15551230001", "receiver": "Self", "timestamp": f"2024-03-0{1 + i % 3} 12:00:{i:02d}",
+     "content": f"naïve message {i}" if i % 4 else None, "risk": ["low", "high", None][i % 3]} for i in range(20)
+]
+
+
+@pytest.fixture(scope="module")
+def store(tmp_path_factory):
+    store = EvidenceStore(str(tmp_path_factory.mktemp("columnar") / "evidence.db"))
+    store.insert_many("call", CALLS)
+    store.insert_many("sms", SMS)
+    return store
+
+
+def _rows(store, kind, **kwargs):
+    return [row for rows in store.iter_row_batches(kind, **kwargs) for row in rows]
+
+
+def _as_records(rows, kind, store):
+    return [store.get(kind, row[1]) for row in rows]
+
+
+@pytest.mark.parametrize("kind", ["call", "sms"])
+@pytest.mark.parametrize("batch_size", [1, 3, 10000])
+def test_columns_decode_to_the_stored_records(store, kind, batch_size):
+    columns = load_columns(store, kind, batch_size=batch_size)
+    assert list(columns.iter_records()) == _as_records(_rows(store, kind), kind, store)
+    assert columns.nbytes > 0
+
+
+def test_blocks_share_one_string_table(store):
+    strings = StringTable()
+    blocks = list(iter_blocks(store, "call", batch_size=2, strings=strings))
+    assert len(blocks) == 4 and all(block.strings is strings for block in blocks)
+    assert len(strings) == len({v for c in CALLS for v in (c["caller"], c["receiver"], c["type"]) if v is not None})
+
+
+def test_time_and_cursor_slices_match_the_store_scans(store):
+    columns = load_columns(store, "call")
+    ts = sorted(t for t in columns.ts.tolist() if t != MISSING_TS)
+    bounds = [None, ts[0], ts[1], ts[3], ts[-1], parse_timestamp("2030-01-01 00:00:00")]
+    for start in bounds:
+        for end in bounds:
+            expected = [row[1] for row in _rows(store, "call", start=start, end=end)]
+            assert columns.between(start, end).ids.tolist() == expected, (start, end)
+
+    for i in range(len(columns)):
+        position = (None if columns.ts[i] == MISSING_TS else int(columns.ts[i]), int(columns.ids[i]))
+        expected = [row[1] for row in _rows(store, "call", after=position)]
+        # In the column arrays undated records sort at MISSING_TS instead of NULL
+        after = columns.after((int(columns.ts[i]), int(columns.ids[i])))
+        assert after.ids.tolist() == expected
+
+
+def test_to_pandas_wraps_the_columns(store):
+    columns = load_columns(store, "call")
+    frame = columns.to_pandas()
+    records = list(columns.iter_records())
+    assert frame["id"].tolist() == [r["id"] for r in records]
+    assert frame["caller"].dtype == "category"
+    assert frame["caller"].astype(object).where(frame["caller"].notna(), None).tolist() == [r["caller"] for r in records]
+    assert frame["timestamp"].isna().sum() == (columns.ts == MISSING_TS).sum()
+    assert np.shares_memory(frame["duration"].to_numpy(), columns.columns["duration"])
+
+    plain = columns.to_pandas(categorical=False, rename={"caller": "number", "receiver": None})
+    assert "receiver" not in plain and plain["number"].dtype == object
+    assert plain["number"].tolist() == [r["caller"] for r in records]
+
+
+def test_slices_are_views():
+    rows = [(parse_timestamp(f"2024-01-0{i + 1} 00:00:00"), i + 1, "a", "b", f"2024-01-0{i + 1} 00:00:00", "x", "low")
+            for i in range(5)]
+    columns = RecordColumns.from_rows("sms", rows)
+    window = columns[1:4]
+    assert window.ids.tolist() == [2, 3, 4] and np.shares_memory(window.ts, columns.ts)
+    assert pd.Timestamp(int(window.ts[0]), unit="s") == pd.Timestamp("2024-01-02")
+    with pytest.raises(TypeError):
+        columns[::2]
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.pipeline import Pipeline
+
+from compact_model import CompactTextModel, export_compact_model
+from train_ai_model import TRAINING_DATA
+
+TEXTS = [text for text, _ in TRAINING_DATA] + [
+    "URGENT verify your account at http://bit.ly/x now",
+    "see you at the conference room",
+    "Überweisung bestätigen: http://bank-verify.tk",
+    "",
+    "zzz qqq unseen words only",
+]
+
+
+@pytest.mark.parametrize("tfidf", [
+    TfidfVectorizer(ngram_range=(1, 2)),
+    TfidfVectorizer(ngram_range=(1, 3), lowercase=False, norm='l1'),
+    TfidfVectorizer(use_idf=False, norm=None),
+])
+def test_compact_model_predicts_like_the_pipeline(tmp_path, tfidf):
+    pipeline = Pipeline([('tfidf', tfidf), ('clf', MultinomialNB())])
+    pipeline.fit([text for text, _ in TRAINING_DATA], [label for _, label in TRAINING_DATA])
+    export_compact_model(pipeline, tmp_path / "model")
+    compact = CompactTextModel(tmp_path / "model")
+
+    # scikit-learn numbers features in sorted term order too, so the columns line up
+    np.testing.assert_allclose(compact.transform(TEXTS).toarray(), pipeline[:-1].transform(TEXTS).toarray(), atol=1e-12)
+    np.testing.assert_allclose(compact.predict_proba(TEXTS), pipeline.predict_proba(TEXTS), atol=1e-12)
+    assert list(compact.predict(TEXTS)) == list(pipeline.predict(TEXTS))
+    assert list(compact.classes_) == list(pipeline.classes_)
+
+
+def test_unsupported_vectorizer_settings_are_rejected(tmp_path):
+    pipeline = Pipeline([('tfidf', TfidfVectorizer(sublinear_tf=True)), ('clf', MultinomialNB())])
+    pipeline.fit(["alpha beta", "gamma delta"], ["HIGH", "LOW"])
+    with pytest.raises(ValueError):
+        export_compact_model(pipeline, tmp_path / "model")
@@ -0,0 +1,107 @@
+from collections import Counter
+
+import pytest
+
+import forensic_api
+from contacts import UNKNOWN, normalize_number
+from evidence_store import EvidenceStore, format_timestamp, parse_timestamp
+
+
+@pytest.mark.parametrize("raw, canonical", [
+    ("+1 (555) 012-3456", "+15550123456"),
+    ("555.012.3456", "+15550123456"),
+    ("15550123456", "+15550123456"),
+    (5550123456, "+15550123456"),
+    ("0044 20 7946 0000", "+442079460000"),
+    ("+44 20 7946 0000", "+442079460000"),
+    ("72345", "72345"),
+    ("BANK-ALERT", "BANK-ALERT"),
+    ("  Mom   Cell ", "Mom Cell"),
+    ("+1555Phish", "+1555Phish"),
+    (None, UNKNOWN),
+    (float("nan"), UNKNOWN),
+    ("", UNKNOWN),
+    ("Private Number", UNKNOWN),
+    ("withheld", UNKNOWN),
+])
+def test_numbers_are_normalized(raw, canonical):
+    assert normalize_number(raw) == canonical
+
+
+CALLS = [
+    {"caller": "555-012-3456", "receiver": "Self", "timestamp": "2024-05-02 10:00:00", "duration": 5, "type": "Missed"},
+    {"caller": "+15550123456", "receiver": "Self", "timestamp": "2024-05-01 09:00:00", "duration": 50, "type": "Incoming"},
+    {"caller": "Self", "receiver": "(555) 012 3456", "timestamp": "2024-05-03 11:00:00", "duration": 9, "type": "Outgoing"},
+    {"caller": "Private", "receiver": "Self", "timestamp": None, "duration": 0, "type": "Missed"},
+    {"caller": "72345", "receiver": "Self", "timestamp": "2024-05-04 08:00:00", "duration": 0, "type": "Missed"},
+]
+SMS = [
+    {"sender": "15550123456", "receiver": "Self", "timestamp": "2024-05-05 12:00:00", "content": "hi", "risk": "low"},
+    {"sender": "Self", "receiver": "+1 555 012 3456", "timestamp": "2024-04-30 12:00:00", "content": "yo", "risk": "low"},
+    {"sender": "BANK-ALERT", "receiver": "Self", "timestamp": "2024-05-01 12:00:00", "content": "pay", "risk": "high"},
+]
+
+
+def _expected_index():
+    """Contact aggregates recomputed from the raw records."""
+    index = {}
+    for kind, records, parties in (("call", CALLS, ("caller", "receiver")), ("sms", SMS, ("sender", "receiver"))):
+        for record in records:
+            for field, direction in zip(parties, ("out", "in")):
+                entry = index.setdefault(normalize_number(record[field]), {"stats": Counter(), "seen": []})
+                entry["stats"][f"{'calls' if kind == 'call' else 'sms'}_{direction}"] += 1
+                if kind == "call" and direction == "out" and record["type"] == "Missed":
+                    entry["stats"]["missed"] += 1
+                if record["timestamp"] is not None:
+                    entry["seen"].append(parse_timestamp(record["timestamp"]))
+    return index
+
+
+def test_contact_aggregates_match_a_recount(tmp_path):
+    store = EvidenceStore(str(tmp_path / "contacts.db"))
+    # Split batches, so aggregates are merged across transactions too
+    store.insert_many("call", CALLS[:2])
+    store.insert_many("call", CALLS[2:])
+    store.insert_many("sms", SMS)
+
+    expected = _expected_index()
+    assert store.contact_count() == len(expected)
+    for number, entry in expected.items():
+        contact = store.contact(number)
+        for column in ("calls_out", "calls_in", "missed", "sms_out", "sms_in"):
+            assert contact[column] == entry["stats"][column], (number, column)
+        assert contact["first_seen"] == (format_timestamp(min(entry["seen"])) if entry["seen"] else None)
+        assert contact["last_seen"] == (format_timestamp(max(entry["seen"])) if entry["seen"] else None)
+
+    assert store.contact("555 012 3456")["number"] == "+15550123456"
+    assert store.contact("+19999999999") is None
+    busiest = store.contacts("calls", limit=2)
+    assert [c["number"] for c in busiest] == ["Self", "+15550123456"]
+
+
+def test_contact_endpoints_and_evidence_filter():
+    client = forensic_api.app.test_client()
+    number = "+15557770001"
+    forensic_api.STORE.insert_many("call", [
+        {"caller": "555-777-0001", "receiver": "Self", "timestamp": "2033-01-01 10:00:00", "duration": 3, "type": "Missed"},
+        {"caller": "Self", "receiver": "(555) 777 0001", "timestamp": "2033-01-02 10:00:00", "duration": 7, "type": "Outgoing"},
+        {"caller": "+15557770002", "receiver": "Self", "timestamp": "2033-01-03 10:00:00", "duration": 1, "type": "Missed"},
+    ])
+
+    contact = client.get('/api/contacts/555.777.0001').get_json()["contact"]
+    assert contact["number"] == number
+    assert (contact["calls_out"], contact["calls_in"], contact["missed"]) == (1, 1, 1)
+    assert client.get('/api/contacts/+15557779999').status_code == 404
+    assert client.get('/api/contacts?sort=bogus').status_code == 400
+
+    listing = client.get('/api/contacts?sort=last_seen&limit=10').get_json()
+    assert listing["total"] == forensic_api.STORE.contact_count()
+    # The 2033 records are the newest in the shared test store
+    assert number in [c["number"] for c in listing["data"]]
+
+    view = client.get('/api/evidence/view?type=call&contact=1-555-777-0001'
+                      '&start_date=2033-01-01&end_date=2033-01-05').get_json()
+    assert [r["timestamp"] for r in view["evidence_data"]] == ["2033-01-01 10:00:00", "2033-01-02 10:00:00"]
+    unknown = client.get('/api/evidence/view?type=call&contact=%2B15557779999'
+                         '&start_date=2033-01-01&end_date=2033-01-05').get_json()
+    assert unknown["evidence_data"] == []
@@ -0,0 +1,18 @@
+import pytest
+
+import forensic_api
+
+
+@pytest.mark.parametrize("data", [
+    {"type": "call", "number": 15551234, "timestamp": "2024-03-01 10:00:00", "duration": 42, "call_type": "Missed"},
+    {"type": "sms", "sender": 15551234, "timestamp": "2024-03-01 10:05:00", "content": "hello"},
+])
+def test_numeric_parties_keep_a_valid_proof(data):
+    client = forensic_api.app.test_client()
+    added = client.post('/api/add-data', json=data).get_json()
+    kind = data["type"]
+    record_id = forensic_api.STORE.max_id(kind)
+
+    integrity = client.get(f'/api/evidence/{kind}/{record_id}/proof').get_json()["integrity"]
+    assert integrity["record_unchanged"] and integrity["verified"]
+    assert added["hash"] == integrity["record_hash"]
@@ -0,0 +1,22 @@
+import os
+import threading
+
+from jobs import JobQueue, JobStore
+
+
+def test_cleanup_runs_for_a_job_cancelled_while_queued(tmp_path):
+    jobs = JobStore(str(tmp_path / "jobs.db"))
+    queue = JobQueue(jobs, max_workers=1)
+    release = threading.Event()
+    blocker = queue.submit("block", lambda job: release.wait(10))
+
+    spool = tmp_path / "upload.csv"
+    spool.write_text("caller,timestamp\n")
+    queued = queue.submit("bulk_ingest", lambda job: None, cleanup=lambda: os.remove(spool))
+    assert queue.cancel(queued) == "cancelled"
+    release.set()
+    queue._executor.shutdown(wait=True)
+
+    assert jobs.status(blocker) == "succeeded"
+    assert jobs.status(queued) == "cancelled"
+    assert not spool.exists()
@@ -0,0 +1,39 @@
+import random
+
+import live_detection
+from evidence_store import EvidenceStore
+from live_detection import LiveForensicDetector
+
+
+def _records(n, rng):
+    numbers = [f"+4479000000{i:02d}" for i in range(20)]
+    for i in range(n):
+        stamp = f"2024-03-{1 + i // 400:02d} {rng.randrange(24):02d}:{rng.randrange(60):02d}:00"
+        if rng.random() < 0.7:
+            yield "call", {"caller": rng.choice(numbers), "receiver": rng.choice(numbers), "timestamp": stamp,
+                           "duration": rng.randrange(120), "type": rng.choice(["Missed", "Incoming", "Outgoing"])}
+        else:
+            yield "sms", {"sender": rng.choice(numbers), "receiver": rng.choice(numbers), "timestamp": stamp,
+                          "content": rng.choice(["hi", "URGENT verify your bank", "get app http://bit.ly/x.apk"])}
+
+
+def test_first_ingest_replays_the_stored_case_in_the_background(tmp_path, monkeypatch):
+    monkeypatch.setattr(live_detection, "BACKLOG_CHUNK", 50)
+    store = EvidenceStore(str(tmp_path / "evidence.db"))
+    rng = random.Random(7)
+    for kind, record in _records(1200, rng):
+        store.add(kind, record)
+
+    live = LiveForensicDetector()
+    new = store.add("sms", {"sender": "+447900000001", "receiver": "+447900000002",
+                            "timestamp": "2024-03-04 12:00:00", "content": "free reward"})
+    result = live.ingest(store, "sms", new)
+    assert result["event_score"] == 40
+    assert live.wait_for_backlog(timeout=60)
+
+    replayed = LiveForensicDetector()
+    for kind in ("call", "sms"):
+        for ts, record in store.iter_since(kind):
+            replayed.observe(kind, record, ts)
+    assert live.summary() == replayed.summary()
+    assert live.bursts.bursts(None) == replayed.bursts.bursts(None)
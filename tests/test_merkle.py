@@ -0,0 +1,58 @@
+import forensic_api
+import merkle
+from evidence_store import EvidenceStore
+
+
+def _sms(i):
+    return {"sender": f"+1555300{i:04d}", "receiver": "Self", "timestamp": f"2024-04-01 10:{i % 60:02d}:00",
+            "content": f"message {i}", "risk": "low"}
+
+
+def _tree_hash(leaves):
+    """RFC 6962 Merkle tree hash, computed from scratch."""
+    if len(leaves) == 1:
+        return merkle.leaf_node(leaves[0])
+    split = 1 << (len(leaves) - 1).bit_length() - 1
+    return merkle.parent_node(_tree_hash(leaves[:split]), _tree_hash(leaves[split:]))
+
+
+def test_every_record_has_a_valid_proof_as_the_tree_grows(tmp_path):
+    store = EvidenceStore(str(tmp_path / "merkle.db"))
+    assert store.merkle_root() == (merkle.EMPTY_ROOT, 0)
+
+    hashes = []
+    # Uneven batches, so appends cross peak boundaries mid-batch
+    for batch in ([0], [1, 2], [3, 4, 5, 6, 7], [8], list(range(9, 23))):
+        for record in store.insert_many("sms", [_sms(i) for i in batch]):
+            hashes.append(merkle.record_hash(record))
+        root, size = store.merkle_root()
+        assert size == len(hashes) and root == _tree_hash(hashes).hex()
+
+        for record_id in range(1, size + 1):
+            proof = store.inclusion_proof("sms", record_id)
+            assert proof["root"] == root and proof["tree_size"] == size
+            assert proof["record_hash"] == hashes[proof["leaf"]]
+            assert merkle.verify_inclusion(proof["record_hash"], proof["proof"], root)
+
+
+def test_proof_does_not_verify_for_another_record_or_root(tmp_path):
+    store = EvidenceStore(str(tmp_path / "merkle.db"))
+    store.insert_many("sms", [_sms(i) for i in range(6)])
+    proof = store.inclusion_proof("sms", 3)
+    other = store.inclusion_proof("sms", 4)
+    assert not merkle.verify_inclusion(other["record_hash"], proof["proof"], proof["root"])
+    assert not merkle.verify_inclusion(proof["record_hash"], proof["proof"], merkle.EMPTY_ROOT)
+    assert store.inclusion_proof("sms", 99) is None
+
+
+def test_edited_record_fails_its_proof():
+    client = forensic_api.app.test_client()
+    forensic_api.STORE.add("sms", {**_sms(1), "timestamp": "2032-02-01 09:00:00"})
+    record_id = forensic_api.STORE.max_id("sms")
+    assert client.get(f'/api/evidence/sms/{record_id}/proof').get_json()["integrity"]["verified"]
+
+    with forensic_api.STORE.transaction() as conn:
+        conn.execute("UPDATE sms SET content = 'edited' WHERE id = ?", (record_id,))
+    integrity = client.get(f'/api/evidence/sms/{record_id}/proof').get_json()["integrity"]
+    assert not integrity["record_unchanged"] and not integrity["verified"]
+    assert client.get('/api/evidence/sms/999999999/proof').status_code == 404
@@ -0,0 +1,71 @@
+import uuid
+from bisect import bisect_left
+
+import forensic_api
+from metrics import BUCKETS, METRICS, Histogram, MetricsRegistry
+from rules import JOINED_PASS, MESSAGE_RULES
+
+
+def _stages():
+    return {dict(labels).get("stage") for name, labels in METRICS.histograms if name == "stage_seconds"}
+
+
+def test_rules_are_timed_per_regex_family():
+    METRICS.reset()
+    # Unique content, so neither path is answered from the risk cache
+    marker = uuid.uuid4().hex
+    forensic_api.analyze_risk({"content": f"urgent {marker}: login at http://10.0.0.1/x.apk"})
+    assert {"rules", "rules.urgency", "rules.financial", "rules.link", "rules.payload",
+            "rules.exfiltration"} <= _stages()
+
+    METRICS.reset()
+    forensic_api.analyze_risk_batch([{"content": f"{marker} see http://bit.ly/a"}, {"content": f"{marker} hi"}])
+    assert {"rules", f"rules.{JOINED_PASS}", "rules.link"} <= _stages()
+
+
+def test_rule_set_timings_are_per_category():
+    timings = {}
+    MESSAGE_RULES.match("verify your paypal at http://1.2.3.4", timings)
+    assert set(timings) == {rule.category for rule in MESSAGE_RULES}
+    assert all(seconds >= 0 for seconds in timings.values())
+    MESSAGE_RULES.reset()
+
+
+def test_requests_are_timed_per_route_and_exported():
+    METRICS.reset()
+    client = forensic_api.app.test_client()
+    for _ in range(3):
+        client.get('/api/cache/stats')
+    client.get('/api/contacts?sort=bogus')
+
+    summary = client.get('/metrics/summary').get_json()
+    requests = {(t["route"], t["status"]): t for t in summary["timers"] if t["name"] == "request_seconds"}
+    assert requests[("/api/cache/stats", "200")]["count"] == 3
+    assert requests[("/api/contacts", "400")]["count"] == 1
+    timer = requests[("/api/cache/stats", "200")]
+    assert 0 < timer["p50_ms"] <= timer["p95_ms"] <= timer["p99_ms"]
+
+    text = client.get('/metrics').get_data(as_text=True)
+    labels = 'method="GET",route="/api/cache/stats",status="200"'
+    assert "# TYPE forensic_request_seconds histogram" in text
+    assert f'forensic_request_seconds_bucket{{{labels},le="+Inf"}} 3' in text
+    assert f"forensic_request_seconds_count{{{labels}}} 3" in text
+
+
+def test_histogram_quantiles_fall_in_the_right_bucket():
+    histogram = Histogram()
+    for seconds in [0.001] * 90 + [0.5] * 10:
+        histogram.observe(seconds)
+    assert histogram.count == 100 and abs(histogram.sum - 5.09) < 1e-9
+    assert BUCKETS[bisect_left(BUCKETS, 0.001) - 1] < histogram.quantile(0.5) <= BUCKETS[bisect_left(BUCKETS, 0.001)]
+    assert BUCKETS[bisect_left(BUCKETS, 0.5) - 1] < histogram.quantile(0.99) <= BUCKETS[bisect_left(BUCKETS, 0.5)]
+    assert Histogram().quantile(0.5) is None
+
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry(enabled=False)
+    with registry.timer("request_seconds", route="/x"):
+        pass
+    registry.observe("stage_seconds", 1.0, stage="x")
+    registry.count("errors_total")
+    assert registry.summary() == {"timers": [], "counters": []}
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+import forensic_api
+import forensic_asgi
+from microbatch import MicroBatcher
+
+MESSAGES = [
+    "Urgent: your bank account is suspended, verify at http://bit.ly/x",
+    "see you at lunch",
+    "Download invoice.pdf.exe from http://malware.sh",
+    "Congratulations! You won $1000, claim at http://win-now.tk",
+    "the meeting moved to 3pm",
+    "send your password and OTP to keep the account",
+]
+
+
+def _recording_batcher(**kwargs):
+    batches = []
+
+    def fn(items):
+        batches.append(list(items))
+        time.sleep(0.005)  # let the next batch queue up behind this one
+        return [(item, len(batches)) for item in items]
+
+    return MicroBatcher(fn, **kwargs), batches
+
+
+def test_concurrent_callers_get_their_own_results():
+    batcher, batches = _recording_batcher(max_batch_size=8, max_wait=0.002)
+    results = {}
+
+    def call(i):
+        results[i] = batcher(i, timeout=10)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(200)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert {i: item for i, (item, _) in results.items()} == {i: i for i in range(200)}
+    assert sorted(item for batch in batches for item in batch) == list(range(200))
+    assert max(len(batch) for batch in batches) <= 8 and len(batches) < 200
+    # Each result came from the batch its item was in
+    assert all(results[item][1] == number for number, batch in enumerate(batches, 1) for item in batch)
+    stats = batcher.stats()
+    assert (stats["items"], stats["batches"], stats["largest_batch"]) == (200, len(batches), max(map(len, batches)))
+
+
+def test_a_failing_batch_fails_only_its_callers():
+    def fn(items):
+        if "boom" in items:
+            raise RuntimeError("batch failed")
+        return [item.upper() for item in items]
+
+    batcher = MicroBatcher(fn, max_batch_size=4, max_wait=0.05)
+    futures = [batcher.submit(item) for item in ("a", "boom", "b")]
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(10)
+    assert batcher("c", timeout=10) == "C"
+
+
+def test_async_callers_get_results_in_their_own_order():
+    batcher, batches = _recording_batcher(max_batch_size=16, max_wait=0.002)
+
+    async def main():
+        return await asyncio.gather(*(batcher.run(i) for i in range(100)))
+
+    assert [item for item, _ in asyncio.run(main())] == list(range(100))
+    assert any(len(batch) > 1 for batch in batches)
+
+
+async def _request(method, path, body=b"", query=b""):
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": method, "path": path, "query_string": query, "headers": [
+        (b"content-type", b"application/json")], "http_version": "1.1", "scheme": "http"}
+    await forensic_asgi.app(scope, receive, send)
+    status = sent[0]["status"]
+    return status, b"".join(m.get("body", b"") for m in sent[1:])
+
+
+def test_asgi_scores_concurrent_requests_in_order():
+    requests = [{"id": i, "content": f"{MESSAGES[i % len(MESSAGES)]} #{i}"} for i in range(60)]
+
+    async def main():
+        return await asyncio.gather(*(_request("POST", "/api/score", json.dumps(r).encode()) for r in requests))
+
+    responses = asyncio.run(main())
+    for request, (status, body) in zip(requests, responses):
+        message = {"id": request["id"], "content": request["content"]}
+        expected = forensic_api.score_payload(message, forensic_api.analyze_risk_batch([message])[0])
+        assert status == 200 and json.loads(body) == json.loads(json.dumps(expected))
+
+    status, body = asyncio.run(_request("POST", "/api/score", b"not json"))
+    assert status == 400 and "error" in json.loads(body)
+
+
+def test_asgi_bridges_other_routes_to_flask():
+    forensic_api.STORE.insert_many("call", [
+        {"caller": f"+1555400{i:04d}", "receiver": "Self", "timestamp": f"2029-06-01 {i % 24:02d}:00:00",
+         "duration": i, "type": "Incoming"} for i in range(300)
+    ])
+    client = forensic_api.app.test_client()
+    query = "start_date=2029-06-01&end_date=2029-06-02&type=call&format=ndjson"
+    status, body = asyncio.run(_request("GET", "/api/evidence/view", query=query.encode()))
+    expected = client.get(f'/api/evidence/view?{query}').get_data(as_text=True)
+    # Each request writes its own access log entry; compare the records
+    lines = body.decode().splitlines()
+    assert status == 200 and len(lines) == 301 and lines[1:] == expected.splitlines()[1:]
+
+    status, body = asyncio.run(_request("GET", "/api/contacts", query=b"sort=bogus"))
+    assert status == 400 and "error" in json.loads(body)
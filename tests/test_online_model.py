@@ -0,0 +1,81 @@
+import os
+
+import numpy as np
+import pytest
+
+import forensic_api
+import online_model
+from online_model import OnlineTextModel, current_version, load_online_model, train_online, version_path
+from train_ai_model import TRAINING_DATA
+
+TEXTS = [text for text, _ in TRAINING_DATA]
+LABELS = [label for _, label in TRAINING_DATA]
+PROBE = ["Urgent: verify your account at http://bit.ly/x", "see you at the meeting", "claim your prize now"]
+
+
+def test_mini_batches_add_up_to_one_fit():
+    whole = OnlineTextModel().partial_fit(TEXTS, LABELS)
+    batched = OnlineTextModel()
+    for start in range(0, len(TEXTS), 3):
+        batched.partial_fit(TEXTS[start:start + 3], LABELS[start:start + 3])
+    assert batched.trained == whole.trained == len(TEXTS)
+    np.testing.assert_allclose(batched.predict_proba(PROBE), whole.predict_proba(PROBE))
+    np.testing.assert_allclose(whole.predict_proba(PROBE), whole.clf.predict_proba(whole.transform(PROBE)))
+    assert list(whole.classes_) == ["HIGH", "LOW", "MEDIUM"]
+
+
+def test_updates_are_published_as_new_versions(tmp_path, monkeypatch):
+    monkeypatch.setattr(online_model, "KEEP_VERSIONS", 2)
+    directory = str(tmp_path / "online")
+    assert current_version(directory) is None
+
+    model, path = train_online([], [], directory, bootstrap=TRAINING_DATA)
+    assert (model.version, path, current_version(directory)) == (1, version_path(directory, 1), 1)
+    served = load_online_model(path)
+    served_proba = served.predict_proba(PROBE)
+
+    for version in range(2, 5):
+        model, path = train_online(["wire the money to this account today"], ["HIGH"], directory)
+        assert model.version == current_version(directory) == version
+    assert model.trained == len(TRAINING_DATA) + 3
+    assert sorted(os.listdir(directory)) == [".lock", "CURRENT", "model-000003.joblib", "model-000004.joblib"]
+
+    # A worker still holding version 1 keeps serving it after its file was pruned
+    assert not os.path.exists(version_path(directory, 1))
+    np.testing.assert_array_equal(served.predict_proba(PROBE), served_proba)
+    latest = load_online_model(path)
+    assert latest.trained == model.trained
+    np.testing.assert_allclose(latest.predict_proba(PROBE), model.predict_proba(PROBE))
+    first = OnlineTextModel().partial_fit(TEXTS, LABELS)
+    assert not np.allclose(latest.predict_proba(PROBE), first.predict_proba(PROBE))
+
+
+@pytest.fixture
+def online_api(tmp_path, monkeypatch):
+    monkeypatch.setattr(forensic_api, "ONLINE_MODEL_DIR", str(tmp_path / "online"))
+    monkeypatch.setattr(forensic_api, "AI_MODEL_CHECK_INTERVAL", 0)
+    yield forensic_api.app.test_client()
+    monkeypatch.undo()
+    with forensic_api._ai_model_lock:
+        forensic_api.load_ai_model()
+
+
+def test_training_endpoint_hot_swaps_the_served_model(online_api):
+    client = online_api
+    assert client.post('/api/model/train', json={"messages": []}).status_code == 400
+    assert client.post('/api/model/train', json={"messages": [{"content": "x", "label": "BAD"}]}).status_code == 400
+
+    trained = client.post('/api/model/train', json={"messages": [
+        {"content": "your parcel is held, pay the fee at http://post-fee.tk", "label": "HIGH"},
+        {"content": "lunch tomorrow?", "label": "LOW"},
+    ]}).get_json()["model"]
+    assert trained["version"] == 1 and trained["absorbed"] == 2
+    info = client.get('/api/model').get_json()["model"]
+    assert (info["format"], info["online_version"], info["source"]) == ("OnlineTextModel", 1, trained["source"])
+    serving = forensic_api.AI_MODEL
+
+    # Another worker publishes the next version; this one picks it up on its next request
+    train_online(["account locked, confirm your pin"], ["HIGH"], forensic_api.ONLINE_MODEL_DIR)
+    info = client.get('/api/model').get_json()["model"]
+    assert info["online_version"] == 2 and info["trained_messages"] == len(TRAINING_DATA) + 3
+    assert forensic_api.AI_MODEL is not serving and serving.version == 1
@@ -0,0 +1,110 @@
+from collections import Counter
+
+import numpy as np
+import pytest
+
+import forensic_api
+from evidence_store import EvidenceStore, format_timestamp, parse_timestamp
+from rollups import TIME_DIMENSIONS, TOTAL, UNSET, time_bucket
+
+
+def _records(rng, n):
+    base = parse_timestamp("2024-02-27 00:00:00")
+    calls, sms = [], []
+    for i in range(n):
+        ts = int(base + rng.integers(0, 5 * 86400))
+        # A few records without a usable timestamp
+        timestamp = None if i % 97 == 0 else "garbled" if i % 89 == 0 else format_timestamp(ts)
+        calls.append({"caller": f"+1555{rng.integers(100):07d}", "receiver": "Self", "timestamp": timestamp,
+                      "duration": int(rng.integers(0, 600)), "type": rng.choice(["Missed", "Incoming", "Outgoing", ""])})
+        sms.append({"sender": f"+1555{rng.integers(100):07d}", "receiver": "Self", "timestamp": timestamp,
+                    "content": f"message {i}", "risk": [None, "low", "med", "high"][int(rng.integers(4))]})
+    return calls, sms
+
+
+def _recount(records, field=None):
+    """Every rollup of one kind, recomputed from its records."""
+    counts = {"total": Counter({TOTAL: len(records)})}
+    for dimension in TIME_DIMENSIONS:
+        counts[dimension] = Counter(time_bucket(parse_timestamp(r["timestamp"]), dimension) for r in records
+                                    if parse_timestamp(r["timestamp"]) is not None)
+    if field is not None:
+        counts[field] = Counter(r[field] or UNSET for r in records)
+    return counts
+
+
+def _assert_rollups_match(store):
+    for kind, field in (("call", "type"), ("sms", "risk")):
+        for dimension, expected in _recount(store.query(kind), field).items():
+            rollup = store.rollup(kind, dimension)
+            assert rollup == dict(expected), (kind, dimension)
+            assert list(rollup) == sorted(rollup)
+
+
+def test_rollups_match_a_recount(tmp_path):
+    store = EvidenceStore(str(tmp_path / "rollups.db"))
+    calls, sms = _records(np.random.default_rng(7), 2000)
+    for start in range(0, 2000, 300):
+        store.insert_many("call", calls[start:start + 300])
+        store.insert_many("sms", sms[start:start + 300])
+    _assert_rollups_match(store)
+
+    days = sorted(store.rollup("call", "day"))
+    window = store.rollup("call", "day", days[1], days[2])
+    assert list(window) == days[1:3]
+
+
+def test_backfill_builds_the_same_rollups(tmp_path):
+    path = str(tmp_path / "rollups.db")
+    store = EvidenceStore(path)
+    calls, sms = _records(np.random.default_rng(8), 500)
+    store.insert_many("call", calls)
+    store.insert_many("sms", sms)
+    with store.transaction() as conn:
+        before = conn.execute("SELECT * FROM rollups ORDER BY kind, dimension, bucket").fetchall()
+        conn.execute("DELETE FROM rollups")
+        conn.execute("DELETE FROM rollup_kinds")
+
+    reopened = EvidenceStore(path)
+    with reopened.snapshot() as conn:
+        assert conn.execute("SELECT * FROM rollups ORDER BY kind, dimension, bucket").fetchall() == before
+    _assert_rollups_match(reopened)
+
+
+def test_report_and_dashboard_match_a_recomputed_summary():
+    client = forensic_api.app.test_client()
+    calls, sms = _records(np.random.default_rng(9), 300)
+    forensic_api.STORE.insert_many("call", calls)
+    forensic_api.STORE.insert_many("sms", sms)
+
+    all_calls, all_sms = forensic_api.STORE.query("call"), forensic_api.STORE.query("sms")
+    call_counts, sms_counts = _recount(all_calls, "type"), _recount(all_sms, "risk")
+    odd = {"calls": sum(call_counts["hour_of_day"][f"{h:02d}"] for h in forensic_api.ODD_HOURS),
+           "sms": sum(sms_counts["hour_of_day"][f"{h:02d}"] for h in forensic_api.ODD_HOURS)}
+
+    report = client.get('/api/report').get_json()["summary"]
+    assert (report["total_calls"], report["total_sms"]) == (len(all_calls), len(all_sms))
+    assert report["calls_by_type"] == dict(call_counts["type"])
+    assert report["sms_by_risk"] == dict(sms_counts["risk"])
+    assert report["odd_hour_activity"] == {"hours": forensic_api.ODD_HOURS, **odd}
+    assert f"{sms_counts['risk']['high']} high-risk SMS" in report["flags"]
+    assert f"{call_counts['type']['Missed']} missed calls" in report["flags"]
+
+    summary = client.get('/api/summary').get_json()["summary"]
+    assert summary["activity_by_hour_of_day"] == {
+        f"{h:02d}": {"calls": call_counts["hour_of_day"][f"{h:02d}"], "sms": sms_counts["hour_of_day"][f"{h:02d}"]}
+        for h in range(24)
+    }
+    assert summary["flags"] == report["flags"]
+
+
+@pytest.mark.parametrize("granularity", ["day", "hour"])
+def test_timeseries_matches_a_recount_of_the_range(granularity):
+    client = forensic_api.app.test_client()
+    start, end = "2024-02-28 00:00:00", "2024-02-29 23:59:59"
+    in_range = forensic_api.STORE.query("sms", start, end)
+    expected = Counter(time_bucket(parse_timestamp(r["timestamp"]), granularity) for r in in_range)
+    data = client.get(f'/api/summary/timeseries?kind=sms&granularity={granularity}'
+                      f'&start_date=2024-02-28&end_date=2024-02-29').get_json()["data"]
+    assert {entry["bucket"]: entry["records"] for entry in data} == dict(expected)
+    assert client.get('/api/summary/timeseries?granularity=week').status_code == 400
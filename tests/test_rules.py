@@ -0,0 +1,95 @@
+import random
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from forensic_analysis import ForensicAnalyzer
+from rules import MALWARE_RULES, RULE_SETS, Rule, RuleSet
+
+SAMPLES = [
+    "URGENT: Verify your BANK account, click here", "Claim your free Reward now", "You are a WINNER of the lottery",
+    "Security Alert: login at http://evil.example.com", "get it at bit.ly/abc", "TinyURL.com/x or GOO.GL/y",
+    "install update.APK", "invoice.Zip attached", "backup.rar", "see http://10.0.0.1/a.exe", "hello, see you at 5",
+    "Ünïcödé URGENT ünd frée", "İstanbul BANK", "ſree offer", "KELVIN Key", "free\nreward", "",
+    "http://bit.ly/a http://t.co/b https://x.y", "ping 192.168.1.10 now", "v1.2.3.4 is not an ip",
+]
+
+
+def _baseline_indicators(sms):
+    """The str.contains/iterrows indicator checks the rule engine replaced (SMS part)."""
+    detections, risk_score = [], 0
+    suspicious_keywords = [r"click here", r"urgent", r"verify", r"free", r"reward", r"lottery", r"winner", r"bank", r"alert"]
+    for keyword in suspicious_keywords:
+        matches = sms[sms['message_content'].str.contains(keyword, case=False, na=False)]
+        for _, row in matches.iterrows():
+            detections.append(f"Suspicious keyword '{keyword}' found in SMS from {row['sender']}: '{row['message_content'][:30]}...'")
+            risk_score += 20
+    unsafe_links = sms[sms['message_content'].str.contains(r"(http://|bit\.ly|tinyurl\.com|goo\.gl)", case=False, na=False)]
+    for _, row in unsafe_links.iterrows():
+        detections.append(f"Unsafe or short link detected in SMS from {row['sender']}")
+        risk_score += 25
+    malicious_files = sms[sms['message_content'].str.contains(r"(\.apk|\.exe|\.zip|\.rar)", case=False, na=False)]
+    for _, row in malicious_files.iterrows():
+        detections.append(f"Potential malware file reference detected in SMS from {row['sender']}")
+        risk_score += 40
+    return detections, risk_score
+
+
+def _messages(n, seed=5):
+    rng = random.Random(seed)
+    contents = [rng.choice(SAMPLES) + rng.choice([" ", "", "\n"]) + rng.choice(SAMPLES) for _ in range(n)]
+    return SAMPLES + [None, np.nan] + contents
+
+
+# The baseline patterns are kept verbatim, capture groups included
+@pytest.mark.filterwarnings("ignore:This pattern is interpreted as a regular expression")
+def test_malware_indicators_match_the_baseline():
+    contents = _messages(500)
+    sms = pd.DataFrame({"sender": [f"+4479{i:08d}" for i in range(len(contents))], "receiver": "Self",
+                        "timestamp": "2024-03-01 12:00:00", "message_content": contents})
+    calls = pd.DataFrame(columns=["caller_number", "receiver_number", "timestamp", "duration", "call_type"])
+    analyzer = ForensicAnalyzer(calls, sms)
+    analyzer._check_malware_indicators()
+    assert (analyzer.risk_report["detections"]["malware_indicators"], analyzer.risk_score) == _baseline_indicators(sms)
+
+
+def test_scan_and_match_agree_with_each_rule_alone():
+    contents = _messages(500, seed=9)
+    for name, rule_set in RULE_SETS.items():
+        texts = contents if rule_set is MALWARE_RULES else [c.lower() if isinstance(c, str) else c for c in contents]
+        hits, counts = rule_set.scan(texts)
+        for row, text in enumerate(texts):
+            expected = set()
+            for rule in rule_set:
+                if isinstance(text, str) and (rule.requires is None or rule.requires in expected) \
+                        and rule.regex.search(text):
+                    expected.add(rule.name)
+            assert {rule.name for rule in rule_set if hits[row, rule_set.index[rule.name]]} == expected, (name, text)
+            assert {rule.name for rule, _ in rule_set.match(text)} == expected, (name, text)
+            for rule, count in rule_set.match(text):
+                if rule.counted:
+                    assert counts[rule.name][row] == count == len(rule.regex.findall(text))
+        rule_set.reset()
+
+
+def test_sets_that_cannot_be_joined_still_scan_exactly():
+    rules = [Rule("start", r"^win", 10, "t", "start"), Rule("upper", r"FREE\b", 10, "t", "upper"),
+             Rule("not_ly", r"bit(?!\.ly)", 10, "t", "not_ly")]
+    texts = ["win free", "Winner", "FREE!", "free-bit.ly", "bit", "x win", None, "ſree", "bit.lyz bitx"]
+    for flags in (0, re.IGNORECASE):
+        rule_set = RuleSet("custom", rules, flags=flags)
+        assert rule_set._alternation is None
+        hits, _ = rule_set.scan(texts)
+        for row, text in enumerate(texts):
+            expected = [isinstance(text, str) and rule.regex.search(text) is not None for rule in rules]
+            assert hits[row].tolist() == expected, text
+
+    # Uppercase patterns in a case-insensitive set are joined as (?i:...) on the lowercased text
+    rule_set = RuleSet("custom", rules[1:2] + [Rule("link", r"BIT\.LY", 10, "t", "link")], flags=re.IGNORECASE)
+    assert rule_set._alternation is not None
+    hits, _ = rule_set.scan(texts)
+    for row, text in enumerate(texts):
+        assert hits[row].tolist() == [isinstance(text, str) and rule.regex.search(text) is not None
+                                      for rule in rule_set], text
@@ -0,0 +1,54 @@
+import gzip
+import json
+
+import pytest
+
+import forensic_api
+import streaming
+
+RANGE = "start_date=2031-01-01&end_date=2031-01-02"
+
+
+@pytest.fixture(scope="module")
+def client():
+    forensic_api.STORE.insert_many("sms", [
+        {"sender": f"+1555200{i:04d}", "receiver": "Self", "timestamp": f"2031-01-01 {i % 24:02d}:00:00",
+         "content": f"export line {i} " + "x" * 80, "risk": "low"} for i in range(1500)
+    ])
+    forensic_api.STORE.insert_many("call", [
+        {"caller": "+15552000001", "receiver": "Self", "timestamp": "2031-01-01 12:00:00", "duration": 3, "type": "Missed"}
+    ])
+    return forensic_api.app.test_client()
+
+
+def _lines(body):
+    return [json.loads(line) for line in body.splitlines()]
+
+
+def test_ndjson_export_has_the_json_records(client):
+    view = client.get(f'/api/evidence/view?{RANGE}').get_json()
+    response = client.get(f'/api/evidence/view?{RANGE}&format=ndjson')
+    assert response.mimetype == "application/x-ndjson"
+    header, *records = _lines(response.get_data(as_text=True))
+    assert header["status"] == "authorized" and header["access_logs"]["artifact"] == "ALL"
+    assert [{k: v for k, v in r.items() if k != "source"} for r in records] == view["evidence_data"]
+    assert [r["source"] for r in records] == ["call"] + ["sms"] * 1500
+
+
+def test_large_exports_are_streamed_in_chunks(client, monkeypatch):
+    monkeypatch.setattr(streaming, "FLUSH_BYTES", 4096)
+    response = client.get(f'/api/evidence/view?{RANGE}&type=sms&format=ndjson')
+    chunks = list(response.response)
+    assert len(chunks) > 10
+    assert len(_lines(b"".join(chunks).decode())) == 1501
+
+
+def test_gzip_is_opt_in_and_decodes_to_the_same_lines(client):
+    plain = client.get(f'/api/evidence/view?{RANGE}&format=ndjson').get_data(as_text=True)
+    response = client.get(f'/api/evidence/view?{RANGE}&format=ndjson&gzip=1', headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    # Each request writes its own access log entry; compare the records
+    assert _lines(gzip.decompress(response.get_data()).decode())[1:] == _lines(plain)[1:]
+
+    no_accept = client.get(f'/api/evidence/view?{RANGE}&format=ndjson&gzip=1')
+    assert "Content-Encoding" not in no_accept.headers
@@ -0,0 +1,60 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from forensic_analysis import FingerprintSet, ForensicAnalyzer, StreamingForensicAnalyzer
+from synthetic_data import generate_case
+
+NOW = datetime(2024, 6, 1)
+
+
+@pytest.fixture(scope="module")
+def exports(tmp_path_factory):
+    calls, sms = generate_case(3000, 2000, n_contacts=60, days=10, seed=4, end=NOW)
+    directory = tmp_path_factory.mktemp("exports")
+    calls.to_csv(directory / "calls.csv", index=False)
+    sms.to_csv(directory / "sms.csv", index=False)
+    return directory / "calls.csv", directory / "sms.csv"
+
+
+def _in_memory_report(calls_path, sms_path, monkeypatch):
+    # ForensicAnalyzer compares against the wall clock; pin it to the streaming analyzer's `now`
+    monkeypatch.setattr("forensic_analysis.datetime", type("FixedNow", (datetime,), {"now": staticmethod(lambda: NOW)}))
+    return ForensicAnalyzer(pd.read_csv(calls_path), pd.read_csv(sms_path)).analyze()
+
+
+@pytest.mark.parametrize("chunksize", [97, 1000, 10_000])
+def test_streaming_report_matches_in_memory_analysis(exports, monkeypatch, chunksize):
+    calls_path, sms_path = exports
+    streamed = StreamingForensicAnalyzer(chunksize=chunksize, now=NOW).analyze_files(calls_path, sms_path)
+    assert streamed == _in_memory_report(calls_path, sms_path, monkeypatch)
+
+
+def test_merged_time_slices_match_one_pass(exports, monkeypatch):
+    calls_path, sms_path = exports
+    bounds = [None, pd.Timestamp("2024-05-25"), pd.Timestamp("2024-05-28"), None]
+    slices = [StreamingForensicAnalyzer(chunksize=500, now=NOW, time_range=(start, end))
+              for start, end in zip(bounds, bounds[1:])]
+    for analyzer in slices:
+        for path, consume in ((calls_path, analyzer.consume_calls), (sms_path, analyzer.consume_sms)):
+            for chunk in pd.read_csv(path, chunksize=500):
+                consume(chunk)
+    merged = slices[0]
+    for analyzer in slices[1:]:
+        merged.merge(analyzer)
+    assert merged.finalize() == _in_memory_report(calls_path, sms_path, monkeypatch)
+
+
+def test_fingerprint_set_counts_duplicates_like_a_set():
+    rng = np.random.default_rng(1)
+    fingerprints, seen, expected = FingerprintSet(), set(), 0
+    for _ in range(50):
+        batch = rng.integers(0, 2000, rng.integers(1, 200)).astype(np.uint64)
+        for value in batch.tolist():
+            expected += value in seen
+            seen.add(value)
+        assert fingerprints.add(batch) == expected
+        expected = 0
+    assert len(fingerprints) == len(seen)
@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+import timeline_api
+from evidence_store import parse_timestamp
+
+STORE = timeline_api.STORE
+
+
+@pytest.fixture(scope="module")
+def client():
+    STORE.insert_many("call", [
+        {"caller": "+15550000001", "receiver": "Self", "timestamp": None, "duration": 5, "type": "Missed"},
+        {"caller": "+15550000002", "receiver": "Self", "timestamp": "yesterday", "duration": 5, "type": "Incoming"},
+        *[{"caller": f"+1555000{i:04d}", "receiver": "Self", "timestamp": f"2024-05-0{1 + i % 3} 10:00:00",
+           "duration": i, "type": "Incoming"} for i in range(10)],
+    ])
+    STORE.insert_many("sms", [
+        {"sender": "+15550000003", "receiver": "Self", "timestamp": "n/a", "content": "undated", "risk": "low"},
+        *[{"sender": f"+1555100{i:04d}", "receiver": "Self", "timestamp": f"2024-05-0{1 + i % 3} 10:00:00",
+           "content": f"sms {i}", "risk": "low"} for i in range(7)],
+    ])
+    return timeline_api.app.test_client()
+
+
+def _total():
+    return sum(len(STORE.query(kind)) for kind in timeline_api.TIMELINE_SOURCES)
+
+
+def test_undated_events_come_first(client):
+    data = client.get('/api/timeline?limit=10000').get_json()["data"]
+    assert len(data) == _total()
+    undated = [parse_timestamp(event["timestamp"]) is None for event in data]
+    assert undated == sorted(undated, reverse=True) and sum(undated) >= 3
+    dated = [parse_timestamp(event["timestamp"]) for event in data if parse_timestamp(event["timestamp"]) is not None]
+    assert dated == sorted(dated)
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 7])
+def test_pages_cover_the_timeline_once(client, limit):
+    full = client.get('/api/timeline?limit=10000').get_json()["data"]
+    pages, cursor = [], None
+    while True:
+        response = client.get(f'/api/timeline?limit={limit}' + (f'&cursor={cursor}' if cursor else '')).get_json()
+        pages.extend(response["data"])
+        cursor = response["next_cursor"]
+        if cursor is None:
+            break
+    assert pages == full
+
+
+def test_ndjson_export_matches_the_pages(client):
+    full = client.get('/api/timeline?limit=10000').get_json()["data"]
+    response = client.get('/api/timeline?format=ndjson')
+    assert [json.loads(line) for line in response.get_data(as_text=True).splitlines()] == full
+
+
+def test_date_range_excludes_undated_events(client):
+    data = client.get('/api/timeline?start_date=2024-05-01&end_date=2024-05-02').get_json()["data"]
+    assert data and all(parse_timestamp(event["timestamp"]) is not None for event in data)
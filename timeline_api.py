@@ -1,11 +1,24 @@
 from flask import Flask, jsonify, request
 from datetime import datetime
+import base64
+import heapq
 import json
+from itertools import islice, repeat
+
+from columnar import MISSING_TS, StringTable, iter_blocks
+from evidence_store import EvidenceStore, parse_date_range
+from metrics import instrument
+from streaming import ndjson_response, wants_gzip, wants_ndjson
 
 app = Flask(__name__)
+instrument(app)
+
+# --- Evidence Store ---
+# Same SQLite store as forensic_api, so ingested evidence shows up here too
+STORE = EvidenceStore()
 
-# --- Sample Database Data (In-Memory) ---
-# In a real scenario, this would come from a SQL/NoSQL DB
+# --- Sample Database Data ---
+# Seeded into the store on first start only
 CALL_LOGS = [
     {"id": 101, "caller": "+15559876543", "receiver": "Self", "timestamp": "2023-10-24 10:05:23", "duration": "12:45", "type": "Incoming"},
     {"id": 102, "caller": "+15551112222", "receiver": "Self", "timestamp": "2023-10-24 18:20:11", "duration": "00:00", "type": "Missed"},
@@ -20,6 +33,15 @@ ALERTS = [
     {"id": 301, "type": "Malware", "desc": "Suspicious APK download", "timestamp": "2023-10-24 16:15:00", "score": 90}
 ]
 
+STORE.seed("call", CALL_LOGS)
+STORE.seed("sms", SMS_LOGS)
+STORE.seed("alert", ALERTS)
+
+# Timeline sources in tie-break order for events sharing a timestamp
+TIMELINE_SOURCES = ["call", "sms", "alert"]
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10000
+
 # --- Helper Functions ---
 def normalize_event(event, source_type):
     """Normalize different data structures into a standard Timeline Event."""
@@ -46,34 +68,83 @@ def normalize_event(event, source_type):
         
     return normalized
 
+def encode_cursor(position):
+    ts, rank, record_id = position
+    return base64.urlsafe_b64encode(f"{ts}:{rank}:{record_id}".encode()).decode()
+
+def decode_cursor(cursor):
+    ts, rank, record_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+    return int(ts), int(rank), int(record_id)
+
+def iter_timeline(start=None, end=None, after=None, batch_size=1000):
+    """
+    Lazily merges the per-source streams (each already ordered by parsed
+    timestamp via the store's (ts, id) index) into one chronological stream.
+    Yields ((ts, source_rank, id), event); `after` is such a position to resume from.
+    Events without a parseable timestamp come first (ts = MISSING_TS), by source
+    and id; a start/end range excludes them.
+    """
+    def source_stream(rank, kind):
+        resume = None
+        if after is not None:
+            ts, cursor_rank, record_id = after
+            ts = None if ts == MISSING_TS else ts
+            # Same timestamp: earlier sources are done, later ones restart at the first id
+            if rank < cursor_rank:
+                resume = (ts, float('inf'))
+            elif rank == cursor_rank:
+                resume = (ts, record_id)
+            else:
+                resume = (ts, -1)
+        # Positions come straight from the blocks' ts/id arrays; a record dict is
+        # only decoded for events that actually leave the merge
+        for block in iter_blocks(STORE, kind, start, end, resume, batch_size, strings=strings):
+            for i, position in enumerate(zip(block.ts.tolist(), repeat(rank), block.ids.tolist())):
+                yield position, block, i
+
+    strings = StringTable()
+    streams = [source_stream(rank, kind) for rank, kind in enumerate(TIMELINE_SOURCES)]
+    for position, block, i in heapq.merge(*streams, key=lambda item: item[0]):
+        yield position, normalize_event(block.record(i), TIMELINE_SOURCES[position[1]])
+
 @app.route('/api/timeline', methods=['GET'])
 def get_timeline():
     """
     API Endpoint to get reconstructed timeline.
-    Query Params: start_date, end_date (optional)
+    Query Params: start_date, end_date (optional, inclusive; a bare date covers the whole day),
+                  limit (page size), cursor (next_cursor of the previous page),
+                  format=ndjson (stream the whole range as an export; limit optional), gzip=1
     """
-    timeline = []
-    
-    # Process Calls
-    for call in CALL_LOGS:
-        timeline.append(normalize_event(call, "call"))
-        
-    # Process SMS
-    for sms in SMS_LOGS:
-        timeline.append(normalize_event(sms, "sms"))
-        
-    # Process Alerts
-    for alert in ALERTS:
-        timeline.append(normalize_event(alert, "alert"))
-        
-    # Sort by Timestamp (Earliest -> Latest)
-    # ISO format strings sort correctly lexicographically
-    timeline.sort(key=lambda x: x['timestamp'])
-    
+    try:
+        start, end = parse_date_range(request.args.get('start_date'), request.args.get('end_date'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        after = decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+        if wants_ndjson(request):
+            limit = int(request.args['limit']) if request.args.get('limit') else None
+        else:
+            limit = min(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({"error": "invalid limit/cursor"}), 400
+    if limit is not None and limit < 1:
+        return jsonify({"error": "limit must be positive"}), 400
+
+    if wants_ndjson(request):
+        events = (event for _, event in islice(iter_timeline(start, end, after), limit))
+        return ndjson_response(events, compress=wants_gzip(request))
+
+    # Fetch one extra event to know whether another page exists
+    page = list(islice(iter_timeline(start, end, after, batch_size=limit + 1), limit + 1))
+    next_cursor = encode_cursor(page[limit - 1][0]) if len(page) > limit else None
+    timeline = [event for _, event in page[:limit]]
+
     return jsonify({
         "status": "success",
         "count": len(timeline),
-        "data": timeline
+        "data": timeline,
+        "next_cursor": next_cursor
     })
 
 if __name__ == '__main__':
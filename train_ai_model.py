@@ -2,9 +2,15 @@ import pandas as pd
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.naive_bayes import MultinomialNB
 from sklearn.pipeline import Pipeline
+import argparse
 import joblib
 import os
 
+from compact_model import export_compact_model
+from online_model import ONLINE_MODEL_DIR, train_online
+
+COMPACT_MODEL_DIR = 'forensic_ai_model'
+
 # 1. Training Data (Forensic Malicious vs Clean Patterns)
 TRAINING_DATA = [
     # Malicious / Phishing / Threat
@@ -41,6 +47,17 @@ def train_forensic_model():
     # Save for real-time use
     joblib.dump(model, 'forensic_ai_model.pkl')
     print("[AI] Model trained and saved as forensic_ai_model.pkl")
+
+    # Memory-mappable export shared by all API workers
+    export_compact_model(model, COMPACT_MODEL_DIR)
+    print(f"[AI] Compact model exported to {COMPACT_MODEL_DIR}/")
+    return model
+
+def train_online_model(directory=ONLINE_MODEL_DIR):
+    """Publishes the next online model version, seeded with TRAINING_DATA when none exists yet."""
+    print("[AI] Updating online forensic model...")
+    model, path = train_online([], [], directory, bootstrap=TRAINING_DATA)
+    print(f"[AI] Online model version {model.version} published as {path}")
     return model
 
 def load_or_train():
@@ -49,4 +66,11 @@ def load_or_train():
     return train_forensic_model()
 
 if __name__ == "__main__":
-    train_forensic_model()
+    parser = argparse.ArgumentParser(description="Train the forensic text model")
+    parser.add_argument("--online", action="store_true",
+                        help="Publish an online (partial_fit) model version that running API workers hot-swap to")
+    args = parser.parse_args()
+    if args.online:
+        train_online_model()
+    else:
+        train_forensic_model()